@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+PostProcessor scoring benchmark
+
+Compares the per-recipe reference loop (``score_recipe`` + sort) with the
+vectorized ``PostProcessor.score_batch`` on synthetic, in-memory recipe
+libraries and checks that both produce the identical ranking.
+
+Usage:
+    python scripts/benchmark_postprocess.py
+    python scripts/benchmark_postprocess.py --sizes 1000 10000 100000 --repeat 3
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from app.models.recipes import Recipe, RecipeItem
+from app.rag.postprocess import PostProcessor
+
+INGREDIENTS = [
+    "chicken breast", "rice", "oats", "banana", "tofu", "spinach", "peanut butter",
+    "greek yogurt", "salmon", "lentils", "quinoa", "broccoli", "egg", "avocado",
+]
+QUERY = "high protein chicken rice bowl"
+CONSTRAINTS = {"max_kcal": 700, "remaining_kcal": 650}
+
+
+def make_recipes(count: int, seed: int = 0) -> Tuple[List[Recipe], Dict[int, float]]:
+    rng = random.Random(seed)
+    recipes: List[Recipe] = []
+    semantic_scores: Dict[int, float] = {}
+    for recipe_id in range(1, count + 1):
+        names = rng.sample(INGREDIENTS, rng.randint(2, 5))
+        recipes.append(
+            Recipe(
+                id=recipe_id,
+                title=f"{names[0]} {names[-1]} bowl",
+                instructions_json=["Mix everything and serve."],
+                macros_kcal=float(rng.randint(150, 1100)),
+                ingredients=[
+                    RecipeItem(recipe_id=recipe_id, name=name, grams=float(rng.randint(20, 250)))
+                    for name in names
+                ],
+            )
+        )
+        semantic_scores[recipe_id] = round(rng.random(), 3)
+    return recipes, semantic_scores
+
+
+def reference_scores(processor: PostProcessor, recipes: List[Recipe], semantic_scores: Dict[int, float]):
+    scored = []
+    for recipe in recipes:
+        score = processor.score_recipe(
+            recipe=recipe,
+            query_text=QUERY,
+            constraints=CONSTRAINTS,
+            negative_ingredients=["tofu"],
+            semantic_score=semantic_scores.get(recipe.id),
+        )
+        if score is not None:
+            scored.append((score, recipe))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return scored
+
+
+def batch_scores(processor: PostProcessor, recipes: List[Recipe], semantic_scores: Dict[int, float]):
+    return processor.score_batch(
+        recipes=recipes,
+        query_vector=None,
+        recipe_vectors=None,
+        query_text=QUERY,
+        constraints=CONSTRAINTS,
+        negative_ingredients=["tofu"],
+        semantic_scores=semantic_scores,
+    )
+
+
+def best_of(repeat: int, fn, *args) -> Tuple[float, list]:
+    best, result = float("inf"), []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    processor = PostProcessor()
+    print(f"{'recipes':>8}  {'reference ms':>12}  {'batch ms':>9}  {'speedup':>7}  identical")
+    for size in args.sizes:
+        recipes, semantic_scores = make_recipes(size)
+        ref_time, expected = best_of(args.repeat, reference_scores, processor, recipes, semantic_scores)
+        batch_time, actual = best_of(args.repeat, batch_scores, processor, recipes, semantic_scores)
+        identical = [(s, r.id) for s, r in expected] == [(s, r.id) for s, r in actual]
+        print(
+            f"{size:>8}  {ref_time * 1000:>12.1f}  {batch_time * 1000:>9.1f}  "
+            f"{ref_time / batch_time if batch_time else 0.0:>6.1f}x  {'yes' if identical else 'NO'}"
+        )
+        if not identical:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
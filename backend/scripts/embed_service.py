@@ -10,14 +10,33 @@ Usage:
 The Advisor router will POST {"texts": ["..."]} to /embed and expects
 {"vectors": [[...]]} in response. This module keeps the interface stable
 and can be swapped out for more advanced vector providers later.
+
+Concurrent requests are coalesced: texts arriving within EMBED_BATCH_WINDOW_MS
+(default 5 ms) are encoded together, up to EMBED_MAX_BATCH texts (default 64),
+and the vectors are fanned back out to the waiting requests. Batch-size and
+queue-wait histograms are served at /metrics.
+
+JSON is the default response. Clients sending
+`Accept: application/x-embedding; dtype=float32|float16` get a packed binary
+payload instead: a 16 byte little-endian header (magic "EMBV", uint32 count,
+uint32 dim, uint16 dtype code 1=float32/2=float16, 2 pad bytes) followed by the
+row-major vector values. The backend decodes it in app/rag/embedding_client.py.
 """
 
 from __future__ import annotations
 
+import os
+import queue
+import struct
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import Future
 from functools import lru_cache
-from typing import List
+from typing import Dict, List, Sequence, Tuple
 
-from fastapi import FastAPI, HTTPException
+import numpy as np
+from fastapi import FastAPI, Header, HTTPException, Response
 from pydantic import BaseModel, Field
 from sentence_transformers import SentenceTransformer
 
@@ -36,19 +55,153 @@ def _load_model(model_name: str = "sentence-transformers/all-MiniLM-L6-v2") -> S
     return SentenceTransformer(model_name, device="cpu")
 
 
+EMBEDDING_MEDIA_TYPE = "application/x-embedding"
+_HEADER = struct.Struct("<4sIIH2x")
+_WIRE_DTYPES = {"float32": (1, "<f4"), "float16": (2, "<f2")}
+
+
+def _negotiate_dtype(accept: str | None) -> str | None:
+    """Return the binary dtype requested via the Accept header, or None for JSON."""
+    for media_range in (accept or "").split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        if media_type != EMBEDDING_MEDIA_TYPE:
+            continue
+        options = dict(param.split("=", 1) for param in params if "=" in param)
+        dtype = options.get("dtype", "float32")
+        return dtype if dtype in _WIRE_DTYPES else None
+    return None
+
+
+def _pack_vectors(vectors: np.ndarray, dtype: str) -> bytes:
+    code, np_dtype = _WIRE_DTYPES[dtype]
+    matrix = np.ascontiguousarray(vectors, dtype=np_dtype)
+    return _HEADER.pack(b"EMBV", matrix.shape[0], matrix.shape[1], code) + matrix.tobytes()
+
+
+class Histogram:
+    """Fixed-bucket histogram (upper bounds are inclusive, last bucket is +Inf)."""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect_left(self.bounds, value)] += 1
+            self.total += value
+            self.samples += 1
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            labels = [f"le_{bound:g}" for bound in self.bounds] + ["le_inf"]
+            return {
+                "buckets": dict(zip(labels, self.counts)),
+                "count": self.samples,
+                "sum": self.total,
+            }
+
+
+class MicroBatcher:
+    """Coalesce concurrent embed calls into one ``model.encode`` batch.
+
+    A single worker thread owns the model: it blocks for the first request,
+    then keeps collecting requests until the window elapses or ``max_batch``
+    texts are queued, encodes everything at once and resolves each caller's
+    future with its slice of the result.
+    """
+
+    def __init__(self, window_ms: float = 5.0, max_batch: int = 64):
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Tuple[List[str], Future, float]]" = queue.Queue()
+        self._worker: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64, 128, 256])
+        self.queue_wait_ms = Histogram([0.5, 1, 2, 5, 10, 20, 50, 100, 250])
+
+    def _ensure_worker(self) -> None:
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+                self._worker.start()
+
+    def submit(self, texts: List[str]) -> "Future[np.ndarray]":
+        future: "Future[np.ndarray]" = Future()
+        self._ensure_worker()
+        self._queue.put((texts, future, time.perf_counter()))
+        return future
+
+    def _collect(self) -> List[Tuple[List[str], Future, float]]:
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.perf_counter() + self.window
+        while size < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            texts: List[str] = []
+            for item_texts, _, enqueued in batch:
+                texts.extend(item_texts)
+                self.queue_wait_ms.observe((started - enqueued) * 1000.0)
+            self.batch_sizes.observe(len(texts))
+            try:
+                vectors = _load_model().encode(texts, normalize_embeddings=True, convert_to_numpy=True)
+            except Exception as exc:
+                for _, future, _ in batch:
+                    future.set_exception(exc)
+                continue
+            offset = 0
+            for item_texts, future, _ in batch:
+                future.set_result(vectors[offset : offset + len(item_texts)])
+                offset += len(item_texts)
+
+
+BATCHER = MicroBatcher(
+    window_ms=float(os.getenv("EMBED_BATCH_WINDOW_MS", "5")),
+    max_batch=int(os.getenv("EMBED_MAX_BATCH", "64")),
+)
+
 app = FastAPI(title="dbwdi Embedding Service", version="0.1")
 
 
 @app.post("/embed", response_model=EmbedResponse)
-def embed(req: EmbedRequest) -> EmbedResponse:
+def embed(req: EmbedRequest, accept: str | None = Header(default=None)):
     if not req.texts:
         raise HTTPException(status_code=400, detail="At least one text is required")
 
-    model = _load_model()
-    vectors = model.encode(req.texts, normalize_embeddings=True, convert_to_numpy=True)
+    vectors = BATCHER.submit(req.texts).result()
+    dtype = _negotiate_dtype(accept)
+    if dtype is not None:
+        return Response(
+            content=_pack_vectors(vectors, dtype),
+            media_type=f"{EMBEDDING_MEDIA_TYPE}; dtype={dtype}",
+        )
     return EmbedResponse(vectors=vectors.tolist())
 
 
+@app.get("/metrics")
+def metrics() -> dict[str, object]:
+    return {
+        "batch_size": BATCHER.batch_sizes.snapshot(),
+        "queue_wait_ms": BATCHER.queue_wait_ms.snapshot(),
+    }
+
+
 @app.get("/healthz")
 def healthcheck() -> dict[str, str]:
     return {"status": "ok"}
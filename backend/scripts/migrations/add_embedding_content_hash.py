@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Add content_hash column to recipe_embeddings if it is missing.
+
+Rows keep NULL until they are re-embedded; the indexer compares them against
+the hash of their stored document text and model, so unchanged recipes are not
+re-embedded after this migration.
+
+This migration is idempotent: running it multiple times is safe.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Optional
+
+
+def column_exists(cursor: sqlite3.Cursor, table: str, column: str) -> bool:
+    cursor.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in cursor.fetchall())
+
+
+def table_exists(cursor: sqlite3.Cursor, table: str) -> bool:
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    return cursor.fetchone() is not None
+
+
+def resolve_sqlite_path() -> Path:
+    project_root = Path(__file__).resolve().parents[2]
+    src_dir = project_root / "src"
+    if str(src_dir) not in sys.path:
+        sys.path.insert(0, str(src_dir))
+
+    try:
+        from app.core.config import get_settings  # type: ignore
+    except ModuleNotFoundError as exc:  # pragma: no cover - defensive
+        raise SystemExit("Unable to import app.core.config; ensure PYTHONPATH includes backend/src.") from exc
+
+    settings = get_settings()
+    db_url = settings.database_url
+
+    if not db_url.startswith("sqlite"):
+        raise SystemExit(f"Unsupported database URL for this migration: {db_url}")
+
+    path_part: Optional[str] = None
+    if db_url.startswith("sqlite:///"):
+        path_part = db_url[len("sqlite:///") :]
+    elif db_url.startswith("sqlite://"):
+        path_part = db_url[len("sqlite://") :]
+
+    if not path_part:
+        raise SystemExit(f"Could not determine filesystem path from database URL: {db_url}")
+
+    db_path = Path(path_part)
+    if not db_path.is_absolute():
+        db_path = (project_root / db_path).resolve()
+    return db_path
+
+
+def main() -> None:
+    db_path = resolve_sqlite_path()
+
+    if not db_path.exists():
+        print(f"[SKIP] Database not found at {db_path}")
+        return
+
+    conn = sqlite3.connect(str(db_path))
+    try:
+        cur = conn.cursor()
+        if not table_exists(cur, "recipe_embeddings"):
+            print("[SKIP] recipe_embeddings table does not exist yet")
+            return
+        if column_exists(cur, "recipe_embeddings", "content_hash"):
+            print("[OK] recipe_embeddings.content_hash already exists")
+            return
+
+        print(f"[MIGRATE] Adding recipe_embeddings.content_hash column in {db_path}")
+        cur.execute("ALTER TABLE recipe_embeddings ADD COLUMN content_hash VARCHAR")
+        conn.commit()
+        print("[DONE] Column content_hash added to recipe_embeddings table")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
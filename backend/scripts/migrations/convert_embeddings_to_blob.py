@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Convert recipe_embeddings from JSON vectors to binary BLOB storage.
+
+Older databases store every embedding as a JSON list in a NOT NULL column.
+This migration rebuilds the table with the ``vector``/``dim``/``dtype`` columns,
+packs each JSON vector as little-endian float32 (or float16 with ``--dtype
+float16``) bytes and clears the JSON column. Afterwards the database is vacuumed
+so the freed pages are returned to the filesystem.
+
+This migration is idempotent: running it multiple times is safe.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+DTYPES = {"float32": "<f4", "float16": "<f2"}
+
+
+def column_exists(cursor: sqlite3.Cursor, table: str, column: str) -> bool:
+    cursor.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in cursor.fetchall())
+
+
+def table_exists(cursor: sqlite3.Cursor, table: str) -> bool:
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    return cursor.fetchone() is not None
+
+
+def resolve_sqlite_path() -> Path:
+    """Return the sqlite database path using the FastAPI settings."""
+    project_root = Path(__file__).resolve().parents[2]
+    src_dir = project_root / "src"
+    if str(src_dir) not in sys.path:
+        sys.path.insert(0, str(src_dir))
+
+    try:
+        from app.core.config import get_settings  # type: ignore
+    except ModuleNotFoundError as exc:  # pragma: no cover - defensive
+        raise SystemExit("Unable to import app.core.config; ensure PYTHONPATH includes backend/src.") from exc
+
+    settings = get_settings()
+    db_url = settings.database_url
+
+    if not db_url.startswith("sqlite"):
+        raise SystemExit(f"Unsupported database URL for this migration: {db_url}")
+
+    path_part: Optional[str] = None
+    if db_url.startswith("sqlite:///"):
+        path_part = db_url[len("sqlite:///") :]
+    elif db_url.startswith("sqlite://"):
+        path_part = db_url[len("sqlite://") :]
+
+    if not path_part:
+        raise SystemExit(f"Could not determine filesystem path from database URL: {db_url}")
+
+    db_path = Path(path_part)
+    if not db_path.is_absolute():
+        db_path = (project_root / db_path).resolve()
+    return db_path
+
+
+def rebuild_table(cur: sqlite3.Cursor) -> None:
+    """Recreate recipe_embeddings with a nullable JSON column plus BLOB columns."""
+    cur.execute(
+        """
+        CREATE TABLE recipe_embeddings_new (
+            recipe_id INTEGER NOT NULL PRIMARY KEY REFERENCES recipe(id),
+            embedding JSON,
+            vector BLOB,
+            dim INTEGER,
+            dtype VARCHAR,
+            document_text TEXT NOT NULL,
+            model_name VARCHAR NOT NULL,
+            content_hash VARCHAR,
+            updated_at DATETIME NOT NULL
+        )
+        """
+    )
+    cur.execute(
+        """
+        INSERT INTO recipe_embeddings_new (recipe_id, embedding, document_text, model_name, updated_at)
+        SELECT recipe_id, embedding, document_text, model_name, updated_at FROM recipe_embeddings
+        """
+    )
+    cur.execute("DROP TABLE recipe_embeddings")
+    cur.execute("ALTER TABLE recipe_embeddings_new RENAME TO recipe_embeddings")
+
+
+def convert_rows(cur: sqlite3.Cursor, dtype: str) -> int:
+    rows = cur.execute(
+        "SELECT recipe_id, embedding FROM recipe_embeddings WHERE vector IS NULL AND embedding IS NOT NULL"
+    ).fetchall()
+    converted = 0
+    for recipe_id, raw in rows:
+        try:
+            values = json.loads(raw)
+        except (TypeError, ValueError):
+            print(f"[WARN] recipe_id={recipe_id}: embedding is not valid JSON, skipped")
+            continue
+        if not values:
+            continue
+        blob = np.asarray(values, dtype=DTYPES[dtype]).tobytes()
+        cur.execute(
+            "UPDATE recipe_embeddings SET vector = ?, dim = ?, dtype = ?, embedding = NULL WHERE recipe_id = ?",
+            (blob, len(values), dtype, recipe_id),
+        )
+        converted += 1
+    return converted
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dtype", choices=sorted(DTYPES), default="float32", help="Element type for stored vectors")
+    args = parser.parse_args()
+
+    db_path = resolve_sqlite_path()
+
+    if not db_path.exists():
+        print(f"[SKIP] Database not found at {db_path}")
+        return
+
+    conn = sqlite3.connect(str(db_path))
+    try:
+        cur = conn.cursor()
+        if not table_exists(cur, "recipe_embeddings"):
+            print("[SKIP] recipe_embeddings table does not exist yet")
+            return
+
+        if not column_exists(cur, "recipe_embeddings", "vector"):
+            print(f"[MIGRATE] Rebuilding recipe_embeddings with BLOB columns in {db_path}")
+            rebuild_table(cur)
+        elif not column_exists(cur, "recipe_embeddings", "content_hash"):
+            # Tables rebuilt by earlier versions of this script lack the column.
+            cur.execute("ALTER TABLE recipe_embeddings ADD COLUMN content_hash VARCHAR")
+
+        converted = convert_rows(cur, args.dtype)
+        conn.commit()
+        if converted:
+            conn.execute("VACUUM")
+            print(f"[DONE] Converted {converted} embeddings to {args.dtype} BLOBs")
+        else:
+            print("[OK] recipe_embeddings already uses BLOB storage")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
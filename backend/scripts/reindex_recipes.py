@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Reindex recipe embeddings outside of user requests.
+
+Walks the recipe library in chunks, embeds each chunk with one batched call,
+commits it and records a checkpoint, so an interrupted run (Ctrl+C, crash)
+continues where it stopped when started again.
+
+Usage:
+    python scripts/reindex_recipes.py                 # embed new and edited recipes only
+    python scripts/reindex_recipes.py --force         # re-embed everything
+    python scripts/reindex_recipes.py --chunk-size 256 --no-resume
+"""
+
+from __future__ import annotations
+
+import argparse
+import signal
+import sys
+import threading
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT / "src") not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from sqlmodel import Session  # noqa: E402
+
+from app.core.database import engine, init_db  # noqa: E402
+from app.rag.reindex import ReindexJob, ReindexProgress  # noqa: E402
+from app.routers.advisor.rag import _recipe_indexer  # noqa: E402
+
+
+def _format_eta(seconds: float | None) -> str:
+    if seconds is None:
+        return "?"
+    minutes, secs = divmod(int(seconds), 60)
+    return f"{minutes}m{secs:02d}s"
+
+
+def _print_progress(progress: ReindexProgress) -> None:
+    print(
+        f"[REINDEX] {progress.processed}/{progress.total} recipes "
+        f"({progress.rate_per_s:.1f}/s, ETA {_format_eta(progress.eta_s)})",
+        flush=True,
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Reindex recipe embeddings in resumable chunks")
+    parser.add_argument("--chunk-size", type=int, default=128, help="Recipes embedded and committed per chunk")
+    parser.add_argument("--force", action="store_true", help="Re-embed recipes even if their content is unchanged")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore the checkpoint of an unfinished run")
+    args = parser.parse_args()
+
+    init_db()
+    stop = threading.Event()
+    # First Ctrl+C finishes the current chunk and keeps the checkpoint.
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    with Session(engine) as session:
+        job = ReindexJob(
+            session,
+            _recipe_indexer(session),
+            chunk_size=args.chunk_size,
+            force=args.force,
+            resume=not args.no_resume,
+            on_progress=_print_progress,
+            stop_event=stop,
+        )
+        if job.resume:
+            print("[REINDEX] Resuming from checkpoint if an unfinished run exists")
+        progress = job.run()
+
+    if progress.status == "completed":
+        print(f"[DONE] Reindexed {progress.processed} recipes in {progress.elapsed_s:.1f}s")
+        return 0
+    if progress.status == "cancelled":
+        print(f"[STOP] Stopped at {progress.processed}/{progress.total}; rerun to resume")
+        return 1
+    print(f"[FAIL] {progress.error} (at {progress.processed}/{progress.total}); rerun to resume")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,6 +10,7 @@ from sqlmodel import Session, select
 from app.core.database import engine  # noqa: E402
 from app.models.foods import Food  # noqa: E402
 from app.models.recipes import Recipe, RecipeItem  # noqa: E402
+from app.rag.features import get_feature_store  # noqa: E402
 from app.utils.nutrition import macros_for_grams, sum_macros  # noqa: E402
 
 
@@ -560,7 +561,7 @@ def load_foods(session: Session) -> int:
 
 def load_recipes(session: Session) -> int:
     foods = {food.name.lower(): food for food in session.exec(select(Food))}
-    inserted = 0
+    inserted: list[Recipe] = []
     for recipe_seed in RECIPES:
         if session.exec(select(Recipe).where(Recipe.title == recipe_seed.title)).first():
             continue
@@ -606,9 +607,11 @@ def load_recipes(session: Session) -> int:
                     grams=ingredient.grams,
                 )
             )
-        inserted += 1
+        inserted.append(recipe)
     session.commit()
-    return inserted
+    # Precompute scoring features while the new rows are at hand.
+    get_feature_store().warm(inserted)
+    return len(inserted)
 
 
 def main() -> None:
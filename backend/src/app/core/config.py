@@ -28,6 +28,7 @@ class Settings(BaseSettings):
     docs_url: str = "/docs"
     database_url: str = f"sqlite:///{(BACKEND_ROOT / 'dbwdi.db').as_posix()}"
     database_echo: bool = False
+    database_fts: bool = True
     advisor_llm_enabled: bool = True
 
 
@@ -29,6 +29,18 @@ def init_db() -> None:
 
     SQLModel.metadata.create_all(engine)
 
+    from app.core.recipe_tags import ensure_recipe_tags
+
+    ensure_recipe_tags(engine)
+
+    from app.rag.indexer import ensure_embedding_schema
+
+    ensure_embedding_schema(engine)
+    if settings.database_fts:
+        from app.core.fts import ensure_fts
+
+        ensure_fts(engine)
+
 
 def get_session() -> Iterator[Session]:
     with Session(engine) as session:
@@ -0,0 +1,268 @@
+"""SQLite FTS5 full-text indexes for foods and recipes.
+
+``lower(name) LIKE '%q%'`` cannot use the ``food.name`` index, so food search,
+fuzzy food lookup and the recipe keyword fallback used to scan whole tables.
+Two FTS5 tables mirror the searchable text and are kept in sync by triggers:
+
+- ``food_fts(name, synonyms)``: trigram tokenizer, so a quoted phrase matches
+  any substring of at least three characters (same results as the old
+  ``LIKE '%q%'``, including inside German compounds like "Mager*quark*"),
+  plus ``FoodSynonym`` entries; ranked with bm25.
+- ``recipe_fts(title, tags, ingredients, instructions)``: word tokenizer with
+  prefix indexes for ranked prefix matching of query terms.
+
+The row ID of each FTS row is the ID of the food/recipe. ``ensure_fts`` creates
+the tables and triggers and backfills them (run from ``init_db``); everything
+else degrades to the plain SQL queries when FTS5 is unavailable.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import weakref
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+FOOD_FTS = "food_fts"
+RECIPE_FTS = "recipe_fts"
+MIN_SUBSTRING_CHARS = 3
+
+_FOOD_SYNONYMS = (
+    "(SELECT coalesce(group_concat(synonym, ' '), '') FROM foodsynonym WHERE food_id = {food_id})"
+)
+_RECIPE_INGREDIENTS = (
+    "(SELECT coalesce(group_concat(name, ' '), '') FROM recipeitem WHERE recipe_id = {recipe_id})"
+)
+
+_FOOD_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FOOD_FTS} USING fts5(name, synonyms, tokenize='trigram')",
+    f"""CREATE TRIGGER IF NOT EXISTS food_fts_ai AFTER INSERT ON food BEGIN
+        INSERT INTO {FOOD_FTS}(rowid, name, synonyms) VALUES (new.id, new.name, '');
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS food_fts_au AFTER UPDATE OF name ON food BEGIN
+        UPDATE {FOOD_FTS} SET name = new.name WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS food_fts_ad AFTER DELETE ON food BEGIN
+        DELETE FROM {FOOD_FTS} WHERE rowid = old.id;
+    END""",
+]
+
+_SYNONYM_DDL = [
+    f"""CREATE TRIGGER IF NOT EXISTS foodsynonym_fts_ai AFTER INSERT ON foodsynonym BEGIN
+        UPDATE {FOOD_FTS} SET synonyms = {_FOOD_SYNONYMS.format(food_id="new.food_id")}
+        WHERE rowid = new.food_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS foodsynonym_fts_au AFTER UPDATE ON foodsynonym BEGIN
+        UPDATE {FOOD_FTS} SET synonyms = {_FOOD_SYNONYMS.format(food_id="old.food_id")}
+        WHERE rowid = old.food_id;
+        UPDATE {FOOD_FTS} SET synonyms = {_FOOD_SYNONYMS.format(food_id="new.food_id")}
+        WHERE rowid = new.food_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS foodsynonym_fts_ad AFTER DELETE ON foodsynonym BEGIN
+        UPDATE {FOOD_FTS} SET synonyms = {_FOOD_SYNONYMS.format(food_id="old.food_id")}
+        WHERE rowid = old.food_id;
+    END""",
+]
+
+_RECIPE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {RECIPE_FTS}
+        USING fts5(title, tags, ingredients, instructions, prefix='2 3')""",
+    f"""CREATE TRIGGER IF NOT EXISTS recipe_fts_ai AFTER INSERT ON recipe BEGIN
+        INSERT INTO {RECIPE_FTS}(rowid, title, tags, ingredients, instructions)
+        VALUES (new.id, new.title, coalesce(new.tags, ''),
+                {_RECIPE_INGREDIENTS.format(recipe_id="new.id")}, coalesce(new.instructions_json, ''));
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS recipe_fts_au AFTER UPDATE OF title, tags, instructions_json ON recipe BEGIN
+        UPDATE {RECIPE_FTS}
+        SET title = new.title, tags = coalesce(new.tags, ''), instructions = coalesce(new.instructions_json, '')
+        WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS recipe_fts_ad AFTER DELETE ON recipe BEGIN
+        DELETE FROM {RECIPE_FTS} WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS recipeitem_fts_ai AFTER INSERT ON recipeitem BEGIN
+        UPDATE {RECIPE_FTS} SET ingredients = {_RECIPE_INGREDIENTS.format(recipe_id="new.recipe_id")}
+        WHERE rowid = new.recipe_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS recipeitem_fts_au AFTER UPDATE OF name, recipe_id ON recipeitem BEGIN
+        UPDATE {RECIPE_FTS} SET ingredients = {_RECIPE_INGREDIENTS.format(recipe_id="old.recipe_id")}
+        WHERE rowid = old.recipe_id;
+        UPDATE {RECIPE_FTS} SET ingredients = {_RECIPE_INGREDIENTS.format(recipe_id="new.recipe_id")}
+        WHERE rowid = new.recipe_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS recipeitem_fts_ad AFTER DELETE ON recipeitem BEGIN
+        UPDATE {RECIPE_FTS} SET ingredients = {_RECIPE_INGREDIENTS.format(recipe_id="old.recipe_id")}
+        WHERE rowid = old.recipe_id;
+    END""",
+]
+
+_FOOD_BACKFILL = f"""
+    INSERT INTO {FOOD_FTS}(rowid, name, synonyms)
+    SELECT f.id, f.name, {{synonyms}} FROM food f
+"""
+_RECIPE_BACKFILL = f"""
+    INSERT INTO {RECIPE_FTS}(rowid, title, tags, ingredients, instructions)
+    SELECT r.id, r.title, coalesce(r.tags, ''), {_RECIPE_INGREDIENTS.format(recipe_id="r.id")},
+           coalesce(r.instructions_json, '')
+    FROM recipe r
+"""
+
+_READY: "weakref.WeakKeyDictionary[Any, Tuple[bool, bool]]" = weakref.WeakKeyDictionary()
+_READY_LOCK = threading.Lock()
+
+
+def _engine_of(bind: Any) -> Any:
+    return getattr(bind, "engine", bind)
+
+
+def _is_sqlite(bind: Any) -> bool:
+    url = getattr(_engine_of(bind), "url", None)
+    return url is not None and url.get_backend_name() == "sqlite"
+
+
+def _table_exists(conn: Connection, name: str) -> bool:
+    row = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": name}
+    ).first()
+    return row is not None
+
+
+def _count(conn: Connection, table: str) -> int:
+    return int(conn.execute(text(f"SELECT count(*) FROM {table}")).scalar() or 0)
+
+
+def fts5_available(conn: Connection) -> bool:
+    """Whether the SQLite library was compiled with FTS5 (and the trigram tokenizer)."""
+    try:
+        conn.execute(text("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x, tokenize='trigram')"))
+        conn.execute(text("DROP TABLE temp._fts5_probe"))
+        return True
+    except Exception:
+        return False
+
+
+def _sync_table(conn: Connection, fts_table: str, source_table: str, backfill: str) -> None:
+    """Rebuild ``fts_table`` from its source table if row counts disagree."""
+    if _count(conn, fts_table) == _count(conn, source_table):
+        return
+    print(f"[INFO] Rebuilding {fts_table} from {source_table}")
+    conn.execute(text(f"DELETE FROM {fts_table}"))
+    conn.execute(text(backfill))
+
+
+def ensure_fts(engine: Engine) -> bool:
+    """Create the FTS tables and triggers (idempotent) and backfill missing rows.
+
+    Returns False (and leaves the schema untouched) for non-SQLite databases or
+    SQLite builds without FTS5.
+    """
+    if not _is_sqlite(engine):
+        return False
+    with engine.begin() as conn:
+        if not fts5_available(conn):
+            print("[WARN] SQLite FTS5 is not available; food/recipe search uses LIKE scans")
+            return False
+        has_food = _table_exists(conn, "food")
+        has_recipe = _table_exists(conn, "recipe") and _table_exists(conn, "recipeitem")
+        if has_food:
+            for statement in _FOOD_DDL:
+                conn.execute(text(statement))
+            has_synonyms = _table_exists(conn, "foodsynonym")
+            if has_synonyms:
+                for statement in _SYNONYM_DDL:
+                    conn.execute(text(statement))
+            synonyms = _FOOD_SYNONYMS.format(food_id="f.id") if has_synonyms else "''"
+            _sync_table(conn, FOOD_FTS, "food", _FOOD_BACKFILL.format(synonyms=synonyms))
+        if has_recipe:
+            for statement in _RECIPE_DDL:
+                conn.execute(text(statement))
+            _sync_table(conn, RECIPE_FTS, "recipe", _RECIPE_BACKFILL)
+    with _READY_LOCK:
+        _READY[_engine_of(engine)] = (has_food, has_recipe)
+    return has_food or has_recipe
+
+
+def _ready(bind: Any, table: str) -> bool:
+    """Whether ``table`` exists for this engine (positive results are cached)."""
+    engine = _engine_of(bind)
+    if engine is None or not _is_sqlite(engine):
+        return False
+    with _READY_LOCK:
+        cached = _READY.get(engine)
+    if cached is not None:
+        return cached[0] if table == FOOD_FTS else cached[1]
+    with engine.connect() as conn:
+        state = (_table_exists(conn, FOOD_FTS), _table_exists(conn, RECIPE_FTS))
+    if any(state):
+        with _READY_LOCK:
+            _READY[engine] = state
+    return state[0] if table == FOOD_FTS else state[1]
+
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def food_match_query(query: str) -> Optional[str]:
+    """FTS5 query for a substring search, or None if the query is too short for trigrams."""
+    cleaned = " ".join((query or "").split())
+    if len(cleaned) < MIN_SUBSTRING_CHARS:
+        return None
+    return _quote(cleaned)
+
+
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def recipe_match_query(query: str) -> Optional[str]:
+    """FTS5 query matching any word of ``query`` as a prefix (OR), or None if empty."""
+    terms = list(dict.fromkeys(word.lower() for word in _WORD_RE.findall(query or "") if len(word) > 1))
+    if not terms:
+        return None
+    return " OR ".join(f"{_quote(term)}*" for term in terms)
+
+
+def search_food_ids(session: Any, query: str, limit: int, offset: int = 0) -> Optional[List[int]]:
+    """Food IDs whose name or synonyms contain ``query``, best match first.
+
+    Returns None when the FTS index cannot answer the query (missing table,
+    no FTS5, query shorter than three characters) so callers can fall back to
+    ``LIKE``.
+    """
+    match = food_match_query(query)
+    if match is None or not _ready(session.get_bind(), FOOD_FTS):
+        return None
+    rows = session.execute(
+        text(
+            f"""SELECT f.id FROM {FOOD_FTS} JOIN food f ON f.id = {FOOD_FTS}.rowid
+            WHERE {FOOD_FTS} MATCH :match
+            ORDER BY bm25({FOOD_FTS}, 2.0, 1.0), f.name
+            LIMIT :limit OFFSET :offset"""
+        ),
+        {"match": match, "limit": limit, "offset": offset},
+    ).all()
+    return [int(row[0]) for row in rows]
+
+
+def search_recipe_ids(session: Any, query: str, limit: int) -> Optional[List[Tuple[int, float]]]:
+    """Recipes matching any query word (prefix match), as (recipe_id, score) best first.
+
+    Scores are the negated FTS5 bm25 rank, so higher is better. Returns None
+    when the recipe FTS index is unavailable.
+    """
+    match = recipe_match_query(query)
+    if match is None or not _ready(session.get_bind(), RECIPE_FTS):
+        return None
+    rows = session.execute(
+        text(
+            f"""SELECT rowid, -bm25({RECIPE_FTS}, 2.0, 1.0, 2.0, 0.5) AS score FROM {RECIPE_FTS}
+            WHERE {RECIPE_FTS} MATCH :match
+            ORDER BY score DESC
+            LIMIT :limit"""
+        ),
+        {"match": match, "limit": limit},
+    ).all()
+    return [(int(row[0]), float(row[1])) for row in rows]
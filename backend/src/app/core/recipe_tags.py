@@ -0,0 +1,35 @@
+"""Backfill of the normalized ``recipetag`` table.
+
+``Recipe.tags`` stays the comma separated source of truth; ``RecipeTag`` rows
+mirror it so preference filters can run as indexed ``EXISTS`` clauses instead
+of splitting the tag string of every recipe in Python. ORM writes keep the
+rows in sync (mapper events in ``app.models.recipes``); ``ensure_recipe_tags``
+fills them in for recipes written before the table existed or via raw SQL.
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import Table, exists, select
+from sqlalchemy.engine import Engine
+
+from app.models.recipes import Recipe, RecipeTag, split_tags
+
+
+def ensure_recipe_tags(engine: Engine) -> int:
+    """Create tag rows for tagged recipes that have none; returns the recipe count."""
+    recipe: Table = Recipe.__table__  # type: ignore[attr-defined]
+    tag_table: Table = RecipeTag.__table__  # type: ignore[attr-defined]
+    missing = (
+        select(recipe.c.id, recipe.c.tags)
+        .where(recipe.c.tags.is_not(None), recipe.c.tags != "")
+        .where(~exists().where(tag_table.c.recipe_id == recipe.c.id))
+    )
+    with engine.begin() as connection:
+        rows = [
+            {"recipe_id": recipe_id, "tag": tag}
+            for recipe_id, tags in connection.execute(missing)
+            for tag in split_tags(tags)
+        ]
+        if rows:
+            connection.execute(tag_table.insert(), rows)
+    return len({row["recipe_id"] for row in rows})
@@ -7,6 +7,7 @@ from starlette.requests import Request
 
 from app.core.config import get_settings
 from app.core.database import engine, init_db
+from app.utils.llm_service import get_llm_service, shutdown_llm_service
 from app.routers import (
     advisor,
     demo_ui,
@@ -85,6 +86,11 @@ def create_app() -> FastAPI:
     @application.on_event("startup")
     def _startup():
         init_db()
+        get_llm_service().start()
+
+    @application.on_event("shutdown")
+    def _shutdown():
+        shutdown_llm_service()
 
     return application
 
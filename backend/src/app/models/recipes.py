@@ -1,10 +1,15 @@
 from datetime import datetime, date
 from typing import Optional, List
 
-from sqlalchemy import Column, JSON
+from sqlalchemy import Column, Index, JSON, Table, event, inspect as sa_inspect
 from sqlmodel import Field, Relationship, SQLModel
 
 
+def split_tags(tags: Optional[str]) -> List[str]:
+    """Normalize a comma separated tag string (lowercase, stripped, unique)."""
+    return list(dict.fromkeys(t.strip().lower() for t in (tags or "").split(",") if t.strip()))
+
+
 class Recipe(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str = Field(index=True)
@@ -42,3 +47,38 @@ class RecipeItem(SQLModel, table=True):
     note: Optional[str] = None
 
     recipe: Recipe = Relationship(back_populates="ingredients")
+
+
+class RecipeTag(SQLModel, table=True):
+    """One normalized row per recipe tag, mirroring ``Recipe.tags`` for SQL filtering."""
+
+    __table_args__ = (Index("ix_recipetag_tag_recipe", "tag", "recipe_id"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    recipe_id: int = Field(foreign_key="recipe.id", index=True)
+    tag: str
+
+
+def _write_recipe_tags(connection, recipe_id: int, tags: Optional[str]) -> None:
+    table: Table = RecipeTag.__table__  # type: ignore[attr-defined]
+    connection.execute(table.delete().where(table.c.recipe_id == recipe_id))
+    rows = [{"recipe_id": recipe_id, "tag": tag} for tag in split_tags(tags)]
+    if rows:
+        connection.execute(table.insert(), rows)
+
+
+@event.listens_for(Recipe, "after_insert")
+def _recipe_tags_after_insert(mapper, connection, target: Recipe) -> None:
+    _write_recipe_tags(connection, target.id, target.tags)
+
+
+@event.listens_for(Recipe, "after_update")
+def _recipe_tags_after_update(mapper, connection, target: Recipe) -> None:
+    if sa_inspect(target).attrs.tags.history.has_changes():
+        _write_recipe_tags(connection, target.id, target.tags)
+
+
+@event.listens_for(Recipe, "after_delete")
+def _recipe_tags_after_delete(mapper, connection, target: Recipe) -> None:
+    table: Table = RecipeTag.__table__  # type: ignore[attr-defined]
+    connection.execute(table.delete().where(table.c.recipe_id == target.id))
@@ -0,0 +1,328 @@
+"""Approximate nearest-neighbour (ANN) indexes over the recipe vector store.
+
+``RecipeVectorStore`` answers exact top-k queries with one matrix-vector
+product, which is linear in the library size. For large, mostly LLM-generated
+libraries an ANN index narrows the search to a candidate set first; the store
+then re-scores those candidates exactly.
+
+Backends:
+    - ``exact``: no ANN structure, always scan the full matrix
+    - ``ivf``: pure NumPy IVF-flat (spherical k-means coarse quantizer)
+    - ``hnsw``: hnswlib graph index, used when the optional package is installed
+
+Indexes are persisted next to the SQLite database file and reconciled with the
+store on load, so a stale file only costs an incremental update, not a rebuild.
+"""
+
+from __future__ import annotations
+
+import math
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+import numpy as np
+
+try:  # pragma: no cover - optional dependency
+    import hnswlib  # type: ignore
+
+    HNSWLIB_AVAILABLE = True
+except Exception:  # pragma: no cover - optional dependency
+    hnswlib = None  # type: ignore
+    HNSWLIB_AVAILABLE = False
+
+
+class AnnIndex:
+    """Interface shared by all ANN backends.
+
+    Vectors passed in are expected to be L2-normalized float32 rows, as held by
+    ``RecipeVectorStore``; inner product therefore equals cosine similarity.
+    """
+
+    backend = "exact"
+    file_suffix = ""
+
+    def __len__(self) -> int:
+        return 0
+
+    @property
+    def dim(self) -> Optional[int]:
+        """Vector dimension the index was built for (None if empty)."""
+        return None
+
+    def ids(self) -> Set[int]:
+        """Recipe IDs currently contained in the index."""
+        return set()
+
+    def build(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        """(Re)build the index from scratch."""
+
+    def add(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        """Insert or replace vectors."""
+
+    def remove(self, ids: Iterable[int]) -> None:
+        """Remove vectors (unknown IDs are ignored)."""
+
+    def needs_rebuild(self, size: int) -> bool:
+        """Whether the index should be retrained for a store of ``size`` rows."""
+        return False
+
+    def search(self, query: np.ndarray, k: int) -> Optional[List[int]]:
+        """Return up to ``k`` candidate IDs, or None to request a full scan."""
+        return None
+
+    def save(self, path: Path) -> None:
+        """Persist the index to ``path``."""
+
+    def load(self, path: Path) -> bool:
+        """Load the index from ``path``; returns False if missing or unreadable."""
+        return False
+
+
+class IVFFlatIndex(AnnIndex):
+    """Inverted-file index with flat (exact) scoring inside the probed lists."""
+
+    backend = "ivf"
+    file_suffix = ".npz"
+
+    def __init__(self, nprobe: int = 8, kmeans_iterations: int = 10, seed: int = 0):
+        self.nprobe = nprobe
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[Set[int]] = []
+        self._assignment: Dict[int, int] = {}
+        self._trained_size = 0
+
+    def __len__(self) -> int:
+        return len(self._assignment)
+
+    @property
+    def dim(self) -> Optional[int]:
+        return None if self._centroids is None else int(self._centroids.shape[1])
+
+    def ids(self) -> Set[int]:
+        return set(self._assignment)
+
+    def _train(self, vectors: np.ndarray) -> np.ndarray:
+        """Spherical k-means with ~sqrt(n) lists."""
+        nlist = max(1, int(math.sqrt(len(vectors))))
+        rng = np.random.default_rng(self.seed)
+        centroids = vectors[rng.choice(len(vectors), size=nlist, replace=False)].copy()
+        for _ in range(self.kmeans_iterations):
+            labels = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, vectors)
+            norms = np.linalg.norm(sums, axis=1)
+            # Empty clusters keep their previous centroid.
+            filled = norms > 0
+            centroids[filled] = sums[filled] / norms[filled, None]
+        return centroids
+
+    def build(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        self._assignment = {}
+        if not len(ids):
+            self._centroids = None
+            self._lists = []
+            self._trained_size = 0
+            return
+        self._centroids = self._train(vectors)
+        self._lists = [set() for _ in range(len(self._centroids))]
+        self._trained_size = len(ids)
+        self.add(ids, vectors)
+
+    def add(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        if self._centroids is None or not len(ids):
+            return
+        if vectors.shape[1] != self._centroids.shape[1]:
+            # Different embedding model: drop the centroids so the index is rebuilt.
+            self.build([], vectors)
+            return
+        labels = np.argmax(vectors @ self._centroids.T, axis=1)
+        for recipe_id, label in zip(ids, labels):
+            recipe_id, label = int(recipe_id), int(label)
+            previous = self._assignment.get(recipe_id)
+            if previous is not None:
+                self._lists[previous].discard(recipe_id)
+            self._lists[label].add(recipe_id)
+            self._assignment[recipe_id] = label
+
+    def remove(self, ids: Iterable[int]) -> None:
+        for recipe_id in ids:
+            label = self._assignment.pop(int(recipe_id), None)
+            if label is not None:
+                self._lists[label].discard(int(recipe_id))
+
+    def needs_rebuild(self, size: int) -> bool:
+        # Centroids trained on a much smaller library give unbalanced lists.
+        return self._centroids is None or size > 4 * max(self._trained_size, 1)
+
+    def search(self, query: np.ndarray, k: int) -> Optional[List[int]]:
+        if self._centroids is None or query.shape[0] != self._centroids.shape[1]:
+            return None
+        order = np.argsort(-(self._centroids @ query))
+        candidates: List[int] = []
+        for rank, cluster in enumerate(order):
+            # Probe ``nprobe`` lists, and keep going while there are fewer than k hits.
+            if rank >= self.nprobe and len(candidates) >= k:
+                break
+            candidates.extend(self._lists[int(cluster)])
+        return candidates
+
+    def save(self, path: Path) -> None:
+        if self._centroids is None:
+            return
+        ids = np.fromiter(self._assignment.keys(), dtype=np.int64, count=len(self._assignment))
+        labels = np.fromiter(self._assignment.values(), dtype=np.int32, count=len(self._assignment))
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as fh:
+            np.savez(fh, centroids=self._centroids, ids=ids, labels=labels, trained_size=self._trained_size)
+        tmp.replace(path)
+
+    def load(self, path: Path) -> bool:
+        if not path.exists():
+            return False
+        try:
+            with np.load(path) as data:
+                centroids = data["centroids"].astype(np.float32)
+                ids, labels = data["ids"], data["labels"]
+                trained_size = int(data["trained_size"])
+        except Exception:
+            return False
+        self._centroids = centroids
+        self._lists = [set() for _ in range(len(centroids))]
+        self._assignment = {}
+        for recipe_id, label in zip(ids.tolist(), labels.tolist()):
+            self._lists[label].add(recipe_id)
+            self._assignment[recipe_id] = label
+        self._trained_size = trained_size
+        return True
+
+
+class HnswIndex(AnnIndex):
+    """Thin wrapper around ``hnswlib`` (inner-product space)."""
+
+    backend = "hnsw"
+    file_suffix = ".hnsw"
+
+    def __init__(self, dim: Optional[int] = None, ef_search: int = 64, ef_construction: int = 200, m: int = 16):
+        if not HNSWLIB_AVAILABLE:
+            raise RuntimeError("hnswlib is not installed")
+        self.ef_search = ef_search
+        self.ef_construction = ef_construction
+        self.m = m
+        self._index: Any = None
+        self._dim = dim
+        self._ids: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self._dim if self._index is not None else None
+
+    def ids(self) -> Set[int]:
+        return set(self._ids)
+
+    def _init(self, dim: int, capacity: int) -> Any:
+        assert hnswlib is not None  # checked in __init__
+        index = hnswlib.Index(space="ip", dim=dim)
+        # Positional: hnswlib 0.8 names the flag ``allow_replace_deleted``,
+        # its typeshed stub ``allow_replace_delete``.
+        index.init_index(max(capacity, 1024), self.m, self.ef_construction, 100, True)
+        index.set_ef(self.ef_search)
+        self._index = index
+        self._dim = dim
+        self._ids = set()
+        return index
+
+    def build(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        if not len(ids):
+            self._index = None
+            self._ids = set()
+            return
+        self._init(vectors.shape[1], len(ids) * 2)
+        self.add(ids, vectors)
+
+    def add(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        if not len(ids):
+            return
+        index = self._index
+        if index is None or self._dim != vectors.shape[1]:
+            index = self._init(vectors.shape[1], len(ids) * 2)
+        needed = len(self._ids | {int(i) for i in ids})
+        if needed > index.get_max_elements():
+            index.resize_index(needed * 2)
+        index.add_items(vectors, np.asarray(ids, dtype=np.int64), replace_deleted=True)
+        self._ids.update(int(i) for i in ids)
+
+    def remove(self, ids: Iterable[int]) -> None:
+        if self._index is None:
+            return
+        for recipe_id in ids:
+            if int(recipe_id) in self._ids:
+                try:
+                    self._index.mark_deleted(int(recipe_id))
+                except RuntimeError:  # already deleted in a reloaded index
+                    pass
+                self._ids.discard(int(recipe_id))
+
+    def needs_rebuild(self, size: int) -> bool:
+        return self._index is None
+
+    def search(self, query: np.ndarray, k: int) -> Optional[List[int]]:
+        if self._index is None or not self._ids:
+            return None
+        k = min(k, len(self._ids))
+        self._index.set_ef(max(self.ef_search, k))
+        labels, _ = self._index.knn_query(query.reshape(1, -1), k=k)
+        return [int(label) for label in labels[0]]
+
+    def save(self, path: Path) -> None:
+        if self._index is None:
+            return
+        self._index.save_index(str(path))
+
+    def load(self, path: Path) -> bool:
+        if not path.exists() or self._dim is None:
+            return False
+        try:
+            assert hnswlib is not None  # checked in __init__
+            index = hnswlib.Index(space="ip", dim=self._dim)
+            index.load_index(str(path), 0, True)  # allow_replace_deleted, see _init
+        except Exception:
+            return False
+        index.set_ef(self.ef_search)
+        self._index = index
+        self._ids = set(int(i) for i in index.get_ids_list()) - set(
+            int(i) for i in getattr(index, "get_deleted_ids", lambda: [])()
+        )
+        return True
+
+
+ANN_BACKENDS = ("exact", "ivf", "hnsw")
+
+
+def create_ann_index(backend: str, dim: Optional[int] = None, nprobe: int = 8) -> AnnIndex:
+    """Instantiate an ANN backend; ``hnsw`` degrades to ``ivf`` without hnswlib."""
+    if backend not in ANN_BACKENDS:
+        raise ValueError(f"ANN backend must be one of {', '.join(ANN_BACKENDS)}")
+    if backend == "hnsw" and HNSWLIB_AVAILABLE:
+        return HnswIndex(dim=dim)
+    if backend in ("hnsw", "ivf"):
+        return IVFFlatIndex(nprobe=nprobe)
+    return AnnIndex()
+
+
+def ann_index_path(bind, index: AnnIndex) -> Optional[Path]:
+    """Path of the persisted index next to the SQLite file (None if not file-backed)."""
+    if not index.file_suffix:
+        return None
+    url = getattr(bind, "url", None)
+    if url is None or url.get_backend_name() != "sqlite":
+        return None
+    database = url.database
+    if not database or database == ":memory:":
+        return None
+    db_path = Path(database)
+    return db_path.with_name(f"{db_path.stem}.recipe_ann{index.file_suffix}")
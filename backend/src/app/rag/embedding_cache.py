@@ -0,0 +1,199 @@
+"""LRU + TTL cache for query embeddings.
+
+Query texts repeat a lot (recommendations re-use the same per-day query and
+candidate retrieval embeds a constant probe string), and every miss costs an
+HTTP round trip to the embedding service. The cache is keyed by
+(model name, normalized text) so switching the embedding model never serves
+vectors from the old one.
+
+The cache is process-local and thread-safe. When a ``path`` is given, entries
+are loaded on startup and written back (atomically) every ``save_every``
+insertions and on an explicit ``save()``.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import numpy as np
+
+CacheKey = Tuple[str, str]
+
+
+def normalize_query_text(text: str) -> str:
+    """Normalize a query for use as a cache key (NFC, collapsed whitespace)."""
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+class EmbeddingCache:
+    """Bounded LRU cache of embedding vectors with per-entry time-to-live."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 0,
+        path: Optional[str | Path] = None,
+        save_every: int = 32,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            max_entries: Maximum number of cached vectors (0 disables the cache)
+            ttl_seconds: Entry lifetime in seconds (0 = never expire)
+            path: Optional JSON file used to persist entries across restarts
+            save_every: Persist after this many new entries (when ``path`` is set)
+            clock: Time source, wall clock so persisted timestamps stay valid
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = Path(path) if path else None
+        self.save_every = save_every
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, Tuple[float, List[float]]]" = OrderedDict()
+        self._dirty = 0
+        self.hits = 0
+        self.misses = 0
+        if self.path is not None:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """Return the cached vector for ``text`` or None (counted as a miss)."""
+        key = (model, normalize_query_text(text))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0], self._clock()):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, model: str, text: str, vector: Sequence[float]) -> None:
+        """Store ``vector`` for ``text``, evicting the least recently used entries."""
+        if self.max_entries <= 0:
+            return
+        key = (model, normalize_query_text(text))
+        with self._lock:
+            self._entries[key] = (self._clock(), [float(x) for x in vector])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty += 1
+            should_save = self.path is not None and self._dirty >= self.save_every
+        if should_save:
+            self.save()
+
+    def get_or_compute(
+        self,
+        model: str,
+        texts: Sequence[str],
+        compute: Callable[[List[str]], Optional[Sequence[Sequence[float]] | np.ndarray]],
+    ) -> Optional[List[List[float]]]:
+        """Return vectors for ``texts``, calling ``compute`` only for cache misses.
+
+        Returns None if ``compute`` fails (or returns a mismatched batch) for
+        any missing text, mirroring the behaviour of the uncached client.
+        """
+        results: List[Optional[List[float]]] = [self.get(model, text) for text in texts]
+        missing = [i for i, vector in enumerate(results) if vector is None]
+        if missing:
+            # Embed each distinct missing text once.
+            unique: Dict[str, List[int]] = {}
+            for i in missing:
+                unique.setdefault(normalize_query_text(texts[i]), []).append(i)
+            computed = compute([texts[positions[0]] for positions in unique.values()])
+            if computed is None or len(computed) != len(unique):
+                return None
+            for positions, vector in zip(unique.values(), computed):
+                self.put(model, texts[positions[0]], vector)
+                for i in positions:
+                    results[i] = [float(x) for x in vector]
+        return results  # type: ignore[return-value]
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._dirty = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Return size, hit/miss counters and the hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def save(self) -> bool:
+        """Write non-expired entries to ``path``; returns False without a path."""
+        if self.path is None:
+            return False
+        with self._lock:
+            now = self._clock()
+            entries = [
+                {"model": model, "text": text, "created_at": created_at, "vector": vector}
+                for (model, text), (created_at, vector) in self._entries.items()
+                if not self._expired(created_at, now)
+            ]
+            self._dirty = 0
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text(json.dumps({"version": 1, "entries": entries}), encoding="utf-8")
+            tmp.replace(self.path)
+        except OSError as exc:  # pragma: no cover - defensive
+            print("[WARN] Saving embedding cache failed:", exc)
+            return False
+        return True
+
+    def load(self) -> int:
+        """Load persisted entries (oldest first, so LRU order is kept); returns the count."""
+        if self.path is None or not self.path.exists():
+            return 0
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            entries = data.get("entries", [])
+        except (OSError, ValueError, AttributeError) as exc:
+            print("[WARN] Ignoring unreadable embedding cache:", exc)
+            return 0
+        now = self._clock()
+        loaded = 0
+        with self._lock:
+            for entry in entries:
+                try:
+                    key = (str(entry["model"]), str(entry["text"]))
+                    created_at = float(entry["created_at"])
+                    vector = [float(x) for x in entry["vector"]]
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if self._expired(created_at, now):
+                    continue
+                self._entries[key] = (created_at, vector)
+                self._entries.move_to_end(key)
+                loaded += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return loaded
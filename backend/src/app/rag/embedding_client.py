@@ -0,0 +1,237 @@
+"""Pooled HTTP client for the embedding service.
+
+A single ``EmbeddingClient`` is shared per process: it keeps connections to
+the ``/embed`` endpoint alive (``requests.Session`` + urllib3 pool), limits how
+many embedding calls run concurrently, and stops calling a failing service
+for a while (circuit breaker) instead of letting every request wait for the
+full timeout. Latency and outcome counters are exposed via ``stats()``.
+
+Vectors are negotiated in a packed binary format (``EMBEDDING_MEDIA_TYPE``): a
+16 byte header ``<4sIIH2x`` (magic ``EMBV``, count, dim, dtype code) followed by
+``count * dim`` little-endian float32 or float16 values. Services that only
+speak JSON keep working; the client decodes either reply into a float32 NumPy
+matrix.
+
+The client is a callable ``List[str] -> Optional[np.ndarray]`` so it can be
+passed anywhere an ``embedding_client`` function is expected (e.g.
+``RecipeIndexer``).
+"""
+
+from __future__ import annotations
+
+import struct
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+EMBEDDING_MEDIA_TYPE = "application/x-embedding"
+WIRE_FORMATS = ("json", "float32", "float16")
+
+_HEADER = struct.Struct("<4sIIH2x")
+_MAGIC = b"EMBV"
+_DTYPE_CODES = {1: "<f4", 2: "<f2"}
+_WIRE_DTYPES = {"float32": 1, "float16": 2}
+
+
+def pack_vectors(vectors: np.ndarray, dtype: str = "float32") -> bytes:
+    """Serialize a 2-D matrix in the binary embedding wire format."""
+    code = _WIRE_DTYPES[dtype]
+    matrix = np.ascontiguousarray(vectors, dtype=_DTYPE_CODES[code])
+    count, dim = matrix.shape
+    return _HEADER.pack(_MAGIC, count, dim, code) + matrix.tobytes()
+
+
+def unpack_vectors(payload: bytes) -> np.ndarray:
+    """Decode the binary embedding wire format into a float32 matrix."""
+    if len(payload) < _HEADER.size:
+        raise ValueError("embedding payload shorter than its header")
+    magic, count, dim, code = _HEADER.unpack_from(payload)
+    if magic != _MAGIC or code not in _DTYPE_CODES:
+        raise ValueError("not an embedding payload")
+    matrix = np.frombuffer(payload, dtype=_DTYPE_CODES[code], count=count * dim, offset=_HEADER.size)
+    return matrix.reshape(count, dim).astype(np.float32, copy=False)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half-open)."""
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go through; in half-open state only one probe is let through."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> bool:
+        """Close the circuit; returns True if it was open."""
+        with self._lock:
+            was_open = self._opened_at is not None
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+        return was_open
+
+    def record_failure(self) -> bool:
+        """Count a failure; returns True if this (re)opened the circuit."""
+        with self._lock:
+            self._failures += 1
+            opened = self._probing or (self.failure_threshold > 0 and self._failures >= self.failure_threshold)
+            if opened:
+                self._opened_at = time.monotonic()
+            self._probing = False
+        return opened
+
+
+class EmbeddingClient:
+    """Keep-alive, concurrency-limited client for the ``/embed`` HTTP endpoint."""
+
+    def __init__(
+        self,
+        url: str,
+        timeout: float = 15.0,
+        connect_timeout: float = 2.0,
+        max_concurrency: int = 4,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        latency_window: int = 256,
+        wire_format: str = "float32",
+    ):
+        """
+        Args:
+            url: Full URL of the embedding endpoint
+            timeout: Read timeout per call in seconds
+            connect_timeout: TCP connect timeout in seconds
+            max_concurrency: Maximum number of in-flight embedding calls
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a probe call
+            latency_window: Number of recent call latencies kept for percentiles
+            wire_format: Response format to request: "float32", "float16" or "json"
+        """
+        if wire_format not in WIRE_FORMATS:
+            raise ValueError(f"wire_format must be one of {', '.join(WIRE_FORMATS)}")
+        self.url = url
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_concurrency = max(1, max_concurrency)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._session = requests.Session()
+        if wire_format != "json":
+            self._session.headers["Accept"] = (
+                f"{EMBEDDING_MEDIA_TYPE}; dtype={wire_format}, application/json;q=0.5"
+            )
+        # One pooled connection per concurrent slot; max_retries only covers
+        # connection setup, so a stale keep-alive socket is retried once.
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, max_concurrency), max_retries=1)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._metrics_lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.in_flight = 0
+
+    def __call__(self, texts: List[str]) -> Optional[np.ndarray]:
+        return self.embed(texts)
+
+    def embed(self, texts: List[str]) -> Optional[np.ndarray]:
+        """Embed ``texts`` into a (len(texts), dim) float32 matrix.
+
+        Returns None on any failure or while the circuit is open.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        if not self.breaker.allow():
+            with self._metrics_lock:
+                self.rejected += 1
+            return None
+
+        with self._slots:
+            with self._metrics_lock:
+                self.in_flight += 1
+            started = time.perf_counter()
+            try:
+                response = self._session.post(
+                    self.url,
+                    json={"texts": texts},
+                    timeout=(self.connect_timeout, self.timeout),
+                )
+                response.raise_for_status()
+                if response.headers.get("Content-Type", "").startswith(EMBEDDING_MEDIA_TYPE):
+                    vectors = unpack_vectors(response.content)
+                else:
+                    vectors = np.asarray(response.json().get("vectors"), dtype=np.float32)
+                if vectors.ndim != 2 or len(vectors) != len(texts):
+                    raise ValueError("embedding service returned a mismatched batch")
+            except Exception as exc:
+                self._record(time.perf_counter() - started, ok=False)
+                print("[WARN] Embedding request failed:", exc)
+                return None
+            finally:
+                with self._metrics_lock:
+                    self.in_flight -= 1
+
+        self._record(time.perf_counter() - started, ok=True)
+        return vectors
+
+    def _record(self, latency: float, ok: bool) -> None:
+        if ok:
+            if self.breaker.record_success():
+                print("[INFO] Embedding service recovered; circuit closed")
+        elif self.breaker.record_failure():
+            print(f"[WARN] Embedding service unavailable; skipping calls for {self.breaker.reset_timeout:.0f}s")
+        with self._metrics_lock:
+            self.calls += 1
+            if not ok:
+                self.failures += 1
+            self._latencies.append(latency)
+
+    def stats(self) -> Dict[str, object]:
+        """Call counters, circuit state and latency percentiles (milliseconds)."""
+        with self._metrics_lock:
+            latencies = sorted(self._latencies)
+            stats: Dict[str, object] = {
+                "calls": self.calls,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "in_flight": self.in_flight,
+                "max_concurrency": self.max_concurrency,
+                "circuit": self.breaker.state,
+            }
+        if latencies:
+            stats["latency_ms"] = {
+                "avg": 1000.0 * sum(latencies) / len(latencies),
+                "p50": 1000.0 * latencies[len(latencies) // 2],
+                "p95": 1000.0 * latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+                "max": 1000.0 * latencies[-1],
+            }
+        return stats
+
+    def close(self) -> None:
+        self._session.close()
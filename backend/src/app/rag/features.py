@@ -0,0 +1,169 @@
+"""Precomputed per-recipe text features for scoring and filtering.
+
+Retrieval used to rebuild the document text and run the regex tokenizer for
+every candidate on every request (negative-ingredient checks, keyword
+fallback, ingredient overlap, preference filters). Those values only change
+when the recipe changes, so they are computed once per recipe, when it is
+persisted or seeded (or on first use), and kept in a process-wide store.
+
+Entries are keyed by recipe ID and validated against a cheap signature of the
+raw recipe fields, so an edited recipe (or the same ID in another database)
+never reuses stale features.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from app.models.recipes import Recipe
+from app.rag.preprocess import QueryPreprocessor
+
+MACRO_FIELDS = ("macros_kcal", "macros_protein_g", "macros_carbs_g", "macros_fat_g", "macros_fiber_g")
+
+
+def recipe_signature(recipe: Recipe) -> Tuple[Hashable, ...]:
+    """All raw fields the features are derived from (no tokenization)."""
+    return (
+        recipe.title,
+        recipe.tags,
+        tuple(recipe.instructions_json or ()),
+        tuple(
+            (getattr(ingredient, "name", None), getattr(ingredient, "grams", None))
+            for ingredient in getattr(recipe, "ingredients", []) or []
+        ),
+    ) + tuple(getattr(recipe, field, None) for field in MACRO_FIELDS)
+
+
+@dataclass(frozen=True, eq=False)
+class RecipeFeatures:
+    """Derived, read-only features of one recipe."""
+
+    signature: Tuple[Hashable, ...]
+    document: str
+    document_lower: str
+    doc_tokens: FrozenSet[str]
+    term_counts: Mapping[str, int]
+    doc_length: int
+    ingredient_tokens: FrozenSet[str]
+    ingredient_names: Tuple[str, ...]
+    tags: Tuple[str, ...]
+    macros: np.ndarray
+
+    @classmethod
+    def from_recipe(cls, recipe: Recipe, signature: Optional[Tuple[Hashable, ...]] = None) -> "RecipeFeatures":
+        """Compute features for ``recipe`` (the expensive path)."""
+        document = QueryPreprocessor.build_document(recipe)
+        ingredient_tokens: set[str] = set()
+        ingredient_names: List[str] = []
+        for ingredient in getattr(recipe, "ingredients", []) or []:
+            name = getattr(ingredient, "name", "") or ""
+            ingredient_tokens.update(QueryPreprocessor.tokenize(name))
+            if name.strip():
+                ingredient_names.append(name.strip().lower())
+        raw_macros = [getattr(recipe, field, None) for field in MACRO_FIELDS]
+        macros = np.array([np.nan if value is None else float(value) for value in raw_macros], dtype=np.float64)
+        macros.setflags(write=False)
+        tokens = QueryPreprocessor.tokenize(document)
+        return cls(
+            signature=signature if signature is not None else recipe_signature(recipe),
+            document=document,
+            document_lower=document.lower(),
+            doc_tokens=frozenset(tokens),
+            term_counts=Counter(tokens),
+            doc_length=len(tokens),
+            ingredient_tokens=frozenset(ingredient_tokens),
+            ingredient_names=tuple(ingredient_names),
+            tags=tuple(t.strip().lower() for t in (recipe.tags or "").split(",") if t.strip()),
+            macros=macros,
+        )
+
+
+class RecipeFeatureStore:
+    """Bounded, thread-safe LRU map of recipe ID -> ``RecipeFeatures``."""
+
+    def __init__(self, max_entries: int = 100_000):
+        """
+        Args:
+            max_entries: Maximum number of recipes kept (0 disables caching)
+        """
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, RecipeFeatures]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, recipe: Recipe) -> RecipeFeatures:
+        """Return the features of ``recipe``, computing them on a miss or change."""
+        signature = recipe_signature(recipe)
+        recipe_id = getattr(recipe, "id", None)
+        if recipe_id is not None:
+            with self._lock:
+                features = self._entries.get(recipe_id)
+                if features is not None and features.signature == signature:
+                    self._entries.move_to_end(recipe_id)
+                    self.hits += 1
+                    return features
+                self.misses += 1
+
+        features = RecipeFeatures.from_recipe(recipe, signature)
+        if recipe_id is not None:
+            self._put(recipe_id, features)
+        return features
+
+    def get_many(self, recipes: Iterable[Recipe]) -> List[RecipeFeatures]:
+        return [self.get(recipe) for recipe in recipes]
+
+    def warm(self, recipes: Iterable[Recipe]) -> int:
+        """Precompute features (e.g. right after recipes are persisted); returns the count."""
+        return len(self.get_many(recipes))
+
+    def _put(self, recipe_id: int, features: RecipeFeatures) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[recipe_id] = features
+            self._entries.move_to_end(recipe_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, recipe_ids: Optional[Iterable[int]] = None) -> None:
+        """Forget some (or, without arguments, all) recipes."""
+        with self._lock:
+            if recipe_ids is None:
+                self._entries.clear()
+                return
+            for recipe_id in recipe_ids:
+                self._entries.pop(recipe_id, None)
+
+    def resize(self, max_entries: int) -> None:
+        with self._lock:
+            self.max_entries = max_entries
+            while len(self._entries) > max(max_entries, 0):
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_STORE = RecipeFeatureStore()
+
+
+def get_feature_store() -> RecipeFeatureStore:
+    """Return the process-wide recipe feature store."""
+    return _STORE
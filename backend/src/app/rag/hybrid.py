@@ -0,0 +1,178 @@
+"""Hybrid (dense + sparse) retrieval with reciprocal rank fusion.
+
+Dense retrieval (query embedding + vector store / ANN) and sparse retrieval
+(FTS5 or the in-process BM25 index) each produce a short ranked candidate
+list. Reciprocal rank fusion (RRF) merges them without having to calibrate
+cosine similarities against BM25 scores:
+
+    rrf(d) = sum_i weight_i / (k + rank_i(d))
+
+The query embedding (an HTTP call) runs in a worker thread while sparse
+retrieval runs in the caller's thread. If the embedding service does not
+answer within ``dense_timeout`` the result degrades to sparse-only instead of
+blocking the request; the late embedding still lands in the query cache.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Ranking = Sequence[Tuple[int, float]]
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Ranking],
+    k: int = 60,
+    weights: Optional[Sequence[float]] = None,
+) -> List[Tuple[int, float]]:
+    """Fuse ranked (id, score) lists; only the rank of each id is used.
+
+    Args:
+        rankings: Ranked lists, best first
+        k: RRF damping constant (60 in the original paper)
+        weights: Optional per-list weights (default 1.0 each)
+
+    Returns:
+        (id, fused score) tuples, best first; ties keep first-seen order
+    """
+    fused: Dict[int, float] = {}
+    for position, ranking in enumerate(rankings):
+        weight = 1.0 if weights is None else weights[position]
+        for rank, (item_id, _) in enumerate(ranking, start=1):
+            fused[item_id] = fused.get(item_id, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+@dataclass
+class HybridResult:
+    """Fused candidates plus the per-retriever scores they came from."""
+
+    fused: List[Tuple[int, float]] = field(default_factory=list)
+    dense: Dict[int, float] = field(default_factory=dict)
+    sparse: Dict[int, float] = field(default_factory=dict)
+    query_vector: Optional[List[float]] = None
+    dense_status: str = "unavailable"  # ok | timeout | unavailable
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+
+    def relevance(self) -> Dict[int, float]:
+        """Fused scores normalized to [0, 1] (best candidate = 1)."""
+        if not self.fused:
+            return {}
+        best = self.fused[0][1] or 1.0
+        return {item_id: score / best for item_id, score in self.fused}
+
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _default_executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rag-dense")
+        return _EXECUTOR
+
+
+def embed_within(
+    embed_query: Callable[[str], Optional[Sequence[float]]],
+    query_text: str,
+    timeout: float,
+    executor: Optional[ThreadPoolExecutor] = None,
+) -> Tuple[Optional[Sequence[float]], str]:
+    """Embed ``query_text`` but wait at most ``timeout`` seconds.
+
+    Returns:
+        (vector or None, status) with status ``ok``, ``timeout`` or
+        ``unavailable``; a late embedding still lands in the query cache
+    """
+    future: Future = (executor or _default_executor()).submit(embed_query, query_text)
+    try:
+        vector = future.result(timeout=max(0.0, timeout))
+    except FutureTimeout:
+        return None, "timeout"
+    except Exception as exc:  # pragma: no cover - defensive
+        print("[WARN] Query embedding failed:", exc)
+        return None, "unavailable"
+    if vector is None or len(vector) == 0:
+        return None, "unavailable"
+    return vector, "ok"
+
+
+class HybridRetriever:
+    """Run dense and sparse retrieval concurrently and fuse them with RRF."""
+
+    def __init__(
+        self,
+        embed_query: Callable[[str], Optional[Sequence[float]]],
+        dense_search: Callable[[Sequence[float], int], Ranking],
+        sparse_search: Callable[[str, int], Optional[Ranking]],
+        pool_size: int = 200,
+        rrf_k: int = 60,
+        dense_weight: float = 1.0,
+        sparse_weight: float = 1.0,
+        dense_timeout: float = 2.0,
+        executor: Optional[ThreadPoolExecutor] = None,
+    ):
+        """
+        Args:
+            embed_query: Text -> query vector (None on failure); runs in a worker thread
+            dense_search: (query vector, k) -> ranked (recipe_id, cosine) list
+            sparse_search: (query text, k) -> ranked (recipe_id, score) list or None
+            pool_size: Candidates taken from each retriever
+            rrf_k: RRF damping constant
+            dense_weight: RRF weight of the dense ranking
+            sparse_weight: RRF weight of the sparse ranking
+            dense_timeout: Seconds to wait for the query embedding before
+                continuing with sparse results only
+            executor: Thread pool for the embedding call (shared default)
+        """
+        self.embed_query = embed_query
+        self.dense_search = dense_search
+        self.sparse_search = sparse_search
+        self.pool_size = pool_size
+        self.rrf_k = rrf_k
+        self.dense_weight = dense_weight
+        self.sparse_weight = sparse_weight
+        self.dense_timeout = dense_timeout
+        self.executor = executor
+
+    def retrieve(self, query_text: str) -> HybridResult:
+        """Retrieve and fuse candidates for ``query_text``."""
+        result = HybridResult()
+        started = time.perf_counter()
+        executor = self.executor or _default_executor()
+        future: Future = executor.submit(self.embed_query, query_text)
+
+        sparse = self.sparse_search(query_text, self.pool_size) or []
+        result.sparse = dict(sparse)
+        result.timings_ms["sparse"] = 1000.0 * (time.perf_counter() - started)
+
+        dense: Ranking = []
+        remaining = max(0.0, self.dense_timeout - (time.perf_counter() - started))
+        try:
+            vector = future.result(timeout=remaining)
+        except FutureTimeout:
+            vector = None
+            result.dense_status = "timeout"
+        except Exception as exc:  # pragma: no cover - defensive
+            print("[WARN] Dense retrieval failed:", exc)
+            vector = None
+        if vector is not None and len(vector) > 0:
+            result.query_vector = [float(x) for x in np.asarray(vector).reshape(-1)]
+            dense = self.dense_search(result.query_vector, self.pool_size)
+            result.dense = dict(dense)
+            result.dense_status = "ok"
+        result.timings_ms["total"] = 1000.0 * (time.perf_counter() - started)
+
+        result.fused = reciprocal_rank_fusion(
+            [dense, sparse], k=self.rrf_k, weights=[self.dense_weight, self.sparse_weight]
+        )
+        return result
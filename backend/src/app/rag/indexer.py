@@ -1,21 +1,92 @@
 """Recipe embedding indexer with caching support.
 
 This module provides a caching layer for recipe embeddings to avoid recomputing
-vectors on every request. Embeddings are stored in a SQLite table for persistence.
+vectors on every request. Embeddings are stored in a SQLite table for persistence
+and mirrored into a process-wide in-memory matrix (see ``vector_store``) for scoring.
+
+Vectors are persisted as raw little-endian float32/float16 bytes (plus dimension
+and dtype metadata) by default; the legacy JSON column is still readable and can
+be converted with ``scripts/migrations/convert_embeddings_to_blob.py``. Tables
+created before the binary columns existed are upgraded in place by
+``ensure_embedding_schema`` (run from ``init_db`` and on first use per engine).
 """
 
 from __future__ import annotations
 
+import hashlib
 import json
 import os
+import threading
+import weakref
 from datetime import datetime
 from pathlib import Path
-from typing import Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Sequence
 
-from sqlalchemy import Column, JSON, Text
-from sqlmodel import Field, Session, SQLModel, create_engine, select
+import numpy as np
+from sqlalchemy import Column, JSON, LargeBinary, Table, Text, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Field, Session, SQLModel, col, create_engine, select
 
 from app.models.recipes import Recipe
+from app.rag.ann import ann_index_path, create_ann_index
+from app.rag.features import RecipeFeatures, get_feature_store
+from app.rag.vector_store import RecipeVectorStore, get_vector_store
+
+
+# Storage modes for RecipeEmbedding vectors -> little-endian NumPy dtype.
+EMBEDDING_DTYPES: Dict[str, str] = {"float32": "<f4", "float16": "<f2"}
+STORAGE_MODES = (*EMBEDDING_DTYPES, "json")
+
+
+def encode_embedding(vector: Sequence[float] | np.ndarray, dtype: str = "float32") -> bytes:
+    """Pack a vector as raw little-endian bytes of the given dtype."""
+    return np.asarray(vector, dtype=EMBEDDING_DTYPES[dtype]).tobytes()
+
+
+def decode_embedding(blob: bytes, dim: int, dtype: str = "float32") -> np.ndarray:
+    """Decode raw vector bytes into a float32 NumPy array without parsing text."""
+    arr = np.frombuffer(blob, dtype=EMBEDDING_DTYPES[dtype], count=dim)
+    return arr.astype(np.float32)
+
+
+# Engines whose tables were already created by this process.
+_READY_ENGINES: "weakref.WeakSet[Any]" = weakref.WeakSet()
+_READY_LOCK = threading.Lock()
+
+# Content hash per (cached) recipe features object, so an unchanged recipe is
+# not re-hashed on every request; entries die with the features.
+_FEATURE_HASHES: "weakref.WeakKeyDictionary[RecipeFeatures, tuple[tuple[str, str], str]]" = (
+    weakref.WeakKeyDictionary()
+)
+_FEATURE_HASHES_LOCK = threading.Lock()
+
+
+def content_hash(document_text: str, model_name: str, model_version: str = "") -> str:
+    """Fingerprint of what an embedding was computed from (document + model)."""
+    payload = "\x1f".join((model_name, model_version, document_text))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _recipe_id(recipe: Recipe) -> int:
+    """ID of a recipe that is about to be indexed (it must have been flushed)."""
+    if recipe.id is None:
+        raise ValueError("Only persisted recipes can be indexed")
+    return recipe.id
+
+
+def _decode_row(
+    vector: Optional[bytes],
+    dim: Optional[int],
+    dtype: Optional[str],
+    embedding: Optional[List[float]],
+) -> Optional[np.ndarray]:
+    """Decode a stored row, preferring the binary column over legacy JSON."""
+    if vector is not None and dim:
+        return decode_embedding(vector, dim, dtype or "float32")
+    if embedding:
+        return np.asarray(embedding, dtype=np.float32)
+    return None
 
 
 class RecipeEmbedding(SQLModel, table=True):
@@ -24,13 +95,62 @@ class RecipeEmbedding(SQLModel, table=True):
     __tablename__ = "recipe_embeddings"
 
     recipe_id: int = Field(primary_key=True, foreign_key="recipe.id")
-    embedding: List[float] = Field(
-        sa_column=Column(JSON, nullable=False), description="Vector embedding (384-dim for all-MiniLM-L6-v2)"
+    embedding: Optional[List[float]] = Field(
+        default=None,
+        sa_column=Column(JSON(none_as_null=True), nullable=True),
+        description="Legacy JSON vector (only set when storage mode is 'json')",
     )
+    vector: Optional[bytes] = Field(
+        default=None,
+        sa_column=Column(LargeBinary, nullable=True),
+        description="Raw little-endian vector bytes (384-dim for all-MiniLM-L6-v2)",
+    )
+    dim: Optional[int] = Field(default=None, description="Number of elements in ``vector``")
+    dtype: Optional[str] = Field(default=None, description="Element type of ``vector`` (float32/float16)")
     document_text: str = Field(sa_column=Column(Text, nullable=False), description="Original document text used for embedding")
     model_name: str = Field(default="all-MiniLM-L6-v2", description="Embedding model used")
+    content_hash: Optional[str] = Field(
+        default=None, description="content_hash() of document_text + model; NULL for legacy rows"
+    )
     updated_at: datetime = Field(default_factory=datetime.utcnow, description="Last update timestamp")
 
+    def as_array(self) -> Optional[np.ndarray]:
+        """Return the stored vector as a float32 array (binary or legacy JSON)."""
+        return _decode_row(self.vector, self.dim, self.dtype, self.embedding)
+
+
+def ensure_embedding_schema(engine: Engine) -> bool:
+    """Upgrade a legacy ``recipe_embeddings`` table in place; returns True if changed.
+
+    Tables from before the binary storage have ``embedding JSON NOT NULL`` and
+    none of ``vector``/``dim``/``dtype``/``content_hash``. SQLite cannot relax a
+    NOT NULL constraint, so such tables are rebuilt with the current schema and
+    their rows copied over (vectors stay JSON until the blob migration runs).
+    Tables that only lack ``content_hash`` get the column added.
+    """
+    table: Table = RecipeEmbedding.__table__  # type: ignore[attr-defined]
+    inspector = inspect(engine)
+    if not inspector.has_table(table.name):
+        return False
+    columns = {column["name"]: column for column in inspector.get_columns(table.name)}
+    legacy = "vector" not in columns or not columns["embedding"]["nullable"]
+    if not legacy and "content_hash" in columns:
+        return False
+    with engine.begin() as connection:
+        if legacy:
+            backup = f"{table.name}_legacy"
+            connection.exec_driver_sql(f"ALTER TABLE {table.name} RENAME TO {backup}")
+            table.create(connection)
+            shared = ", ".join(column.name for column in table.columns if column.name in columns)
+            connection.exec_driver_sql(
+                f"INSERT INTO {table.name} ({shared}) SELECT {shared} FROM {backup}"
+            )
+            connection.exec_driver_sql(f"DROP TABLE {backup}")
+        else:
+            connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN content_hash VARCHAR")
+    print(f"[INFO] Upgraded {table.name} to the current embedding schema")
+    return True
+
 
 class RecipeIndexer:
     """Manages recipe embeddings with caching in SQLite."""
@@ -38,21 +158,46 @@ class RecipeIndexer:
     def __init__(
         self,
         session: Session,
-        embedding_client: Optional[Callable[[List[str]], Optional[List[List[float]]]]] = None,
+        embedding_client: Optional[Callable[[List[str]], Optional[Sequence[Sequence[float]] | np.ndarray]]] = None,
         index_table_name: str = "recipe_embeddings",
+        storage_dtype: str = "float32",
+        ann_backend: str = "exact",
+        ann_min_size: int = 2000,
+        ann_nprobe: int = 8,
+        model_name: str = "all-MiniLM-L6-v2",
+        model_version: str = "",
     ):
         """Initialize the indexer.
 
         Args:
             session: SQLModel database session
-            embedding_client: Function that takes List[str] and returns List[List[float]]
+            embedding_client: Function that takes List[str] and returns one vector per text
+                (nested lists or a NumPy matrix)
             index_table_name: Name of the embedding storage table
+            storage_dtype: How new vectors are persisted: "float32", "float16" or "json"
+            ann_backend: ANN index used for unrestricted searches: "exact", "ivf" or "hnsw"
+            ann_min_size: Library size from which the ANN index is built and used
+            ann_nprobe: Number of inverted lists probed by the IVF backend
+            model_name: Embedding model name, stored per row and part of the content hash
+            model_version: Optional model revision; changing it invalidates all rows
         """
+        if storage_dtype not in STORAGE_MODES:
+            raise ValueError(f"storage_dtype must be one of {', '.join(STORAGE_MODES)}")
         self.session = session
         self.embedding_client = embedding_client
         self.index_table_name = index_table_name
-
-    def _embed_texts(self, texts: List[str]) -> Optional[List[List[float]]]:
+        self.storage_dtype = storage_dtype
+        self.ann_backend = ann_backend
+        self.ann_min_size = ann_min_size
+        self.ann_nprobe = ann_nprobe
+        self.model_name = model_name
+        self.model_version = model_version
+
+    def content_hash(self, document_text: str) -> str:
+        """Hash identifying an embedding of ``document_text`` with this indexer's model."""
+        return content_hash(document_text, self.model_name, self.model_version)
+
+    def _embed_texts(self, texts: List[str]) -> Optional[Sequence[Sequence[float]] | np.ndarray]:
         """Call embedding service. Falls back to None if unavailable."""
         if not self.embedding_client:
             return None
@@ -62,8 +207,156 @@ class RecipeIndexer:
             return None
 
     def _ensure_table_exists(self) -> None:
-        """Ensure the embedding table exists in the database."""
-        SQLModel.metadata.create_all(self.session.bind)
+        """Ensure the embedding table exists in the database (checked once per engine)."""
+        bind = self.session.get_bind()
+        engine = bind.engine
+        with _READY_LOCK:
+            if engine in _READY_ENGINES:
+                return
+            SQLModel.metadata.create_all(bind)
+            ensure_embedding_schema(engine)
+            _READY_ENGINES.add(engine)
+
+    def _vector_store(self) -> RecipeVectorStore:
+        """Return the in-memory vector store for this database, loading it once."""
+        store = get_vector_store(self.session.bind)
+        if not store.loaded:
+            self._ensure_table_exists()
+            store.load(self._load_vectors(model_name=self.model_name).items())
+            store.content_hashes = self._load_hashes()
+            ann = create_ann_index(self.ann_backend, dim=store.dim, nprobe=self.ann_nprobe)
+            store.configure_ann(ann, ann_index_path(self.session.bind, ann), self.ann_min_size)
+        return store
+
+    def _load_vectors(
+        self, recipe_ids: Optional[List[int]] = None, model_name: Optional[str] = None
+    ) -> Dict[int, np.ndarray]:
+        """Read vectors column-wise (no ORM objects) and decode them via ``frombuffer``."""
+        stmt = select(
+            RecipeEmbedding.recipe_id,
+            RecipeEmbedding.vector,
+            RecipeEmbedding.dim,
+            RecipeEmbedding.dtype,
+            RecipeEmbedding.embedding,
+        )
+        if recipe_ids is not None:
+            stmt = stmt.where(col(RecipeEmbedding.recipe_id).in_(recipe_ids))
+        if model_name is not None:
+            # Vectors of another model live in a different space; never mix them in.
+            stmt = stmt.where(RecipeEmbedding.model_name == model_name)
+        vectors: Dict[int, np.ndarray] = {}
+        for recipe_id, vector, dim, dtype, embedding in self.session.exec(stmt).all():
+            decoded = _decode_row(vector, dim, dtype, embedding)
+            if decoded is not None and decoded.size:
+                vectors[recipe_id] = decoded
+        return vectors
+
+    def _load_hashes(self) -> Dict[int, str]:
+        """Stored content hashes of this model's rows (legacy rows without one are left out)."""
+        stmt = select(RecipeEmbedding.recipe_id, RecipeEmbedding.content_hash).where(
+            RecipeEmbedding.model_name == self.model_name,
+            col(RecipeEmbedding.content_hash).is_not(None),
+        )
+        return {
+            recipe_id: stored_hash
+            for recipe_id, stored_hash in self.session.exec(stmt).all()
+            if stored_hash is not None
+        }
+
+    def _features_hash(self, features: RecipeFeatures) -> str:
+        """Content hash of a recipe's document, memoized per features object."""
+        key = (self.model_name, self.model_version)
+        with _FEATURE_HASHES_LOCK:
+            memo = _FEATURE_HASHES.get(features)
+        if memo is not None and memo[0] == key:
+            return memo[1]
+        digest = self.content_hash(features.document)
+        with _FEATURE_HASHES_LOCK:
+            _FEATURE_HASHES[features] = (key, digest)
+        return digest
+
+    def _load_current_vectors(self, expected_hashes: Dict[int, str]) -> Dict[int, np.ndarray]:
+        """Load vectors whose stored content hash matches ``expected_hashes``.
+
+        Legacy rows without a hash are checked against the hash of their stored
+        document text and model, so upgrading does not re-embed unchanged rows.
+        """
+        stmt = select(
+            RecipeEmbedding.recipe_id,
+            RecipeEmbedding.vector,
+            RecipeEmbedding.dim,
+            RecipeEmbedding.dtype,
+            RecipeEmbedding.embedding,
+            RecipeEmbedding.content_hash,
+            RecipeEmbedding.document_text,
+            RecipeEmbedding.model_name,
+        ).where(col(RecipeEmbedding.recipe_id).in_(list(expected_hashes)))
+        vectors: Dict[int, np.ndarray] = {}
+        for recipe_id, vector, dim, dtype, embedding, stored_hash, text, model in self.session.exec(stmt).all():
+            if stored_hash is None:
+                if model != self.model_name:
+                    continue
+                stored_hash = content_hash(text, model, self.model_version)
+            if stored_hash != expected_hashes[recipe_id]:
+                continue
+            decoded = _decode_row(vector, dim, dtype, embedding)
+            if decoded is not None and decoded.size:
+                vectors[recipe_id] = decoded
+        return vectors
+
+    def _vector_columns(self, embedding: Sequence[float] | np.ndarray) -> tuple[Dict[str, Any], np.ndarray]:
+        """Vector column values for ``embedding`` according to the storage mode.
+
+        Returns:
+            Tuple of (column values, the embedding as it will read back from the database)
+        """
+        if self.storage_dtype == "json":
+            values = [float(x) for x in embedding]
+            columns = {"embedding": values, "vector": None, "dim": None, "dtype": None}
+            return columns, np.asarray(values, dtype=np.float32)
+        blob = encode_embedding(embedding, self.storage_dtype)
+        columns = {"embedding": None, "vector": blob, "dim": len(embedding), "dtype": self.storage_dtype}
+        return columns, decode_embedding(blob, len(embedding), self.storage_dtype)
+
+    def _upsert_embeddings(
+        self, items: Sequence[tuple[int, Sequence[float] | np.ndarray, str]]
+    ) -> Dict[int, np.ndarray]:
+        """Write (recipe_id, embedding, document_text) rows in one upsert (caller commits).
+
+        Returns:
+            Dictionary mapping recipe_id -> embedding as stored
+        """
+        now = datetime.utcnow()
+        rows: List[Dict[str, Any]] = []
+        stored: Dict[int, np.ndarray] = {}
+        for recipe_id, embedding, document_text in items:
+            columns, stored[recipe_id] = self._vector_columns(embedding)
+            rows.append(
+                {
+                    "recipe_id": recipe_id,
+                    "document_text": document_text,
+                    "model_name": self.model_name,
+                    "content_hash": self.content_hash(document_text),
+                    "updated_at": now,
+                    **columns,
+                }
+            )
+        if not rows:
+            return stored
+
+        table: Table = RecipeEmbedding.__table__  # type: ignore[attr-defined]
+        if self.session.get_bind().dialect.name == "sqlite":
+            # INSERT ... ON CONFLICT DO UPDATE, executed once with all rows (executemany).
+            stmt = sqlite_insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.recipe_id],
+                set_={name: stmt.excluded[name] for name in rows[0] if name != "recipe_id"},
+            )
+            self.session.execute(stmt, rows)
+        else:  # pragma: no cover - other databases use the ORM merge path
+            for row in rows:
+                self.session.merge(RecipeEmbedding(**row))
+        return stored
 
     def get_embedding(self, recipe_id: int) -> Optional[List[float]]:
         """Get cached embedding for a recipe.
@@ -75,23 +368,20 @@ class RecipeIndexer:
             Embedding vector or None if not found
         """
         self._ensure_table_exists()
-        record = self.session.exec(select(RecipeEmbedding).where(RecipeEmbedding.recipe_id == recipe_id)).first()
-        return record.embedding if record else None
+        vector = self._load_vectors([recipe_id]).get(recipe_id)
+        return vector.tolist() if vector is not None else None
 
-    def get_embeddings_batch(self, recipe_ids: List[int]) -> Dict[int, List[float]]:
+    def get_embeddings_batch(self, recipe_ids: List[int]) -> Dict[int, np.ndarray]:
         """Get cached embeddings for multiple recipes.
 
         Args:
             recipe_ids: List of recipe IDs
 
         Returns:
-            Dictionary mapping recipe_id -> embedding
+            Dictionary mapping recipe_id -> float32 embedding array
         """
         self._ensure_table_exists()
-        records = self.session.exec(
-            select(RecipeEmbedding).where(RecipeEmbedding.recipe_id.in_(recipe_ids))
-        ).all()
-        return {r.recipe_id: r.embedding for r in records}
+        return self._load_vectors(recipe_ids)
 
     def index_recipe(self, recipe: Recipe, document_text: str, force_refresh: bool = False) -> Optional[List[float]]:
         """Index a single recipe, using cache if available.
@@ -105,46 +395,34 @@ class RecipeIndexer:
             Embedding vector or None if embedding service unavailable
         """
         self._ensure_table_exists()
+        recipe_id = _recipe_id(recipe)
 
-        # Check cache first
+        # Check cache first (only valid if document and model are unchanged)
         if not force_refresh:
-            cached = self.get_embedding(recipe.id)
-            if cached:
-                return cached
+            cached = self._load_current_vectors({recipe_id: self.content_hash(document_text)}).get(recipe_id)
+            if cached is not None:
+                return cached.tolist()
 
         # Compute embedding
         embeddings = self._embed_texts([document_text])
-        if not embeddings or not embeddings[0]:
+        if embeddings is None or not len(embeddings) or not len(embeddings[0]):
             return None
 
-        embedding = embeddings[0]
-
         # Store in cache
-        existing = self.session.exec(
-            select(RecipeEmbedding).where(RecipeEmbedding.recipe_id == recipe.id)
-        ).first()
-
-        if existing:
-            existing.embedding = embedding
-            existing.document_text = document_text
-            existing.updated_at = datetime.utcnow()
-        else:
-            self.session.add(
-                RecipeEmbedding(
-                    recipe_id=recipe.id,
-                    embedding=embedding,
-                    document_text=document_text,
-                    model_name="all-MiniLM-L6-v2",
-                    updated_at=datetime.utcnow(),
-                )
-            )
-
+        embedding = self._upsert_embeddings([(recipe_id, embeddings[0], document_text)])[recipe_id]
         self.session.commit()
-        return embedding
+        store = self._vector_store()
+        store.upsert(recipe_id, embedding)
+        store.content_hashes[recipe_id] = self.content_hash(document_text)
+        return embedding.tolist()
 
     def batch_index(self, recipes: List[Recipe], document_texts: List[str], force_refresh: bool = False) -> Dict[int, List[float]]:
         """Index multiple recipes, using cache where possible.
 
+        A cached row is reused only if its content hash matches the current
+        document text and model, so edited recipes are re-embedded (in one
+        batch) without a ``force_refresh`` of the whole library.
+
         Args:
             recipes: List of recipes to index
             document_texts: Preprocessed document texts (one per recipe)
@@ -158,47 +436,114 @@ class RecipeIndexer:
 
         self._ensure_table_exists()
 
-        recipe_ids = [r.id for r in recipes]
-        cached_embeddings = {} if force_refresh else self.get_embeddings_batch(recipe_ids)
+        expected_hashes = {_recipe_id(r): self.content_hash(doc_text) for r, doc_text in zip(recipes, document_texts)}
+        cached_vectors = {} if force_refresh else self._load_current_vectors(expected_hashes)
+        cached_embeddings: Dict[int, Any] = dict(cached_vectors)
 
         # Find recipes that need embedding
         to_embed: List[tuple[int, str, Recipe]] = []
         for recipe, doc_text in zip(recipes, document_texts):
-            if recipe.id not in cached_embeddings:
-                to_embed.append((recipe.id, doc_text, recipe))
+            recipe_id = _recipe_id(recipe)
+            if recipe_id not in cached_embeddings:
+                to_embed.append((recipe_id, doc_text, recipe))
 
         # Batch embed missing recipes
         if to_embed:
             texts_to_embed = [doc_text for _, doc_text, _ in to_embed]
             embeddings = self._embed_texts(texts_to_embed)
 
-            if embeddings and len(embeddings) == len(to_embed):
-                for (recipe_id, doc_text, recipe), embedding in zip(to_embed, embeddings):
-                    cached_embeddings[recipe_id] = embedding
-
-                    # Store in cache
-                    existing = self.session.exec(
-                        select(RecipeEmbedding).where(RecipeEmbedding.recipe_id == recipe_id)
-                    ).first()
-
-                    if existing:
-                        existing.embedding = embedding
-                        existing.document_text = doc_text
-                        existing.updated_at = datetime.utcnow()
-                    else:
-                        self.session.add(
-                            RecipeEmbedding(
-                                recipe_id=recipe_id,
-                                embedding=embedding,
-                                document_text=doc_text,
-                                model_name="all-MiniLM-L6-v2",
-                                updated_at=datetime.utcnow(),
-                            )
-                        )
-
+            if embeddings is not None and len(embeddings) == len(to_embed):
+                cached_embeddings.update(
+                    self._upsert_embeddings(
+                        [(recipe_id, embedding, doc_text) for (recipe_id, doc_text, _), embedding in zip(to_embed, embeddings)]
+                    )
+                )
                 self.session.commit()
 
-        return cached_embeddings
+        store = self._vector_store()
+        store.upsert_many(
+            (recipe_id, embedding)
+            for recipe_id, embedding in cached_embeddings.items()
+            if recipe_id not in store or recipe_id not in cached_vectors
+        )
+        for recipe_id in cached_embeddings:
+            store.content_hashes[recipe_id] = expected_hashes[recipe_id]
+        store.save_ann()
+        return {
+            recipe_id: embedding.tolist() if isinstance(embedding, np.ndarray) else embedding
+            for recipe_id, embedding in cached_embeddings.items()
+        }
+
+    def ensure_indexed(self, recipes: List[Recipe], document_texts: Optional[List[str]] = None) -> set[int]:
+        """Make sure the given recipes are in the vector store with current vectors.
+
+        Recipes missing from the store, and recipes whose stored content hash
+        no longer matches their document (edited since they were embedded), are
+        embedded in one batch and persisted. The comparison is against hashes
+        held in memory, and document texts and hashes of unchanged recipes come
+        from the feature store, so the common case does no hashing or I/O.
+        Legacy rows without a stored hash are only refreshed by the reindex job.
+        If embedding fails, a stale recipe keeps its old vector.
+
+        Args:
+            recipes: Recipes that should be searchable
+            document_texts: Optional preprocessed document texts (one per recipe)
+
+        Returns:
+            Set of recipe IDs that have a vector in the store
+        """
+        if document_texts is not None and len(recipes) != len(document_texts):
+            raise ValueError("recipes and document_texts must have same length")
+
+        store = self._vector_store()
+        features = get_feature_store()
+        outdated: List[Recipe] = []
+        texts: List[str] = []
+        for idx, recipe in enumerate(recipes):
+            recipe_id = _recipe_id(recipe)
+            stored_hash = store.content_hashes.get(recipe_id) if recipe_id in store else None
+            if recipe_id in store and stored_hash is None:
+                continue  # legacy row: nothing to compare against
+            if document_texts is not None:
+                text = document_texts[idx]
+                current_hash = self.content_hash(text) if stored_hash is not None else None
+            else:
+                recipe_features = features.get(recipe)
+                text = recipe_features.document
+                current_hash = self._features_hash(recipe_features) if stored_hash is not None else None
+            if stored_hash is None or stored_hash != current_hash:
+                outdated.append(recipe)
+                texts.append(text)
+        if outdated:
+            self.batch_index(outdated, texts)
+        return {_recipe_id(recipe) for recipe in recipes if recipe.id in store}
+
+    def save_ann_index(self) -> None:
+        """Persist the ANN index now (e.g. at the end of a bulk reindex)."""
+        self._vector_store().save_ann(force=True)
+
+    def ann_active(self) -> bool:
+        """Whether unrestricted searches are served by the ANN index."""
+        return self._vector_store().ann_active()
+
+    def search(
+        self,
+        query_vector: List[float],
+        top_k: int,
+        recipe_ids: Optional[List[int]] = None,
+    ) -> List[tuple[int, float]]:
+        """Rank indexed recipes by cosine similarity to the query vector.
+
+        Args:
+            query_vector: Query embedding
+            top_k: Maximum number of results
+            recipe_ids: Optional subset of recipe IDs to restrict the search to;
+                without it the ANN index (if active) supplies the candidates
+
+        Returns:
+            List of (recipe_id, similarity) tuples, best match first
+        """
+        return self._vector_store().top_k(query_vector, top_k, recipe_ids)
 
     def refresh_recipe(self, recipe: Recipe, document_text: str) -> Optional[List[float]]:
         """Force refresh of a recipe's embedding.
@@ -240,3 +585,4 @@ class RecipeIndexer:
         for record in records:
             self.session.delete(record)
         self.session.commit()
+        self._vector_store().clear()
@@ -0,0 +1,235 @@
+"""BM25 inverted index for keyword retrieval.
+
+When no query embedding is available, retrieval falls back to keyword
+matching. Scoring token overlap against every candidate is linear in the
+library size and ranks poorly (a match on "kcal" counts as much as a match on
+"lentils"). This index maps each token to a posting list of
+``recipe_id -> term frequency`` so a query only touches recipes that share at
+least one token with it, and ranks them with Okapi BM25.
+
+The index is process-wide per database (like ``RecipeVectorStore``). It is
+loaded from the library once, on first use, and afterwards kept current on
+the write path: when a session commits inserts, edits or deletes of recipes
+or their ingredients, the affected recipes are re-read and replaced (or
+dropped). Reads never rescan the library. Like the result cache this only
+sees writes made through a ``Session`` in this process.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Optional, Set, Tuple
+
+from sqlalchemy import event, orm
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, col, select
+
+from app.models.recipes import Recipe, RecipeItem
+from app.rag.features import RecipeFeatures, get_feature_store
+
+
+class BM25Index:
+    """Token -> {recipe_id: term frequency} postings with BM25 scoring."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization (0 = none, 1 = full)
+        """
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._terms: Dict[int, Tuple[str, ...]] = {}
+        self._lengths: Dict[int, int] = {}
+        self._signatures: Dict[int, Hashable] = {}
+        self._total_length = 0
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def __contains__(self, recipe_id: object) -> bool:
+        return recipe_id in self._lengths
+
+    def add(
+        self,
+        recipe_id: int,
+        term_counts: Mapping[str, int],
+        length: Optional[int] = None,
+        signature: Hashable = None,
+    ) -> None:
+        """Insert or replace one document."""
+        with self._lock:
+            self._remove_locked(recipe_id)
+            for term, count in term_counts.items():
+                self._postings.setdefault(term, {})[recipe_id] = count
+            doc_length = sum(term_counts.values()) if length is None else length
+            self._terms[recipe_id] = tuple(term_counts)
+            self._lengths[recipe_id] = doc_length
+            self._signatures[recipe_id] = signature
+            self._total_length += doc_length
+
+    def remove(self, recipe_ids: Iterable[int]) -> None:
+        """Remove documents (unknown IDs are ignored)."""
+        with self._lock:
+            for recipe_id in recipe_ids:
+                self._remove_locked(recipe_id)
+
+    def _remove_locked(self, recipe_id: int) -> None:
+        terms = self._terms.pop(recipe_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(recipe_id, None)
+                if not posting:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(recipe_id)
+        self._signatures.pop(recipe_id, None)
+
+    def sync(self, items: Iterable[Tuple[int, RecipeFeatures]]) -> int:
+        """Add recipes that are missing or whose features changed; returns the count."""
+        updated = 0
+        with self._lock:
+            for recipe_id, features in items:
+                if recipe_id is None:
+                    continue
+                if recipe_id in self._lengths and self._signatures.get(recipe_id) == features.signature:
+                    continue
+                self.add(recipe_id, features.term_counts, features.doc_length, features.signature)
+                updated += 1
+        return updated
+
+    def idf(self, term: str) -> float:
+        """BM25 inverse document frequency (always positive)."""
+        df = len(self._postings.get(term, ()))
+        return math.log(1.0 + (len(self._lengths) - df + 0.5) / (df + 0.5))
+
+    def search(
+        self,
+        query_tokens: Iterable[str],
+        candidate_ids: Optional[Set[int]] = None,
+        top_k: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """Rank documents sharing at least one query token.
+
+        Args:
+            query_tokens: Tokenized query (duplicates are ignored)
+            candidate_ids: Restrict results to these recipe IDs
+            top_k: Maximum number of results (None = all matches)
+
+        Returns:
+            (recipe_id, BM25 score) tuples, best first
+        """
+        with self._lock:
+            if not self._lengths:
+                return []
+            avg_length = self._total_length / len(self._lengths) or 1.0
+            scores: Dict[int, float] = {}
+            for term in dict.fromkeys(query_tokens):
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = self.idf(term)
+                for recipe_id, tf in posting.items():
+                    if candidate_ids is not None and recipe_id not in candidate_ids:
+                        continue
+                    norm = self.k1 * (1.0 - self.b + self.b * self._lengths[recipe_id] / avg_length)
+                    scores[recipe_id] = scores.get(recipe_id, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:top_k] if top_k is not None else ranked
+
+
+_INDEXES: Dict[str, BM25Index] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_keyword_index(bind) -> BM25Index:
+    """Return the process-wide keyword index for the given engine/connection."""
+    key = str(getattr(bind, "url", bind))
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(key)
+        if index is None:
+            index = _INDEXES[key] = BM25Index()
+        return index
+
+
+def load_keyword_index(session: Session) -> BM25Index:
+    """Return the keyword index for ``session``'s database, loading it on first use."""
+    index = get_keyword_index(session.get_bind())
+    if not index.loaded:
+        with index._lock:
+            if not index.loaded:
+                _sync_recipes(index, session.exec(select(Recipe).options(selectinload(Recipe.ingredients))).all())
+                index.loaded = True
+    return index
+
+
+def _sync_recipes(index: BM25Index, recipes: Iterable[Recipe]) -> int:
+    features = get_feature_store()
+    return index.sync((recipe.id, features.get(recipe)) for recipe in recipes if recipe.id is not None)
+
+
+_CHANGED_KEY = "keyword_index_changed"
+_DELETED_KEY = "keyword_index_deleted"
+
+
+@event.listens_for(orm.Session, "after_flush")
+def _collect_recipe_changes(session: orm.Session, flush_context: Any) -> None:
+    changed: Set[int] = session.info.setdefault(_CHANGED_KEY, set())
+    deleted: Set[int] = session.info.setdefault(_DELETED_KEY, set())
+    for obj in session.new | session.dirty:
+        if isinstance(obj, Recipe) and obj.id is not None:
+            changed.add(obj.id)
+        elif isinstance(obj, RecipeItem) and obj.recipe_id is not None:
+            changed.add(obj.recipe_id)
+    for obj in session.deleted:
+        if isinstance(obj, Recipe) and obj.id is not None:
+            deleted.add(obj.id)
+        elif isinstance(obj, RecipeItem) and obj.recipe_id is not None:
+            changed.add(obj.recipe_id)
+
+
+@event.listens_for(orm.Session, "after_commit")
+def _apply_recipe_changes(session: orm.Session) -> None:
+    changed: Set[int] = session.info.pop(_CHANGED_KEY, set())
+    deleted: Set[int] = session.info.pop(_DELETED_KEY, set())
+    if not changed and not deleted:
+        return
+    bind = session.get_bind()
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(str(getattr(bind, "url", bind)))
+    if index is None or not index.loaded:
+        return  # loaded from the current library on first use
+    index.remove(deleted)
+    changed -= deleted
+    if not changed:
+        return
+    try:
+        # The committing session cannot emit SQL here; re-read the few
+        # affected recipes through a short-lived one.
+        with Session(bind) as fresh:
+            recipes = fresh.exec(
+                select(Recipe).where(col(Recipe.id).in_(changed)).options(selectinload(Recipe.ingredients))
+            ).all()
+            index.remove(changed - {recipe.id for recipe in recipes})
+            _sync_recipes(index, recipes)
+    except Exception as exc:  # pragma: no cover - defensive
+        print("[WARN] Updating the keyword index failed:", exc)
+        index.remove(changed)
+
+
+@event.listens_for(orm.Session, "after_rollback")
+def _discard_recipe_changes(session: orm.Session) -> None:
+    session.info.pop(_CHANGED_KEY, None)
+    session.info.pop(_DELETED_KEY, None)
+
+
+def reset_keyword_indexes() -> None:
+    """Forget all in-memory keyword indexes (they are rebuilt on next use)."""
+    with _INDEXES_LOCK:
+        _INDEXES.clear()
@@ -6,12 +6,20 @@ This module handles scoring, filtering, and re-ranking of retrieved recipes.
 from __future__ import annotations
 
 import math
-from typing import Any, Dict, List, Optional, Tuple
+from typing import AbstractSet, Any, Collection, Dict, List, Optional, Sequence, Set, Tuple, TypeGuard
+
+import numpy as np
 
 from app.models.recipes import Recipe
+from app.rag.features import RecipeFeatures, RecipeFeatureStore, get_feature_store
 from app.rag.preprocess import QueryPreprocessor
 
 
+def _has_values(vector: Optional[Sequence[float]]) -> TypeGuard[Sequence[float]]:
+    """Truthiness of a vector that may be a list or a NumPy array."""
+    return vector is not None and len(vector) > 0
+
+
 class PostProcessor:
     """Post-processes retrieved recipes with scoring and filtering."""
 
@@ -20,6 +28,7 @@ class PostProcessor:
         semantic_weight: float = 1.0,
         nutrition_weight: float = 0.5,
         ingredient_weight: float = 0.3,
+        feature_store: Optional[RecipeFeatureStore] = None,
     ):
         """Initialize post-processor with scoring weights.
 
@@ -27,13 +36,16 @@ class PostProcessor:
             semantic_weight: Weight for cosine similarity (embedding) score
             nutrition_weight: Weight for nutrition fit score
             ingredient_weight: Weight for ingredient overlap score
+            feature_store: Cache of per-recipe document/token features
+                (defaults to the process-wide store)
         """
         self.semantic_weight = semantic_weight
         self.nutrition_weight = nutrition_weight
         self.ingredient_weight = ingredient_weight
+        self.features = feature_store if feature_store is not None else get_feature_store()
 
     @staticmethod
-    def cosine_similarity(a: List[float], b: List[float]) -> float:
+    def cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
         """Calculate cosine similarity between two vectors.
 
         Args:
@@ -91,6 +103,55 @@ class PostProcessor:
 
         return max(0.0, min(1.0, score))  # Clamp to [0, 1]
 
+    @staticmethod
+    def nutrition_fit_scores(recipes: Sequence[Recipe], constraints: Dict[str, Any]) -> np.ndarray:
+        """Vectorized ``nutrition_fit_score`` over many recipes (identical values).
+
+        Args:
+            recipes: Recipes to score
+            constraints: Constraints dict with keys like 'max_kcal', 'remaining_kcal', etc.
+
+        Returns:
+            Float64 array of scores between 0 and 1
+        """
+        if not constraints or not recipes:
+            return np.zeros(len(recipes))
+
+        raw = [getattr(recipe, "macros_kcal", None) for recipe in recipes]
+        known = np.fromiter((value is not None for value in raw), dtype=bool, count=len(raw))
+        kcal = np.fromiter((float(value or 0.0) for value in raw), dtype=np.float64, count=len(raw))
+        remaining = constraints.get("remaining_kcal")
+        max_kcal = constraints.get("max_kcal")
+        score = np.zeros(len(recipes))
+
+        if remaining is not None:
+            target = max(remaining, 0.0)
+            if target > 0:
+                diff = np.abs(kcal - target)
+                denom = max(target, 1.0)
+                score = score + np.maximum(0.0, 1.0 - diff / denom)
+
+        if max_kcal is not None:
+            overage = kcal - max_kcal
+            penalty = np.minimum(1.0, overage / max(max_kcal, 1.0))
+            score = np.where(kcal <= max_kcal, score + 0.3, score - penalty)
+
+        return np.where(known, np.maximum(0.0, np.minimum(1.0, score)), 0.0)
+
+    @staticmethod
+    def _violates_negatives(features: RecipeFeatures, banned_terms: Set[str]) -> bool:
+        # Ingredient names are checked too for slightly better recall.
+        if features.doc_tokens & banned_terms or features.ingredient_tokens & banned_terms:
+            return True
+        return any(term in features.document_lower for term in banned_terms)
+
+    @staticmethod
+    def _ingredient_overlap(query_tokens: AbstractSet[str], ingredient_tokens: AbstractSet[str]) -> float:
+        if not query_tokens or not ingredient_tokens:
+            return 0.0
+        overlap = len(query_tokens & ingredient_tokens)
+        return overlap / max(len(query_tokens), 1)
+
     @staticmethod
     def ingredient_overlap_score(recipe: Recipe, query_text: str) -> float:
         """Calculate overlap between query and recipe ingredients.
@@ -116,15 +177,10 @@ class PostProcessor:
             name = getattr(ingredient, "name", "") or ""
             ingredient_tokens.update(QueryPreprocessor.tokenize(name))
 
-        if not ingredient_tokens:
-            return 0.0
-
-        # Calculate overlap ratio
-        overlap = len(query_tokens & ingredient_tokens)
-        return overlap / max(len(query_tokens), 1)
+        return PostProcessor._ingredient_overlap(query_tokens, ingredient_tokens)
 
     @staticmethod
-    def keyword_overlap_score(query_tokens: List[str], doc_tokens: List[str]) -> float:
+    def keyword_overlap_score(query_tokens: Collection[str], doc_tokens: Collection[str]) -> float:
         """Calculate keyword overlap between query and document.
 
         Args:
@@ -150,6 +206,8 @@ class PostProcessor:
         constraints: Optional[Dict[str, Any]] = None,
         use_keyword_fallback: bool = False,
         negative_ingredients: Optional[List[str]] = None,
+        semantic_score: Optional[float] = None,
+        keyword_score: Optional[float] = None,
     ) -> Optional[float]:
         """Calculate combined score for a recipe.
 
@@ -160,48 +218,37 @@ class PostProcessor:
             query_text: Original query text
             constraints: Nutritional constraints
             use_keyword_fallback: If True, use keyword matching instead of embeddings
+            semantic_score: Precomputed cosine similarity (e.g. from the vector
+                store); takes precedence over ``query_vector``/``recipe_vector``
+            keyword_score: Precomputed keyword relevance in [0, 1] (e.g. normalized
+                BM25); replaces the token overlap ratio when the fallback is used
 
         Returns:
             Combined score (higher = better match). Returns None when the recipe
             violates an explicit negative ingredient constraint.
         """
         score = 0.0
-        doc_text: Optional[str] = None
+        features = self.features.get(recipe)
 
         # Early exit if the recipe contains any explicitly banned ingredient.
         banned_terms = {term for term in (negative_ingredients or []) if term}
-        if banned_terms:
-            doc_text = QueryPreprocessor.build_document(recipe)
-            doc_tokens = set(QueryPreprocessor.tokenize(doc_text))
-            doc_text_lower = doc_text.lower()
-
-            # Also check ingredient names directly for slightly better recall.
-            ingredient_tokens: set[str] = set()
-            ingredients = getattr(recipe, "ingredients", []) or []
-            for ingredient in ingredients:
-                ingredient_tokens.update(
-                    QueryPreprocessor.tokenize(getattr(ingredient, "name", "") or "")
-                )
-
-            if (
-                doc_tokens & banned_terms
-                or ingredient_tokens & banned_terms
-                or any(term in doc_text_lower for term in banned_terms)
-            ):
-                # Returning None tells the caller to drop this recipe.
-                return None
+        if banned_terms and self._violates_negatives(features, banned_terms):
+            # Returning None tells the caller to drop this recipe.
+            return None
 
         # Semantic similarity (embedding-based)
-        if not use_keyword_fallback and query_vector and recipe_vector:
-            semantic_score = self.cosine_similarity(query_vector, recipe_vector)
+        has_semantic = semantic_score is not None or bool(query_vector and recipe_vector)
+        if not use_keyword_fallback and has_semantic:
+            if semantic_score is None:
+                assert query_vector is not None and recipe_vector is not None  # implied by has_semantic
+                semantic_score = self.cosine_similarity(query_vector, recipe_vector)
             score += self.semantic_weight * semantic_score
 
         # Keyword overlap (fallback when embeddings unavailable)
-        if use_keyword_fallback or not (query_vector and recipe_vector):
-            query_tokens = QueryPreprocessor.tokenize(query_text)
-            doc_text = doc_text or QueryPreprocessor.build_document(recipe)
-            doc_tokens = QueryPreprocessor.tokenize(doc_text)
-            keyword_score = self.keyword_overlap_score(query_tokens, doc_tokens)
+        if use_keyword_fallback or not has_semantic:
+            if keyword_score is None:
+                query_tokens = QueryPreprocessor.tokenize(query_text)
+                keyword_score = self.keyword_overlap_score(query_tokens, features.doc_tokens)
             score += self.semantic_weight * keyword_score
 
         # Nutrition fit
@@ -211,7 +258,8 @@ class PostProcessor:
 
         # Ingredient overlap
         if query_text:
-            ingredient_score = self.ingredient_overlap_score(recipe, query_text)
+            query_token_set = set(QueryPreprocessor.tokenize(query_text))
+            ingredient_score = self._ingredient_overlap(query_token_set, features.ingredient_tokens)
             score += self.ingredient_weight * ingredient_score
 
         return score
@@ -225,9 +273,17 @@ class PostProcessor:
         constraints: Optional[Dict[str, Any]] = None,
         use_keyword_fallback: bool = False,
         negative_ingredients: Optional[List[str]] = None,
+        semantic_scores: Optional[Dict[int, float]] = None,
+        keyword_scores: Optional[Dict[int, float]] = None,
     ) -> List[Tuple[float, Recipe]]:
         """Score a batch of recipes.
 
+        Produces exactly the scores (and tie order) of calling ``score_recipe``
+        per recipe, but the query is tokenized once and the semantic, keyword,
+        nutrition and ingredient-overlap components are combined as NumPy
+        arrays. Components are summed in the same order as ``score_recipe`` so
+        every float matches bit for bit.
+
         Args:
             recipes: List of recipes to score
             query_vector: Query embedding vector
@@ -235,30 +291,76 @@ class PostProcessor:
             query_text: Original query text
             constraints: Nutritional constraints
             use_keyword_fallback: If True, use keyword matching
+            semantic_scores: Optional precomputed recipe_id -> cosine similarity
+            keyword_scores: Optional precomputed recipe_id -> keyword relevance
+                in [0, 1] (e.g. normalized BM25); recipes missing from it score 0
 
         Returns:
             List of (score, recipe) tuples, sorted by score (descending)
         """
-        scored: List[Tuple[float, Recipe]] = []
+        constraints = constraints or {}
+        query_tokens = QueryPreprocessor.tokenize(query_text)
+        query_token_set = set(query_tokens)
+        banned_terms = {term for term in (negative_ingredients or []) if term}
 
+        # Drop recipes with banned ingredients (token sets come from the feature store).
+        kept: List[Recipe] = []
+        features: List[RecipeFeatures] = []
         for recipe in recipes:
-            recipe_vec = recipe_vectors.get(recipe.id) if recipe_vectors else None
-            score = self.score_recipe(
-                recipe=recipe,
-                query_vector=query_vector,
-                recipe_vector=recipe_vec,
-                query_text=query_text,
-                constraints=constraints or {},
-                use_keyword_fallback=use_keyword_fallback,
-                negative_ingredients=negative_ingredients,
-            )
-            if score is None:
+            recipe_features = self.features.get(recipe)
+            if banned_terms and self._violates_negatives(recipe_features, banned_terms):
                 continue
-            scored.append((score, recipe))
+            kept.append(recipe)
+            features.append(recipe_features)
+        if not kept:
+            return []
+
+        # Semantic similarity: precomputed scores first, then raw vectors.
+        # Raw vectors keep the scalar cosine so results stay identical.
+        count = len(kept)
+        semantic = np.zeros(count)
+        has_semantic = np.zeros(count, dtype=bool)
+        use_vectors = bool(recipe_vectors) and _has_values(query_vector)
+        for i, recipe in enumerate(kept):
+            value = semantic_scores.get(recipe.id) if semantic_scores else None
+            if value is None and use_vectors:
+                recipe_vec = recipe_vectors.get(recipe.id)
+                if _has_values(recipe_vec):
+                    value = self.cosine_similarity(query_vector, recipe_vec)
+            if value is not None:
+                semantic[i] = value
+                has_semantic[i] = True
+
+        # Keyword overlap where embeddings are unavailable (or not wanted).
+        use_keywords = np.ones(count, dtype=bool) if use_keyword_fallback else ~has_semantic
+        keyword = np.zeros(count)
+        for i in np.flatnonzero(use_keywords):
+            if keyword_scores is not None:
+                keyword[i] = keyword_scores.get(kept[i].id, 0.0)
+            else:
+                keyword[i] = self.keyword_overlap_score(query_tokens, features[i].doc_tokens)
+
+        scores = np.zeros(count)
+        scores += self.semantic_weight * np.where(use_keywords, keyword, semantic)
+
+        if constraints:
+            scores = scores + self.nutrition_weight * self.nutrition_fit_scores(kept, constraints)
+
+        if query_text:
+            if query_token_set:
+                overlap = np.fromiter(
+                    (len(query_token_set & item.ingredient_tokens) for item in features),
+                    dtype=np.int64,
+                    count=count,
+                )
+                ingredient = overlap / max(len(query_token_set), 1)
+            else:
+                ingredient = np.zeros(count)
+            scores = scores + self.ingredient_weight * ingredient
 
-        # Sort by score (descending)
-        scored.sort(key=lambda x: x[0], reverse=True)
-        return scored
+        # Stable descending sort keeps input order for ties, like list.sort(reverse=True).
+        order = np.argsort(-scores, kind="stable")
+        return [(float(scores[i]), kept[i]) for i in order]
 
     def filter_by_constraints(
         self,
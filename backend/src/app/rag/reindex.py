@@ -0,0 +1,254 @@
+"""Chunked, resumable reindexing of the whole recipe library.
+
+Embedding the entire library inside a user request (first compose after a
+seed or an embedding model change) is slow, so this module runs it as a job:
+
+- recipes are walked in ascending ID order in chunks, each chunk is embedded
+  with one batched call and committed,
+- a checkpoint row (``recipe_reindex_state``) records the last finished
+  recipe ID, so an interrupted job resumes where it stopped,
+- progress (throughput, ETA) is available while the job runs, either from the
+  CLI (``scripts/reindex_recipes.py``) or from a background thread inside the
+  API process (``ReindexRunner``).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy.orm import selectinload
+from sqlmodel import Field, Session, SQLModel, col, func, select
+
+from app.models.recipes import Recipe
+from app.rag.features import get_feature_store
+from app.rag.indexer import RecipeIndexer
+
+JOB_NAME = "recipes"
+
+
+class RecipeReindexState(SQLModel, table=True):
+    """Checkpoint of the last (possibly unfinished) reindex job."""
+
+    __tablename__ = "recipe_reindex_state"
+
+    job: str = Field(primary_key=True)
+    force: bool = Field(default=False)
+    last_recipe_id: int = Field(default=0, description="Highest recipe ID already processed")
+    processed: int = Field(default=0)
+    total: int = Field(default=0)
+    started_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = Field(default=None)
+
+
+@dataclass
+class ReindexProgress:
+    """Snapshot of a reindex run."""
+
+    status: str = "idle"  # idle | running | completed | failed | cancelled
+    force: bool = False
+    processed: int = 0
+    total: int = 0
+    chunk_size: int = 0
+    resumed_from: int = 0
+    elapsed_s: float = 0.0
+    rate_per_s: float = 0.0
+    eta_s: Optional[float] = None
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    _started: float = field(default=0.0, repr=False)
+
+    def update_timing(self) -> None:
+        self.elapsed_s = time.perf_counter() - self._started
+        done = self.processed - self.resumed_from
+        self.rate_per_s = done / self.elapsed_s if self.elapsed_s > 0 else 0.0
+        remaining = max(self.total - self.processed, 0)
+        self.eta_s = remaining / self.rate_per_s if self.rate_per_s > 0 else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("_started", None)
+        return data
+
+
+class ReindexJob:
+    """Reindex all recipes in chunks with a persisted checkpoint."""
+
+    def __init__(
+        self,
+        session: Session,
+        indexer: RecipeIndexer,
+        chunk_size: int = 128,
+        force: bool = False,
+        resume: bool = True,
+        on_progress: Optional[Callable[[ReindexProgress], None]] = None,
+        stop_event: Optional[threading.Event] = None,
+    ):
+        """
+        Args:
+            session: Database session used for reading recipes and the checkpoint
+            indexer: Indexer bound to the same session
+            chunk_size: Number of recipes embedded and committed per chunk
+            force: Re-embed recipes even if their content hash is unchanged
+            resume: Continue after the stored checkpoint of an unfinished job
+            on_progress: Callback invoked after every chunk
+            stop_event: Set to stop the job after the current chunk
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        self.session = session
+        self.indexer = indexer
+        self.chunk_size = chunk_size
+        self.force = force
+        self.resume = resume
+        self.on_progress = on_progress
+        self.stop_event = stop_event or threading.Event()
+        self.progress = ReindexProgress(force=force, chunk_size=chunk_size)
+
+    def _load_state(self) -> RecipeReindexState:
+        SQLModel.metadata.create_all(
+            self.session.get_bind(), tables=[RecipeReindexState.__table__]  # type: ignore[attr-defined]
+        )
+        state = self.session.get(RecipeReindexState, JOB_NAME)
+        if state is not None and self.resume and state.finished_at is None and state.force == self.force:
+            return state
+        if state is None:
+            state = RecipeReindexState(job=JOB_NAME)
+        state.force = self.force
+        state.last_recipe_id = 0
+        state.processed = 0
+        state.started_at = datetime.utcnow()
+        state.finished_at = None
+        return state
+
+    def _next_chunk(self, after_id: int) -> Sequence[Recipe]:
+        return self.session.exec(
+            select(Recipe)
+            .options(selectinload(Recipe.ingredients))
+            .where(col(Recipe.id) > after_id)
+            .order_by(col(Recipe.id))
+            .limit(self.chunk_size)
+        ).all()
+
+    def _save_state(self, state: RecipeReindexState) -> None:
+        state.updated_at = datetime.utcnow()
+        self.session.add(state)
+        self.session.commit()
+
+    def run(self) -> ReindexProgress:
+        """Run (or resume) the job until all recipes are processed, it fails, or is stopped."""
+        progress = self.progress
+        progress.status = "running"
+        progress.started_at = datetime.utcnow()
+        progress._started = time.perf_counter()
+
+        state = self._load_state()
+        progress.total = self.session.exec(select(func.count()).select_from(Recipe)).one()
+        progress.processed = progress.resumed_from = state.processed
+        state.total = progress.total
+        self._save_state(state)
+
+        try:
+            while not self.stop_event.is_set():
+                recipes: List[Recipe] = list(self._next_chunk(state.last_recipe_id))
+                if not recipes:
+                    break
+                # Also warms the scoring feature store for this process.
+                texts = [features.document for features in get_feature_store().get_many(recipes)]
+                # Without force, only recipes whose content hash changed are re-embedded.
+                indexed = len(self.indexer.batch_index(recipes, texts, force_refresh=self.force))
+                if indexed < len(recipes):
+                    # Keep the checkpoint before this chunk so the job can resume later.
+                    raise RuntimeError(f"embedding failed for {len(recipes) - indexed} recipes")
+
+                last_id = recipes[-1].id
+                assert last_id is not None  # loaded from the database
+                state.last_recipe_id = last_id
+                state.processed += len(recipes)
+                self._save_state(state)
+
+                progress.processed = state.processed
+                progress.update_timing()
+                if self.on_progress is not None:
+                    self.on_progress(progress)
+        except Exception as exc:
+            self.session.rollback()
+            progress.status = "failed"
+            progress.error = str(exc)
+        else:
+            if self.stop_event.is_set():
+                progress.status = "cancelled"
+            else:
+                state.finished_at = datetime.utcnow()
+                self._save_state(state)
+                progress.status = "completed"
+        finally:
+            self.indexer.save_ann_index()
+            progress.update_timing()
+            progress.finished_at = datetime.utcnow()
+        return progress
+
+
+class ReindexRunner:
+    """Runs at most one ``ReindexJob`` at a time in a background thread."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._job: Optional[ReindexJob] = None
+        self._last: ReindexProgress = ReindexProgress()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(
+        self,
+        bind: Any,
+        indexer_factory: Callable[[Session], RecipeIndexer],
+        chunk_size: int = 128,
+        force: bool = False,
+        resume: bool = True,
+    ) -> bool:
+        """Start a job on ``bind`` in a worker thread; returns False if one is already running."""
+        with self._lock:
+            if self.is_running():
+                return False
+            ready = threading.Event()
+
+            def _work() -> None:
+                with Session(bind) as session:
+                    job = ReindexJob(
+                        session, indexer_factory(session), chunk_size=chunk_size, force=force, resume=resume
+                    )
+                    self._job = job
+                    ready.set()
+                    self._last = job.run()
+
+            self._thread = threading.Thread(target=_work, name="recipe-reindex", daemon=True)
+            self._thread.start()
+            ready.wait(timeout=5)
+            return True
+
+    def cancel(self) -> bool:
+        """Ask the running job to stop after its current chunk."""
+        with self._lock:
+            if not self.is_running() or self._job is None:
+                return False
+            self._job.stop_event.set()
+            return True
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        job = self._job
+        if job is not None and self.is_running():
+            return job.progress.as_dict()
+        return self._last.as_dict()
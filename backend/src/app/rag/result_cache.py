@@ -0,0 +1,192 @@
+"""Retrieval result cache keyed by query and recipe library version.
+
+Identical compose / recommendation requests (dashboards poll the same day with
+the same preferences) used to redo retrieval, scoring and the food database
+tightening every time. ``RetrievalResultCache`` keeps the final ranked ideas
+keyed by the normalized request plus a *library version*. That counter goes
+up whenever a session writes to a table retrieval reads from: recipes, their
+items/tags/embeddings, foods and food synonyms. Entries from an older library
+are never served.
+
+The version is process-local, like the cache. It sees ORM flushes and Core
+DML executed through a ``Session``. Writes from other processes are only
+picked up once entries expire (``ttl_seconds``). Embeddings written while a
+request ranks (``derived_writes``) do not count: they only fill in vectors
+for recipes whose insert or edit already advanced the version.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.foods import Food
+from app.models.foods_extra import FoodSynonym
+from app.models.recipes import Recipe, RecipeItem, RecipeTag
+from app.rag.indexer import RecipeEmbedding
+
+TRACKED_TABLES = frozenset(
+    str(model.__tablename__)
+    for model in (Recipe, RecipeItem, RecipeTag, RecipeEmbedding, Food, FoodSynonym)
+)
+
+_CURRENT_VERSION = 0
+_VERSION_LOCK = threading.Lock()
+_DERIVED = threading.local()
+
+
+def library_version() -> int:
+    """Current library version (changes whenever tracked tables are written)."""
+    return _CURRENT_VERSION
+
+
+def bump_library_version() -> int:
+    """Invalidate cached results by advancing the library version."""
+    global _CURRENT_VERSION
+    with _VERSION_LOCK:
+        _CURRENT_VERSION += 1
+        return _CURRENT_VERSION
+
+
+@contextmanager
+def derived_writes() -> Iterator[None]:
+    """Writes of this thread inside the block do not advance the library version."""
+    depth = getattr(_DERIVED, "depth", 0)
+    _DERIVED.depth = depth + 1
+    try:
+        yield
+    finally:
+        _DERIVED.depth = depth
+
+
+def _counts_as_change() -> bool:
+    return not getattr(_DERIVED, "depth", 0)
+
+
+def _is_tracked(obj: Any) -> bool:
+    return getattr(type(obj), "__tablename__", None) in TRACKED_TABLES
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_flush(session: Session, flush_context: Any) -> None:
+    if not _counts_as_change():
+        return
+    if (
+        any(_is_tracked(obj) for obj in session.new)
+        or any(_is_tracked(obj) for obj in session.deleted)
+        or any(_is_tracked(obj) and session.is_modified(obj) for obj in session.dirty)
+    ):
+        bump_library_version()
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bump_on_dml(orm_execute_state: Any) -> None:
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if not _counts_as_change():
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    if getattr(table, "name", None) in TRACKED_TABLES:
+        bump_library_version()
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Stable digest of JSON-serializable key parts (dict order does not matter)."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class RetrievalResultCache:
+    """Bounded LRU of retrieval results, valid for one library version."""
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_seconds: float = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            max_entries: Maximum number of cached results (0 disables the cache)
+            ttl_seconds: Entry lifetime in seconds (0 = until the library changes)
+            clock: Time source for the TTL
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[int, float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, version: Optional[int] = None) -> Optional[Any]:
+        """Return the cached value for ``key`` at ``version`` (default: current) or None."""
+        version = library_version() if version is None else version
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_version, created_at, value = entry
+                expired = self.ttl_seconds > 0 and self._clock() - created_at > self.ttl_seconds
+                if entry_version == version and not expired:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.stale += 1
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any, version: Optional[int] = None) -> None:
+        """Store ``value``; pass the version read *before* computing it."""
+        if self.max_entries <= 0:
+            return
+        version = library_version() if version is None else version
+        with self._lock:
+            self._entries[key] = (version, self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def configure(self, max_entries: int, ttl_seconds: float) -> None:
+        with self._lock:
+            self.max_entries = max_entries
+            self.ttl_seconds = ttl_seconds
+            while len(self._entries) > max(max_entries, 0):
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "library_version": library_version(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_CACHE = RetrievalResultCache()
+
+
+def get_result_cache() -> RetrievalResultCache:
+    """Return the process-wide retrieval result cache."""
+    return _CACHE
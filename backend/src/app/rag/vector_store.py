@@ -0,0 +1,282 @@
+"""In-memory vector matrix for recipe embeddings.
+
+The SQLite table ``recipe_embeddings`` is the source of truth, but scanning it
+and scoring row by row in pure Python on every request is too slow once the
+library grows. This module keeps a process-wide, pre-normalized float32 matrix
+of all recipe vectors (one store per database) so that similarity search is a
+single matrix-vector product followed by an ``argpartition`` top-k.
+
+Once the library is large enough, an optional ANN index (see ``ann``) supplies
+the candidate rows so that a query no longer touches every vector.
+"""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.rag.ann import AnnIndex
+
+_EPSILON = 1e-9
+
+
+def _normalize(vector: Sequence[float] | np.ndarray) -> np.ndarray:
+    """Return ``vector`` as a unit-length float32 array."""
+    arr = np.asarray(vector, dtype=np.float32).reshape(-1)
+    norm = float(np.linalg.norm(arr))
+    return arr / (norm + _EPSILON)
+
+
+class RecipeVectorStore:
+    """Pre-normalized float32 matrix of recipe vectors with a recipe_id -> row map."""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._ids: List[int] = []
+        self._rows: Dict[int, int] = {}
+        # Content hash each stored vector was computed from (see ``RecipeIndexer``).
+        self.content_hashes: Dict[int, str] = {}
+        self.loaded = False
+        self.ann: AnnIndex = AnnIndex()
+        self.ann_min_size = 0
+        self._ann_path: Optional[Path] = None
+        self._ann_pending = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, recipe_id: object) -> bool:
+        return recipe_id in self._rows
+
+    @property
+    def dim(self) -> Optional[int]:
+        """Vector dimension, or None while the store is empty."""
+        return self._matrix.shape[1] if self._ids else None
+
+    def ids(self) -> List[int]:
+        """Return all recipe IDs currently held in the store."""
+        with self._lock:
+            return list(self._ids)
+
+    def _reset(self, dim: int, capacity: int = 0) -> None:
+        self._matrix = np.empty((max(capacity, 16), dim), dtype=np.float32)
+        self._ids = []
+        self._rows = {}
+
+    def _append_row(self, recipe_id: int, row: np.ndarray) -> None:
+        if not self._ids and (self._matrix.ndim != 2 or self._matrix.shape[1] != row.shape[0]):
+            self._reset(row.shape[0])
+        if len(self._ids) >= self._matrix.shape[0]:
+            # Grow geometrically so that appending stays amortized O(1).
+            grown = np.empty((max(self._matrix.shape[0] * 2, 16), self._matrix.shape[1]), dtype=np.float32)
+            grown[: len(self._ids)] = self._matrix[: len(self._ids)]
+            self._matrix = grown
+        self._rows[recipe_id] = len(self._ids)
+        self._matrix[len(self._ids)] = row
+        self._ids.append(recipe_id)
+
+    def load(self, items: Iterable[Tuple[int, Sequence[float] | np.ndarray]]) -> None:
+        """Replace the store contents with ``items`` and mark it as loaded.
+
+        Rows whose dimension differs from the first vector are skipped; they
+        belong to a different embedding model and would not be comparable.
+        """
+        with self._lock:
+            self._matrix = np.empty((0, 0), dtype=np.float32)
+            self._ids = []
+            self._rows = {}
+            for recipe_id, vector in items:
+                row = _normalize(vector)
+                if not row.size or (self._ids and row.shape[0] != self._matrix.shape[1]):
+                    continue
+                self._append_row(int(recipe_id), row)
+            self.loaded = True
+
+    def upsert(self, recipe_id: int, vector: Sequence[float] | np.ndarray) -> None:
+        """Insert or replace a single recipe vector."""
+        self.upsert_many([(recipe_id, vector)])
+
+    def upsert_many(self, items: Iterable[Tuple[int, Sequence[float] | np.ndarray]]) -> None:
+        """Insert or replace several recipe vectors.
+
+        A vector with a different dimension than the stored ones means the
+        embedding model changed; the stale rows are dropped in that case.
+        """
+        with self._lock:
+            touched: List[int] = []
+            for recipe_id, vector in items:
+                row = _normalize(vector)
+                if not row.size:
+                    continue
+                if self._ids and row.shape[0] != self._matrix.shape[1]:
+                    self._reset(row.shape[0])
+                    self.ann.build([], np.empty((0, row.shape[0]), dtype=np.float32))
+                    touched = []
+                existing = self._rows.get(recipe_id)
+                if existing is not None:
+                    self._matrix[existing] = row
+                else:
+                    self._append_row(int(recipe_id), row)
+                touched.append(int(recipe_id))
+            self._sync_ann(touched)
+
+    def remove(self, recipe_ids: Iterable[int]) -> None:
+        """Remove recipe vectors (swap-with-last, so removal is O(1) per row)."""
+        with self._lock:
+            for recipe_id in recipe_ids:
+                row = self._rows.pop(recipe_id, None)
+                if row is None:
+                    continue
+                last = len(self._ids) - 1
+                if row != last:
+                    moved_id = self._ids[last]
+                    self._matrix[row] = self._matrix[last]
+                    self._ids[row] = moved_id
+                    self._rows[moved_id] = row
+                self._ids.pop()
+                self.ann.remove([recipe_id])
+                self._ann_pending += 1
+
+    def clear(self) -> None:
+        """Drop all vectors but keep the store marked as loaded."""
+        with self._lock:
+            self._matrix = np.empty((0, 0), dtype=np.float32)
+            self._ids = []
+            self._rows = {}
+            self.content_hashes = {}
+            self.ann.build([], np.empty((0, 0), dtype=np.float32))
+            self._ann_pending += 1
+
+    def configure_ann(self, index: AnnIndex, path: Optional[Path] = None, min_size: int = 2000) -> None:
+        """Attach an ANN index, loading it from ``path`` and reconciling with the store.
+
+        A persisted index that lags behind the store (e.g. the process stopped
+        before it was saved) is updated incrementally instead of rebuilt.
+        """
+        with self._lock:
+            self.ann = index
+            self.ann_min_size = min_size
+            self._ann_path = path
+            if path is not None and self._ids and index.load(path):
+                if index.dim != self.dim:
+                    index.build([], self._matrix[:0])
+                indexed = index.ids()
+                stale = indexed - set(self._rows)
+                missing = [recipe_id for recipe_id in self._ids if recipe_id not in indexed]
+                index.remove(stale)
+                if missing:
+                    index.add(missing, self._matrix[[self._rows[rid] for rid in missing]])
+                self._ann_pending = len(stale) + len(missing)
+            self._sync_ann([])
+
+    def ann_active(self) -> bool:
+        """Whether searches over the whole store currently go through the ANN index."""
+        return len(self.ann) > 0 and len(self) >= self.ann_min_size
+
+    def _sync_ann(self, touched: List[int]) -> None:
+        if self.ann.backend == "exact":
+            return
+        if len(self) >= self.ann_min_size and self.ann.needs_rebuild(len(self)):
+            self.ann.build(list(self._ids), self._matrix[: len(self._ids)])
+            self._ann_pending = len(self._ids)
+        elif touched and len(self.ann):
+            self.ann.add(touched, self._matrix[[self._rows[rid] for rid in touched]])
+            self._ann_pending += len(touched)
+
+    def save_ann(self, force: bool = False, every: int = 256) -> bool:
+        """Persist the ANN index if enough updates accumulated (or ``force``)."""
+        with self._lock:
+            if self._ann_path is None or not len(self.ann) or not self._ann_pending:
+                return False
+            if not force and self._ann_pending < every:
+                return False
+            self.ann.save(self._ann_path)
+            self._ann_pending = 0
+            return True
+
+    def vector(self, recipe_id: int) -> Optional[np.ndarray]:
+        """Return a copy of the normalized vector for ``recipe_id``."""
+        with self._lock:
+            row = self._rows.get(recipe_id)
+            return None if row is None else self._matrix[row].copy()
+
+    def similarities(
+        self,
+        query_vector: Sequence[float] | np.ndarray,
+        recipe_ids: Optional[Iterable[int]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Cosine similarity between the query and stored vectors.
+
+        Args:
+            query_vector: Raw (not necessarily normalized) query embedding
+            recipe_ids: Optional subset of recipe IDs to score
+
+        Returns:
+            Tuple of (recipe_ids, scores) arrays in matching order
+        """
+        with self._lock:
+            if not self._ids:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            query = _normalize(query_vector)
+            if query.shape[0] != self._matrix.shape[1]:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+            if recipe_ids is None:
+                rows = np.arange(len(self._ids))
+            else:
+                rows = np.fromiter(
+                    (self._rows[rid] for rid in recipe_ids if rid in self._rows), dtype=np.int64
+                )
+            ids = np.asarray(self._ids, dtype=np.int64)[rows]
+            scores = self._matrix[rows] @ query
+            return ids, scores
+
+    def top_k(
+        self,
+        query_vector: Sequence[float] | np.ndarray,
+        k: int,
+        recipe_ids: Optional[Iterable[int]] = None,
+    ) -> List[Tuple[int, float]]:
+        """Return the ``k`` most similar recipes as (recipe_id, score), best first.
+
+        Without a ``recipe_ids`` restriction and with an active ANN index, only
+        the ANN candidates are scored (exactly) instead of the whole matrix.
+        """
+        if recipe_ids is None and self.ann_active():
+            with self._lock:
+                query = _normalize(query_vector)
+                if self.dim == query.shape[0]:
+                    recipe_ids = self.ann.search(query, k)
+        ids, scores = self.similarities(query_vector, recipe_ids)
+        if k <= 0 or not ids.size:
+            return []
+        if k < ids.size:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(ids.size)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+
+_STORES: Dict[str, RecipeVectorStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_vector_store(bind) -> RecipeVectorStore:
+    """Return the process-wide vector store for the given engine/connection."""
+    key = str(getattr(bind, "url", bind))
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = _STORES[key] = RecipeVectorStore()
+        return store
+
+
+def reset_vector_stores() -> None:
+    """Forget all in-memory stores (they are reloaded from SQLite on next use)."""
+    with _STORES_LOCK:
+        _STORES.clear()
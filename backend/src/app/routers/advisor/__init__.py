@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from fastapi import APIRouter
 
-from .routes import chat, compose, gaps, recommendations
+from .routes import cache, chat, compose, gaps, llm_status, recommendations, reindex
 
 router = APIRouter(prefix="/advisor", tags=["advisor"])
 
@@ -10,6 +10,9 @@ router.include_router(gaps.router)
 router.include_router(recommendations.router)
 router.include_router(chat.router)
 router.include_router(compose.router)
+router.include_router(reindex.router)
+router.include_router(cache.router)
+router.include_router(llm_status.router)
 
 __all__ = ["router"]
 
@@ -12,17 +12,43 @@ OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.1")
 OLLAMA_TIMEOUT = int(os.getenv("OLLAMA_TIMEOUT", "100"))
 
 RAG_EMBED_URL = os.getenv("RAG_EMBED_URL")
+RAG_EMBED_MODEL = os.getenv("RAG_EMBED_MODEL", "all-MiniLM-L6-v2")
+RAG_EMBED_MODEL_VERSION = os.getenv("RAG_EMBED_MODEL_VERSION", "")
+RAG_EMBED_WIRE_FORMAT = os.getenv("RAG_EMBED_WIRE_FORMAT", "float32")
+RAG_EMBED_TIMEOUT = float(os.getenv("RAG_EMBED_TIMEOUT", "15"))
+RAG_EMBED_MAX_CONCURRENCY = int(os.getenv("RAG_EMBED_MAX_CONCURRENCY", "4"))
+RAG_EMBED_BREAKER_THRESHOLD = int(os.getenv("RAG_EMBED_BREAKER_THRESHOLD", "3"))
+RAG_EMBED_BREAKER_RESET = float(os.getenv("RAG_EMBED_BREAKER_RESET", "30"))
+RAG_EMBED_CACHE_SIZE = int(os.getenv("RAG_EMBED_CACHE_SIZE", "1024"))
+RAG_EMBED_CACHE_TTL = float(os.getenv("RAG_EMBED_CACHE_TTL", "86400"))
+RAG_EMBED_CACHE_PATH = os.getenv("RAG_EMBED_CACHE_PATH")
 RAG_TOP_K = int(os.getenv("RAG_TOP_K", "30"))
 RAG_MAX_RECIPES = int(os.getenv("RAG_MAX_RECIPES", "0"))
+RAG_CANDIDATE_POOL = int(os.getenv("RAG_CANDIDATE_POOL", "200"))
+RAG_FEATURE_CACHE_SIZE = int(os.getenv("RAG_FEATURE_CACHE_SIZE", "100000"))
+RAG_RETRIEVAL_MODE = os.getenv("RAG_RETRIEVAL_MODE", "dense").strip().lower()
+RAG_RRF_K = int(os.getenv("RAG_RRF_K", "60"))
+RAG_HYBRID_DENSE_TIMEOUT = float(os.getenv("RAG_HYBRID_DENSE_TIMEOUT", "2.0"))
+RAG_RESULT_CACHE_SIZE = int(os.getenv("RAG_RESULT_CACHE_SIZE", "256"))
+RAG_RESULT_CACHE_TTL = float(os.getenv("RAG_RESULT_CACHE_TTL", "600"))
+RAG_EMBED_STORAGE = os.getenv("RAG_EMBED_STORAGE", "float32")
+RAG_ANN_BACKEND = os.getenv("RAG_ANN_BACKEND", "ivf")
+RAG_ANN_MIN_SIZE = int(os.getenv("RAG_ANN_MIN_SIZE", "2000"))
+RAG_ANN_NPROBE = int(os.getenv("RAG_ANN_NPROBE", "8"))
 
 LLAMA_CPP_MODEL_PATH = os.getenv("LLAMA_CPP_MODEL_PATH")
 
+COMPOSE_BUDGET_MS = int(os.getenv("COMPOSE_BUDGET_MS", "0"))
+COMPOSE_LLM_PARALLEL = os.getenv("COMPOSE_LLM_PARALLEL", "0").strip().lower() in ("1", "true", "yes", "on")
+COMPOSE_LLM_EXTRA_REQUESTS = int(os.getenv("COMPOSE_LLM_EXTRA_REQUESTS", "1"))
+
 try:
-    from app.models.recipes import Recipe, RecipeItem  # noqa: F401
+    from app.models.recipes import Recipe, RecipeItem, RecipeTag  # noqa: F401
 
     HAS_RECIPES = True
 except Exception:  # pragma: no cover - optional dependency
     HAS_RECIPES = False
     Recipe = None  # type: ignore
     RecipeItem = None  # type: ignore
+    RecipeTag = None  # type: ignore
 
@@ -1,15 +1,26 @@
 from __future__ import annotations
 
-import json
 import math
 import re
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
+import numpy as np
 from sqlmodel import Session, select
 
 from app.models.foods import Food
 
-from .config import RAG_EMBED_URL
+from .config import (
+    RAG_EMBED_BREAKER_RESET,
+    RAG_EMBED_BREAKER_THRESHOLD,
+    RAG_EMBED_CACHE_PATH,
+    RAG_EMBED_CACHE_SIZE,
+    RAG_EMBED_CACHE_TTL,
+    RAG_EMBED_MAX_CONCURRENCY,
+    RAG_EMBED_MODEL,
+    RAG_EMBED_TIMEOUT,
+    RAG_EMBED_URL,
+    RAG_EMBED_WIRE_FORMAT,
+)
 from .schemas import Ingredient, Macro, MacroTotals, Prefs, RecipeIdea
 
 try:  # pragma: no cover - optional dependency
@@ -17,6 +28,35 @@ try:  # pragma: no cover - optional dependency
 except Exception:  # pragma: no cover - optional dependency
     Recipe = None  # type: ignore
 
+try:  # pragma: no cover - optional dependency
+    from app.rag.embedding_cache import EmbeddingCache
+
+    _QUERY_EMBED_CACHE: Optional["EmbeddingCache"] = EmbeddingCache(
+        max_entries=RAG_EMBED_CACHE_SIZE,
+        ttl_seconds=RAG_EMBED_CACHE_TTL,
+        path=RAG_EMBED_CACHE_PATH,
+    )
+except Exception:  # pragma: no cover - optional dependency
+    _QUERY_EMBED_CACHE = None
+
+try:  # pragma: no cover - optional dependency
+    from app.rag.embedding_client import EmbeddingClient
+
+    _EMBED_CLIENT: Optional["EmbeddingClient"] = (
+        EmbeddingClient(
+            RAG_EMBED_URL,
+            timeout=RAG_EMBED_TIMEOUT,
+            max_concurrency=RAG_EMBED_MAX_CONCURRENCY,
+            failure_threshold=RAG_EMBED_BREAKER_THRESHOLD,
+            reset_timeout=RAG_EMBED_BREAKER_RESET,
+            wire_format=RAG_EMBED_WIRE_FORMAT,
+        )
+        if RAG_EMBED_URL
+        else None
+    )
+except Exception:  # pragma: no cover - optional dependency
+    _EMBED_CLIENT = None
+
 
 def _food_list_for_prompt(session: Session, top_n: int = 24) -> List[Food]:
     foods = session.exec(select(Food)).all()
@@ -94,21 +134,28 @@ def _apply_prefs_filter_foods(foods: Sequence[Food], prefs: Prefs) -> List[Food]
     return result
 
 
-def _embed_texts(texts: List[str]) -> Optional[List[List[float]]]:
-    if not RAG_EMBED_URL:
+def _embed_texts(texts: List[str]) -> Optional[np.ndarray]:
+    if _EMBED_CLIENT is None:
         return None
+    return _EMBED_CLIENT.embed(texts)
 
-    try:
-        import urllib.request
 
-        payload = json.dumps({"texts": texts}).encode("utf-8")
-        req = urllib.request.Request(
-            RAG_EMBED_URL, data=payload, headers={"Content-Type": "application/json"}
-        )
-        with urllib.request.urlopen(req, timeout=15) as response:
-            return json.loads(response.read()).get("vectors")
-    except Exception:
+def _embed_queries(texts: List[str]) -> Optional[List[List[float]]]:
+    """Embed query texts through the LRU/TTL cache (documents use ``_embed_texts``)."""
+    if _EMBED_CLIENT is None:
         return None
+    if _QUERY_EMBED_CACHE is None:
+        vectors = _embed_texts(texts)
+        return vectors.tolist() if vectors is not None else None
+    return _QUERY_EMBED_CACHE.get_or_compute(RAG_EMBED_MODEL, texts, _embed_texts)
+
+
+def _embedding_stats() -> Dict[str, Any]:
+    """Embedding client metrics (latency, circuit, in-flight) and query cache counters."""
+    return {
+        "client": _EMBED_CLIENT.stats() if _EMBED_CLIENT is not None else {"enabled": False},
+        "query_cache": _QUERY_EMBED_CACHE.stats() if _QUERY_EMBED_CACHE is not None else {"enabled": False},
+    }
 
 
 def _cosine(a: Iterable[float], b: Iterable[float]) -> float:
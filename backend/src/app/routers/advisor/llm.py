@@ -1,19 +1,16 @@
 from __future__ import annotations
 
-import http.client
 import json
-import os
-import subprocess
-from typing import Any, Dict, Optional
+import threading
+from typing import Any, Dict, Iterator, Optional
 
+import httpx
 from fastapi import HTTPException
 
-from .config import (
-    LLAMA_CPP_MODEL_PATH,
-    OLLAMA_HOST,
-    OLLAMA_MODEL,
-    OLLAMA_TIMEOUT,
-)
+from app.utils.llm import extract_json
+from app.utils.llm_service import LLMDeadlineExceeded, LLMQueueFull, Priority, get_llm_service
+
+from .config import OLLAMA_MODEL, OLLAMA_TIMEOUT
 
 SYSTEM_PROMPT_CHAT = (
     "Du bist ein hilfsbereiter, praeziser Ernährungs- und Fitnessassistent. "
@@ -22,16 +19,6 @@ SYSTEM_PROMPT_CHAT = (
     "Keine Halluzinationen: sei ehrlich, wenn du etwas nicht weißt."
 )
 
-LLAMA_CPP_AVAILABLE = False
-try:  # pragma: no cover - optional dependency
-    from llama_cpp import Llama  # type: ignore
-
-    LLAMA_CPP_AVAILABLE = True
-except Exception:  # pragma: no cover - optional dependency
-    Llama = None  # type: ignore
-
-_llama_cpp_handle: Optional["Llama"] = None
-
 
 def build_chat_prompt(user_message: str, extra_context: Optional[str] = None) -> str:
     ctx = (extra_context or "").strip()
@@ -42,51 +29,119 @@ def build_chat_prompt(user_message: str, extra_context: Optional[str] = None) ->
     return f"{SYSTEM_PROMPT_CHAT}\n\n[Frage]\n{user_message}\n\n[Antwort]"
 
 
+def _llm_error(exc: Exception) -> HTTPException:
+    """Map scheduler/backend errors to the HTTP errors the advisor routes return."""
+    if isinstance(exc, LLMQueueFull):
+        return HTTPException(status_code=503, detail=f"LLM ueberlastet: {exc}")
+    if isinstance(exc, LLMDeadlineExceeded):
+        return HTTPException(status_code=504, detail=f"LLM-Zeitlimit ueberschritten: {exc}")
+    if isinstance(exc, httpx.HTTPStatusError):
+        return HTTPException(status_code=503, detail=f"Ollama error {exc.response.status_code}")
+    return HTTPException(status_code=503, detail=f"LLM-Fehler: {exc!s}")
+
+
+def _decode_json_reply(text: str) -> Dict[str, Any]:
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as exc:  # pragma: no cover - defensive
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "error": "llm_invalid_json",
+                "hint": "Das LLM lieferte kein valides JSON im Compose-Mode.",
+                "sample": text[:400],
+            },
+        ) from exc
+
+
 def _ollama_generate(
     prompt: str,
     model: str = OLLAMA_MODEL,
     as_json: bool = False,
-    timeout: int = OLLAMA_TIMEOUT,
+    timeout: float = OLLAMA_TIMEOUT,
+    priority: Priority = Priority.NORMAL,
+    cache: bool = False,
 ) -> str | Dict[str, Any]:
-    conn = http.client.HTTPConnection(OLLAMA_HOST, OLLAMA_PORT, timeout=timeout)
-    body: Dict[str, Any] = {"model": model, "prompt": prompt, "stream": False}
-    if as_json:
-        body["format"] = "json"
-        body["options"] = {"temperature": 0.3}
-    conn.request(
-        "POST",
-        "/api/generate",
-        body=json.dumps(body),
-        headers={"Content-Type": "application/json"},
-    )
-    res = conn.getresponse()
-    if res.status != 200:
-        raise HTTPException(status_code=503, detail=f"Ollama error {res.status}")
-    outer = json.loads(res.read())
-    text = outer.get("response", "")
-    if as_json:
-        try:
-            return json.loads(text)
-        except json.JSONDecodeError as exc:  # pragma: no cover - defensive
-            raise HTTPException(
-                status_code=503,
-                detail={
-                    "error": "llm_invalid_json",
-                    "hint": "Ollama lieferte kein valides JSON im Compose-Mode.",
-                    "sample": text[:400],
-                },
-            ) from exc
-    return text
-
-
-def _ollama_alive(timeout: int = 2) -> bool:
+    """Blocking generation through the LLM service (preferred backend).
+
+    Only error replies become an HTTPException; connection errors, a full
+    queue and missed deadlines propagate so callers can fall back.
+    """
     try:
-        conn = http.client.HTTPConnection(OLLAMA_HOST, OLLAMA_PORT, timeout=timeout)
-        conn.request("GET", "/api/tags")
-        res = conn.getresponse()
-        return res.status == 200
-    except Exception:
-        return False
+        text = get_llm_service().generate(
+            prompt,
+            model=model,
+            as_json=as_json,
+            temperature=0.3 if as_json else None,
+            priority=priority,
+            timeout=timeout,
+            cache=cache,
+        )
+    except httpx.HTTPStatusError as exc:
+        raise _llm_error(exc) from exc
+    return _decode_json_reply(text) if as_json else text
+
+
+async def _aollama_generate(
+    prompt: str,
+    model: str = OLLAMA_MODEL,
+    as_json: bool = False,
+    timeout: float = OLLAMA_TIMEOUT,
+    priority: Priority = Priority.NORMAL,
+    cache: bool = False,
+) -> str | Dict[str, Any]:
+    """Async ``_ollama_generate``; waits for the scheduler without blocking a worker thread."""
+    try:
+        text = await get_llm_service().agenerate(
+            prompt,
+            model=model,
+            as_json=as_json,
+            temperature=0.3 if as_json else None,
+            priority=priority,
+            timeout=timeout,
+            cache=cache,
+        )
+    except httpx.HTTPStatusError as exc:
+        raise _llm_error(exc) from exc
+    return _decode_json_reply(text) if as_json else text
+
+
+async def _aollama_alive(timeout: float = 2) -> bool:
+    return await get_llm_service().aalive(timeout=timeout)
+
+
+def _used_backend() -> str:
+    return get_llm_service().backend_name
+
+
+def _llm_stream(
+    prompt: str,
+    as_json: bool = False,
+    temperature: float = 0.3,
+    max_tokens: int = 512,
+    cancel: Optional[threading.Event] = None,
+) -> Iterator[str]:
+    """Yield completion fragments as the backend produces them (interactive priority).
+
+    Generation stops as soon as ``cancel`` is set or the generator is closed.
+    """
+    try:
+        yield from get_llm_service().stream(
+            prompt,
+            as_json=as_json,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            priority=Priority.INTERACTIVE,
+            timeout=OLLAMA_TIMEOUT,
+            cancel=cancel,
+        )
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise _llm_error(exc) from exc
+
+
+_NO_LLM = "Kein lokales LLM erreichbar (llama.cpp / Ollama)."
 
 
 def _llm_generate(
@@ -94,74 +149,58 @@ def _llm_generate(
     as_json: bool = False,
     temperature: float = 0.3,
     max_tokens: int = 512,
+    priority: Priority = Priority.INTERACTIVE,
 ) -> str:
-    if LLAMA_CPP_AVAILABLE and LLAMA_CPP_MODEL_PATH and os.path.exists(
-        LLAMA_CPP_MODEL_PATH
-    ):
-        global _llama_cpp_handle
-        if _llama_cpp_handle is None:
-            _llama_cpp_handle = Llama(  # type: ignore[call-arg]
-                model_path=LLAMA_CPP_MODEL_PATH,
-                n_ctx=8192,
-                n_threads=os.cpu_count() or 4,
-            )
-        params = {
-            "prompt": prompt,
-            "max_tokens": max_tokens,
-            "temperature": temperature,
-        }
-        out = _llama_cpp_handle(**params)  # type: ignore[misc]
-        text = out.get("choices", [{}])[0].get("text", "").strip()
-        return text
+    """Blocking generation via the LLM service.
 
+    Backend failover (e.g. Ollama down, warm llama.cpp model configured)
+    happens inside the service; here every failure becomes an HTTP error.
+    """
     try:
-        if as_json:
-            conn = http.client.HTTPConnection(
-                OLLAMA_HOST, OLLAMA_PORT, timeout=OLLAMA_TIMEOUT
-            )
-            body = json.dumps(
-                {
-                    "model": OLLAMA_MODEL,
-                    "prompt": prompt,
-                    "stream": False,
-                    "format": "json",
-                    "options": {"temperature": temperature},
-                }
-            )
-            conn.request(
-                "POST",
-                "/api/generate",
-                body=body,
-                headers={"Content-Type": "application/json"},
-            )
-            res = conn.getresponse()
-            if res.status == 200:
-                data = json.loads(res.read())
-                return data.get("response", "")
-        else:
-            return _ollama_generate(prompt, model=OLLAMA_MODEL, timeout=OLLAMA_TIMEOUT)
-    except Exception:
-        pass
+        return get_llm_service().generate(
+            prompt,
+            as_json=as_json,
+            temperature=temperature if as_json else None,
+            max_tokens=max_tokens,
+            priority=priority,
+            timeout=OLLAMA_TIMEOUT,
+        )
+    except (LLMQueueFull, LLMDeadlineExceeded) as exc:
+        raise _llm_error(exc) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail=_NO_LLM) from exc
+
 
+async def _allm_generate(
+    prompt: str,
+    as_json: bool = False,
+    temperature: float = 0.3,
+    max_tokens: int = 512,
+    priority: Priority = Priority.INTERACTIVE,
+) -> str:
+    """Async ``_llm_generate``; awaits the scheduler without blocking a worker thread."""
     try:
-        cmd = ["ollama", "run", OLLAMA_MODEL, prompt]
-        result = subprocess.run(
-            cmd, capture_output=True, text=True, timeout=max(OLLAMA_TIMEOUT, 120)
+        return await get_llm_service().agenerate(
+            prompt,
+            as_json=as_json,
+            temperature=temperature if as_json else None,
+            max_tokens=max_tokens,
+            priority=priority,
+            timeout=OLLAMA_TIMEOUT,
         )
-        if result.returncode == 0:
-            return result.stdout.strip()
-    except Exception:
-        pass
-
-    raise HTTPException(
-        status_code=503,
-        detail="Kein lokales LLM erreichbar (llama.cpp / Ollama).",
-    )
+    except (LLMQueueFull, LLMDeadlineExceeded) as exc:
+        raise _llm_error(exc) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail=_NO_LLM) from exc
 
 
-def _parse_llm_json(raw: str) -> Dict[str, Any]:
-    start, end = raw.find("{"), raw.rfind("}")
-    if start < 0 or end <= start:
+def _parse_llm_json(raw: str | Dict[str, Any]) -> Dict[str, Any]:
+    if isinstance(raw, dict):
+        return raw
+    try:
+        data = extract_json(raw)
+    except ValueError as exc:
+        raise HTTPException(status_code=500, detail="KI-Ausgabe nicht parsebar.") from exc
+    if not isinstance(data, dict):
         raise HTTPException(status_code=500, detail="KI-Ausgabe nicht parsebar.")
-    return json.loads(raw[start : end + 1])
-
+    return data
@@ -1,18 +1,42 @@
 from __future__ import annotations
 
+import copy
 import json
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from fastapi import HTTPException
+from sqlalchemy import exists, func, or_
 from sqlalchemy.orm import selectinload
-from sqlmodel import Session, select
+from sqlmodel import Session, col, select
 
+from app.core.fts import search_recipe_ids
 from app.models.foods import Food
 
-from .config import HAS_RECIPES, RAG_MAX_RECIPES, RAG_TOP_K, Recipe, RecipeItem
+from .config import (
+    HAS_RECIPES,
+    RAG_ANN_BACKEND,
+    RAG_ANN_MIN_SIZE,
+    RAG_ANN_NPROBE,
+    RAG_CANDIDATE_POOL,
+    RAG_EMBED_MODEL,
+    RAG_EMBED_MODEL_VERSION,
+    RAG_EMBED_STORAGE,
+    RAG_FEATURE_CACHE_SIZE,
+    RAG_HYBRID_DENSE_TIMEOUT,
+    RAG_MAX_RECIPES,
+    RAG_RESULT_CACHE_SIZE,
+    RAG_RESULT_CACHE_TTL,
+    RAG_RETRIEVAL_MODE,
+    RAG_RRF_K,
+    RAG_TOP_K,
+    Recipe,
+    RecipeItem,
+    RecipeTag,
+)
 from .helpers import (
     _apply_prefs_filter_foods,
     _cosine,
+    _embed_queries,
     _embed_texts,
     _respect_max_kcal,
     _tighten_with_foods_db,
@@ -28,12 +52,25 @@ from .schemas import (
 )
 
 try:  # pragma: no cover - optional dependency
+    from app.rag.features import get_feature_store
+    from app.rag.hybrid import HybridResult, HybridRetriever, embed_within
     from app.rag.indexer import RecipeIndexer, RecipeEmbedding  # noqa: F401
+    from app.rag.keyword_index import load_keyword_index
     from app.rag.preprocess import QueryPreprocessor
     from app.rag.postprocess import PostProcessor
+    from app.rag.embedding_cache import normalize_query_text
+    from app.rag.result_cache import derived_writes, get_result_cache, library_version, make_cache_key
 
+    get_feature_store().resize(RAG_FEATURE_CACHE_SIZE)
+    get_result_cache().configure(RAG_RESULT_CACHE_SIZE, RAG_RESULT_CACHE_TTL)
     RAG_MODULES_AVAILABLE = True
 except Exception:  # pragma: no cover - optional dependency
+    get_feature_store = None  # type: ignore
+    load_keyword_index = None  # type: ignore
+    get_result_cache = None  # type: ignore
+    library_version = make_cache_key = derived_writes = None  # type: ignore
+    normalize_query_text = None  # type: ignore
+    HybridRetriever = embed_within = None  # type: ignore
     RecipeIndexer = None  # type: ignore
     QueryPreprocessor = None  # type: ignore
     PostProcessor = None  # type: ignore
@@ -120,21 +157,33 @@ def _recipe_document(recipe: "Recipe") -> str:
     return " ".join(part for part in parts if part).strip()
 
 
+def _recipe_ingredient_names(recipe: "Recipe") -> Iterable[str]:
+    if get_feature_store is not None:
+        return get_feature_store().get(recipe).ingredient_names
+    return [
+        (getattr(ingredient, "name", "") or "").strip().lower()
+        for ingredient in getattr(recipe, "ingredients", []) or []
+        if (getattr(ingredient, "name", "") or "").strip()
+    ]
+
+
+def _recipe_tags(recipe: "Recipe") -> List[str]:
+    if get_feature_store is not None:
+        return list(get_feature_store().get(recipe).tags)
+    return [t.strip().lower() for t in (recipe.tags or "").split(",") if t.strip()]
+
+
 def _recipe_has_ingredients(recipe: "Recipe", required_names: List[str]) -> bool:
     if not required_names:
         return True
-    available = {
-        (getattr(ingredient, "name", "") or "").strip().lower()
-        for ingredient in getattr(recipe, "ingredients", []) or []
-        if getattr(ingredient, "name", None)
-    }
+    available = set(_recipe_ingredient_names(recipe))
     if not available:
         return False
     return all(any(req == name for name in available) for req in required_names)
 
 
 def _recipe_matches_preferences(recipe: "Recipe", prefs: Prefs, constraints: Dict[str, Any]) -> bool:
-    tags = [t.strip().lower() for t in (recipe.tags or "").split(",") if t.strip()]
+    tags = _recipe_tags(recipe)
     if prefs.vegan and "vegan" not in tags:
         return False
     if prefs.veggie and not any(
@@ -152,6 +201,223 @@ def _recipe_matches_preferences(recipe: "Recipe", prefs: Prefs, constraints: Dic
     return True
 
 
+def _recipe_passes_filters(
+    recipe: "Recipe", prefs: Prefs, constraints: Dict[str, Any], required_lower: List[str]
+) -> bool:
+    if not _recipe_matches_preferences(recipe, prefs, constraints):
+        return False
+    if required_lower and not _recipe_has_ingredients(recipe, required_lower):
+        return False
+    return True
+
+
+def _has_tag(*conditions: Any) -> Any:
+    return exists().where(col(RecipeTag.recipe_id) == col(Recipe.id), *conditions)
+
+
+def _recipe_filter_clauses(prefs: Prefs, constraints: Dict[str, Any], required_lower: List[str]) -> List[Any]:
+    """Translate ``_recipe_passes_filters`` into WHERE clauses on ``Recipe``.
+
+    Tag checks become EXISTS subqueries on ``recipetag`` and required
+    ingredients EXISTS subqueries on ``recipeitem``. SQLite's ``lower()`` only
+    folds ASCII, so non-ASCII ingredient names are left to ``_residual_ingredients``.
+    """
+    clauses: List[Any] = []
+    if prefs.vegan:
+        clauses.append(_has_tag(RecipeTag.tag == "vegan"))
+    if prefs.veggie:
+        clauses.append(_has_tag(col(RecipeTag.tag).in_(("vegetarisch", "vegetarian", "veggie", "vegan"))))
+    if prefs.no_pork:
+        clauses.append(~_has_tag(or_(col(RecipeTag.tag).contains("pork"), col(RecipeTag.tag).contains("schwein"))))
+    if prefs.cuisine_bias:
+        # Untagged recipes are not excluded by a cuisine bias.
+        clauses.append(or_(~_has_tag(), _has_tag(col(RecipeTag.tag).in_([bias.lower() for bias in prefs.cuisine_bias]))))
+    max_kcal = constraints.get("max_kcal")
+    if max_kcal is not None:
+        clauses.append(or_(col(Recipe.macros_kcal).is_(None), col(Recipe.macros_kcal) <= max_kcal))
+    for name in required_lower:
+        if name.isascii():
+            clauses.append(
+                exists().where(
+                    col(RecipeItem.recipe_id) == col(Recipe.id),
+                    func.lower(func.trim(RecipeItem.name)) == name,
+                )
+            )
+    return clauses
+
+
+def _residual_ingredients(required_lower: List[str]) -> List[str]:
+    return [name for name in required_lower if not name.isascii()]
+
+
+def _load_filtered_recipes(
+    session: Session,
+    prefs: Prefs,
+    constraints: Dict[str, Any],
+    required_lower: List[str],
+    recipe_ids: Optional[List[int]] = None,
+    max_rows: int = 0,
+) -> List["Recipe"]:
+    """Load recipes (with ingredients) passing the filters, newest first.
+
+    Args:
+        recipe_ids: Restrict to these candidates (None = whole library)
+        max_rows: Cap on loaded recipes (0 = no cap)
+    """
+    stmt = select(Recipe).where(*_recipe_filter_clauses(prefs, constraints, required_lower))
+    if recipe_ids is not None:
+        stmt = stmt.where(col(Recipe.id).in_(recipe_ids))
+    stmt = stmt.options(selectinload(Recipe.ingredients)).order_by(Recipe.created_at.desc())
+    if max_rows > 0:
+        stmt = stmt.limit(max_rows)
+    recipes = list(session.exec(stmt).all())
+    residual = _residual_ingredients(required_lower)
+    if residual:
+        recipes = [recipe for recipe in recipes if _recipe_has_ingredients(recipe, residual)]
+    return recipes
+
+
+def _filter_ranked_hits(
+    session: Session,
+    hits: List[Tuple[int, float]],
+    prefs: Prefs,
+    constraints: Dict[str, Any],
+    required_lower: List[str],
+) -> List["Recipe"]:
+    """Load the ranked candidates that pass the filters, in ranking order."""
+    by_id = {
+        recipe.id: recipe
+        for recipe in _load_filtered_recipes(
+            session, prefs, constraints, required_lower, recipe_ids=[recipe_id for recipe_id, _ in hits]
+        )
+    }
+    return [by_id[recipe_id] for recipe_id, _ in hits if recipe_id in by_id]
+
+
+def _recipe_indexer(session: Session) -> "RecipeIndexer":
+    return RecipeIndexer(  # type: ignore[call-arg, misc]
+        session,
+        embedding_client=_embed_texts,
+        storage_dtype=RAG_EMBED_STORAGE,
+        ann_backend=RAG_ANN_BACKEND,
+        ann_min_size=RAG_ANN_MIN_SIZE,
+        ann_nprobe=RAG_ANN_NPROBE,
+        model_name=RAG_EMBED_MODEL,
+        model_version=RAG_EMBED_MODEL_VERSION,
+    )
+
+
+def _ann_prefiltered_recipes(
+    session: Session,
+    indexer: "RecipeIndexer",
+    query_vec: List[float],
+    prefs: Prefs,
+    constraints: Dict[str, Any],
+    required_lower: List[str],
+    limit: int,
+) -> Optional[List["Recipe"]]:
+    """Fetch the nearest recipes via the ANN index and filter only those.
+
+    Returns None when the filters leave fewer than ``limit`` candidates, so the
+    caller can fall back to scanning the whole library. Only recipes already in
+    the vector store are found; new recipes are embedded when persisted and the
+    rest of the library by the reindex job, never inside this request.
+    """
+    hits = indexer.search(query_vec, top_k=max(limit, RAG_CANDIDATE_POOL))
+    if not hits:
+        return None
+    filtered = _filter_ranked_hits(session, hits, prefs, constraints, required_lower)
+    return filtered if len(filtered) >= limit else None
+
+
+def _fts_prefiltered_recipes(
+    session: Session,
+    query_text: str,
+    prefs: Prefs,
+    constraints: Dict[str, Any],
+    required_lower: List[str],
+    limit: int,
+) -> Optional[Tuple[List["Recipe"], Dict[int, float]]]:
+    """Fetch recipes sharing a word with the query (FTS5) and filter only those.
+
+    Returns the filtered recipes with their bm25 scores normalized to [0, 1],
+    or None when the FTS index is unavailable or fewer than ``limit`` recipes
+    survive the filters (the caller then scans the whole library).
+    """
+    hits = search_recipe_ids(session, query_text, limit=max(limit, RAG_CANDIDATE_POOL))
+    if not hits:
+        return None
+    filtered = _filter_ranked_hits(session, hits, prefs, constraints, required_lower)
+    if len(filtered) < limit:
+        return None
+    best = max(hits[0][1], 1e-9)
+    return filtered, {recipe_id: score / best for recipe_id, score in hits}
+
+
+def _sparse_search(session: Session, query_text: str, k: int) -> List[Tuple[int, float]]:
+    """Sparse ranking from FTS5, or from the in-process BM25 index without FTS5."""
+    hits = search_recipe_ids(session, query_text, limit=k)
+    if hits is not None:
+        return hits
+    index = load_keyword_index(session)
+    return index.search(QueryPreprocessor.tokenize(query_text), top_k=k)
+
+
+def _hybrid_prefiltered_recipes(
+    session: Session,
+    indexer: "RecipeIndexer",
+    query_text: str,
+    prefs: Prefs,
+    constraints: Dict[str, Any],
+    required_lower: List[str],
+    limit: int,
+    embed_timeout: Optional[float] = None,
+) -> Tuple["HybridResult", Optional[List["Recipe"]]]:
+    """Dense + sparse retrieval fused with RRF; filters only the fused candidates.
+
+    The filtered recipes are None when fewer than ``limit`` survive the
+    filters, so the caller can fall back to scanning the whole library.
+    """
+    retriever = HybridRetriever(
+        embed_query=lambda text: (_embed_queries([text]) or [None])[0],
+        dense_search=lambda vector, k: indexer.search(vector, top_k=k),
+        sparse_search=lambda text, k: _sparse_search(session, text, k),
+        pool_size=max(limit, RAG_CANDIDATE_POOL),
+        rrf_k=RAG_RRF_K,
+        dense_timeout=RAG_HYBRID_DENSE_TIMEOUT if embed_timeout is None else min(RAG_HYBRID_DENSE_TIMEOUT, embed_timeout),
+    )
+    result = retriever.retrieve(query_text)
+    if not result.fused:
+        return result, None
+    filtered = _filter_ranked_hits(session, result.fused, prefs, constraints, required_lower)
+    return result, (filtered if len(filtered) >= limit else None)
+
+
+def _keyword_candidates(
+    session: Session, recipes: List["Recipe"], query_text: str, limit: int
+) -> Tuple[List["Recipe"], Dict[int, float]]:
+    """Rank ``recipes`` with the BM25 keyword index.
+
+    Only recipes sharing a token with the query are scored; their BM25 scores
+    are normalized to [0, 1]. If fewer than ``limit`` recipes match, all
+    recipes are returned so nutrition fit can still fill the list. The index
+    is maintained when recipes are committed, so nothing is synced here.
+    """
+    index = load_keyword_index(session)
+    hits = index.search(
+        QueryPreprocessor.tokenize(query_text),
+        candidate_ids={recipe.id for recipe in recipes if recipe.id is not None},
+        top_k=max(limit, RAG_CANDIDATE_POOL),
+    )
+    if not hits:
+        return recipes, {}
+    best = hits[0][1] or 1.0
+    keyword_scores = {recipe_id: score / best for recipe_id, score in hits}
+    if len(keyword_scores) < limit:
+        return recipes, keyword_scores
+    return [recipe for recipe in recipes if recipe.id in keyword_scores], keyword_scores
+
+
 def _recipe_to_idea(recipe: "Recipe") -> RecipeIdea:
     macros = None
     if (
@@ -254,6 +520,7 @@ def _persist_recipe_ideas(
             json.dumps(constraints, ensure_ascii=False) if constraints else None
         )
 
+        created: List[Recipe] = []
         for idea in ideas:
             exists = session.exec(
                 select(Recipe).where(
@@ -285,6 +552,7 @@ def _persist_recipe_ideas(
             )
             session.add(recipe)
             session.flush()
+            created.append(recipe)
 
             for ingredient in idea.ingredients:
                 session.add(
@@ -299,6 +567,15 @@ def _persist_recipe_ideas(
     except Exception as exc:  # pragma: no cover - defensive
         session.rollback()
         print("[WARN] Persisting recipe ideas failed:", exc)
+        return
+
+    if created and RAG_MODULES_AVAILABLE:
+        # Keep the vector store / ANN index current so new recipes are searchable
+        # without waiting for a library scan (the keyword index updates on commit).
+        try:
+            _recipe_indexer(session).ensure_indexed(created)
+        except Exception as exc:  # pragma: no cover - defensive
+            print("[WARN] Indexing new recipes failed:", exc)
 
 
 def _build_query_text(req: ComposeRequest, prefs: Prefs, constraints: Dict[str, Any]) -> str:
@@ -325,6 +602,56 @@ def _recipes_matching_query(
     constraints: Dict[str, Any],
     limit: int,
     required_ingredients: Optional[List[str]] = None,
+    embed_timeout: Optional[float] = None,
+) -> Tuple[List[RecipeIdea], Dict[str, Any]]:
+    """Ranked library recipes for a request, served from the result cache when possible.
+
+    Results are cached per normalized request and library version; callers
+    get copies, so mutating the returned ideas never touches cached entries.
+    ``embed_timeout`` caps the wait for the query embedding (latency budget);
+    past it ranking continues without semantic scores.
+    """
+    if get_result_cache is None or not HAS_RECIPES:
+        return _rank_library_recipes(session, req, prefs, constraints, limit, required_ingredients, embed_timeout)
+
+    cache = get_result_cache()
+    version = library_version()
+    key = make_cache_key(
+        str(getattr(session.get_bind(), "url", "")),
+        normalize_query_text(req.message or ""),
+        req.servings,
+        req.preferences or [],
+        prefs.model_dump(exclude_none=True) if prefs else {},
+        constraints,
+        limit,
+        sorted(name.strip().lower() for name in (required_ingredients or []) if name),
+    )
+    cached = cache.get(key, version)
+    if cached is not None:
+        ideas, meta = cached
+        meta = {**meta, "cached": True}
+    else:
+        # Embeddings filled in while ranking belong to recipes whose write
+        # already advanced the version; they must not orphan this result.
+        with derived_writes():
+            ideas, meta = _rank_library_recipes(
+                session, req, prefs, constraints, limit, required_ingredients, embed_timeout
+            )
+        # Degraded retrievals (no query vector: embedding service slow or down)
+        # are not kept, so rankings recover as soon as the service does.
+        if meta.get("used_embeddings"):
+            cache.put(key, (ideas, meta), version)
+    return [idea.model_copy(deep=True) for idea in ideas], copy.deepcopy(meta)
+
+
+def _rank_library_recipes(
+    session: Session,
+    req: ComposeRequest,
+    prefs: Prefs,
+    constraints: Dict[str, Any],
+    limit: int,
+    required_ingredients: Optional[List[str]] = None,
+    embed_timeout: Optional[float] = None,
 ) -> Tuple[List[RecipeIdea], Dict[str, Any]]:
     meta = {
         "reason": None,
@@ -336,24 +663,68 @@ def _recipes_matching_query(
         meta["reason"] = "recipes_table_missing"
         return [], meta
 
-    stmt = (
-        select(Recipe)
-        .options(selectinload(Recipe.ingredients))
-        .order_by(Recipe.created_at.desc())
-    )
-    if RAG_MAX_RECIPES > 0:
-        stmt = stmt.limit(RAG_MAX_RECIPES)
-    recipes = session.exec(stmt).all()
-    meta["candidates_total"] = len(recipes)
-
     req_lower = [name.strip().lower() for name in (required_ingredients or []) if name]
-    filtered: List[Recipe] = []
-    for recipe in recipes:
-        if not _recipe_matches_preferences(recipe, prefs, constraints):
-            continue
-        if req_lower and not _recipe_has_ingredients(recipe, req_lower):
-            continue
-        filtered.append(recipe)
+    indexer = _recipe_indexer(session) if RAG_MODULES_AVAILABLE else None
+    query_text = ""
+    query_vec: Optional[List[float]] = None
+    filtered: Optional[List[Recipe]] = None
+    keyword_scores: Optional[Dict[int, float]] = None
+    fused_scores: Optional[Dict[int, float]] = None
+
+    if indexer is not None:
+        prefs_dict = prefs.model_dump(exclude_none=True) if prefs else {}
+        query_text = QueryPreprocessor.build_query_text(
+            message=req.message or "",
+            preferences=prefs_dict,
+            constraints=constraints,
+            servings=req.servings,
+        )
+        if RAG_RETRIEVAL_MODE == "hybrid":
+            # Dense and sparse retrieval run concurrently and are fused (RRF);
+            # a slow embedding service degrades this to sparse-only.
+            hybrid, prefiltered = _hybrid_prefiltered_recipes(
+                session, indexer, query_text, prefs, constraints, req_lower, limit, embed_timeout
+            )
+            query_vec = hybrid.query_vector
+            meta["retrieval"] = "hybrid"
+            meta["dense_status"] = hybrid.dense_status
+            if prefiltered is not None:
+                filtered = prefiltered
+                fused_scores = hybrid.relevance()
+                meta["used_hybrid"] = True
+                meta["candidates_total"] = len(hybrid.fused)
+        elif embed_timeout is not None:
+            vector, meta["dense_status"] = embed_within(
+                lambda text: (_embed_queries([text]) or [None])[0], query_text, embed_timeout
+            )
+            query_vec = [float(x) for x in vector] if vector is not None else None
+        else:
+            query_vectors = _embed_queries([query_text])
+            query_vec = query_vectors[0] if query_vectors else None
+
+        if filtered is None and query_vec is not None and indexer.ann_active():
+            # Large library: ask the ANN index for the nearest recipes first and
+            # apply preference/nutrition filters to that candidate set only.
+            filtered = _ann_prefiltered_recipes(
+                session, indexer, query_vec, prefs, constraints, req_lower, limit
+            )
+            if filtered is not None:
+                meta["used_ann"] = True
+                meta["candidates_total"] = max(limit, RAG_CANDIDATE_POOL)
+        elif filtered is None and query_vec is None:
+            # No query embedding: keyword retrieval only needs recipes sharing a
+            # word with the query, which the FTS5 index finds without a scan.
+            prefiltered = _fts_prefiltered_recipes(session, query_text, prefs, constraints, req_lower, limit)
+            if prefiltered is not None:
+                filtered, keyword_scores = prefiltered
+                meta["used_fts"] = True
+                meta["candidates_total"] = len(keyword_scores)
+
+    if filtered is None:
+        # Preferences, max_kcal and required ingredients are WHERE/EXISTS
+        # clauses, so only matching recipes (and their ingredients) are loaded.
+        filtered = _load_filtered_recipes(session, prefs, constraints, req_lower, max_rows=RAG_MAX_RECIPES)
+        meta["candidates_total"] = session.exec(select(func.count()).select_from(Recipe)).one()
     meta["candidates_filtered"] = len(filtered)
 
     if req_lower and not filtered:
@@ -365,46 +736,64 @@ def _recipes_matching_query(
         meta["reason"] = "no_recipe_matching_preferences"
         return [], meta
 
-    from app.rag.preprocess import QueryPreprocessor
-
-    negative_ingredients = QueryPreprocessor.extract_negative_terms(req.message or "")
+    negative_ingredients = (
+        QueryPreprocessor.extract_negative_terms(req.message or "") if QueryPreprocessor is not None else []
+    )
     if negative_ingredients:
         meta["negative_ingredients"] = negative_ingredients
 
     scored: List[Tuple[float, Recipe]] = []
 
-    if RAG_MODULES_AVAILABLE:
-        prefs_dict = prefs.model_dump(exclude_none=True) if prefs else {}
-        query_text = QueryPreprocessor.build_query_text(
-            message=req.message or "",
-            preferences=prefs_dict,
-            constraints=constraints,
-            servings=req.servings,
-        )
-
-        document_texts = [QueryPreprocessor.build_document(recipe) for recipe in filtered]
-        embedding_client = _embed_texts
-        indexer = RecipeIndexer(session, embedding_client=embedding_client)  # type: ignore[call-arg]
-        recipe_embeddings = indexer.batch_index(filtered, document_texts, force_refresh=False)
-        query_vectors = embedding_client([query_text]) if embedding_client else None
-        query_vec = query_vectors[0] if query_vectors and len(query_vectors) > 0 else None
+    if indexer is not None:
         post_processor = PostProcessor(
             semantic_weight=1.0,
             nutrition_weight=0.5,
             ingredient_weight=0.3,
         )
 
-        use_keyword_fallback = query_vec is None or not recipe_embeddings
-        meta["used_embeddings"] = not use_keyword_fallback
+        candidates = filtered
+        semantic_scores: Optional[Dict[int, float]] = None
+        if fused_scores is not None:
+            # Already ranked by RRF: the fused score is the relevance term that
+            # nutrition fit and ingredient overlap are added to. Recipes without
+            # a vector are not embedded here, so a slow service cannot stall us.
+            use_keyword_fallback = False
+            meta["used_embeddings"] = query_vec is not None
+            semantic_scores = fused_scores
+        else:
+            indexed_ids = indexer.ensure_indexed(filtered)
+            use_keyword_fallback = query_vec is None or not indexed_ids
+            meta["used_embeddings"] = not use_keyword_fallback
+
+            if not use_keyword_fallback:
+                # One matrix-vector product over the in-memory store; only the best
+                # semantic matches (plus recipes without a vector) get re-ranked.
+                hits = indexer.search(
+                    query_vec,
+                    top_k=max(limit, RAG_CANDIDATE_POOL),
+                    recipe_ids=[recipe.id for recipe in filtered if recipe.id in indexed_ids],
+                )
+                semantic_scores = dict(hits)
+                candidates = [
+                    recipe
+                    for recipe in filtered
+                    if recipe.id in semantic_scores or recipe.id not in indexed_ids
+                ]
+            elif keyword_scores is None:
+                # BM25 over the inverted index touches only recipes sharing a query token.
+                candidates, keyword_scores = _keyword_candidates(session, filtered, query_text, limit)
+                meta["used_bm25"] = True
 
         scored_results = post_processor.score_batch(
-            recipes=filtered,
+            recipes=candidates,
             query_vector=query_vec,
-            recipe_vectors=recipe_embeddings if not use_keyword_fallback else None,
+            recipe_vectors=None,
             query_text=query_text,
             constraints=constraints,
             use_keyword_fallback=use_keyword_fallback,
             negative_ingredients=negative_ingredients,
+            semantic_scores=semantic_scores,
+            keyword_scores=keyword_scores,
         )
         scored = post_processor.rerank(scored_results, limit=limit)
     else:
@@ -412,18 +801,17 @@ def _recipes_matching_query(
         query_text = _build_query_text(req, prefs, constraints)
         vectors = _embed_texts([query_text] + docs) if docs else None
 
-        if vectors and len(vectors) == len(docs) + 1:
+        if vectors is not None and len(vectors) == len(docs) + 1:
             meta["used_embeddings"] = True
-            query_vec = vectors[0]
             for recipe, doc_vec in zip(filtered, vectors[1:]):
                 if negative_ingredients and _recipe_contains_terms(recipe, negative_ingredients):
                     continue
-                score = _cosine(query_vec, doc_vec)
+                score = _cosine(vectors[0], doc_vec)
                 score += _nutrition_fit_score(recipe, constraints)
                 score += _ingredient_overlap_score(recipe, req.message or "")
                 scored.append((score, recipe))
         else:
-            if vectors and len(vectors) != len(docs) + 1:
+            if vectors is not None and len(vectors) != len(docs) + 1:
                 meta["reason"] = "embedding_size_mismatch"
             query_tokens = _tokenize(query_text)
             for recipe, doc_text in zip(filtered, docs):
@@ -507,8 +895,8 @@ def _retrieve_candidates(session: Session, prefs: Prefs, top_k: int = RAG_TOP_K)
             )
 
     vecs = _embed_texts([candidate["text"] for candidate in candidates]) if candidates else None
-    if vecs:
-        q_vecs = _embed_texts(["high protein simple snack balanced macros"])
+    if vecs is not None and len(vecs):
+        q_vecs = _embed_queries(["high protein simple snack balanced macros"])
         if q_vecs:
             qv = q_vecs[0]
             scored = [(candidate, _cosine(qv, vector)) for candidate, vector in zip(candidates, vecs)]
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from fastapi import APIRouter, HTTPException
+
+from ..helpers import _embedding_stats
+from ..rag import RAG_MODULES_AVAILABLE, get_feature_store, get_result_cache
+
+router = APIRouter()
+
+
+@router.get("/cache")
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters of the retrieval caches (results, recipe features, embeddings)."""
+    if not RAG_MODULES_AVAILABLE:
+        raise HTTPException(status_code=503, detail="RAG modules not available")
+    return {
+        "results": get_result_cache().stats(),
+        "features": get_feature_store().stats(),
+        "embeddings": _embedding_stats(),
+    }
@@ -1,29 +1,93 @@
 from __future__ import annotations
 
-import os
+import asyncio
+import json
+import threading
+from typing import Any, AsyncIterator, Dict, Literal
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
-from ..config import LLAMA_CPP_MODEL_PATH
-from ..llm import LLAMA_CPP_AVAILABLE, _llm_generate, build_chat_prompt
+from ..llm import _allm_generate, _llm_stream, _used_backend, build_chat_prompt
 from ..schemas import ChatRequest, ChatResponse
 
 router = APIRouter()
 
+_END = object()
+
 
 @router.post("/chat", response_model=ChatResponse)
-def advisor_chat(payload: ChatRequest):
+async def advisor_chat(payload: ChatRequest):
     prompt = build_chat_prompt(payload.message, payload.context)
     try:
-        text = _llm_generate(prompt, as_json=payload.json_mode)
+        text = await _allm_generate(prompt, as_json=payload.json_mode)
     except HTTPException:
         raise
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"LLM-Fehler: {exc!s}")
 
-    backend = "ollama_http"
-    if LLAMA_CPP_AVAILABLE and LLAMA_CPP_MODEL_PATH and os.path.exists(LLAMA_CPP_MODEL_PATH):
-        backend = "llama_cpp"
+    return ChatResponse(output=text, used_backend=_used_backend())
+
+
+def _frame(fmt: str, event: str, data: Dict[str, Any]) -> str:
+    if fmt == "ndjson":
+        return json.dumps({"type": event, **data}, ensure_ascii=False) + "\n"
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _relay_tokens(prompt: str, json_mode: bool, fmt: str) -> AsyncIterator[str]:
+    """Relay LLM fragments from a worker thread to the client as they arrive.
+
+    When the client disconnects the response iterator is closed; the
+    ``finally`` block then sets ``cancel`` so the worker stops pulling tokens
+    and the backend (llama.cpp iterator / Ollama connection) is closed.
+    """
+    loop = asyncio.get_running_loop()
+    queue: "asyncio.Queue[Any]" = asyncio.Queue()
+    cancel = threading.Event()
 
-    return ChatResponse(output=text, used_backend=backend)
+    def _pump() -> None:
+        try:
+            for token in _llm_stream(prompt, as_json=json_mode, cancel=cancel):
+                if cancel.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, token)
+            loop.call_soon_threadsafe(queue.put_nowait, _END)
+        except Exception as exc:
+            loop.call_soon_threadsafe(queue.put_nowait, exc)
 
+    threading.Thread(target=_pump, name="advisor-chat-stream", daemon=True).start()
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                yield _frame(fmt, "done", {"used_backend": _used_backend()})
+                return
+            if isinstance(item, HTTPException):
+                yield _frame(fmt, "error", {"status": item.status_code, "detail": item.detail})
+                return
+            if isinstance(item, Exception):
+                yield _frame(fmt, "error", {"status": 500, "detail": f"LLM-Fehler: {item!s}"})
+                return
+            yield _frame(fmt, "token", {"text": item})
+    finally:
+        cancel.set()
+
+
+@router.post("/chat/stream")
+async def advisor_chat_stream(
+    payload: ChatRequest,
+    format: Literal["sse", "ndjson"] = Query("sse", description="sse (text/event-stream) oder ndjson"),
+):
+    """Stream the answer token by token (SSE or NDJSON).
+
+    Every frame is a ``token`` event with ``{"text": ...}``, followed by
+    ``done`` (``{"used_backend": ...}``) or ``error`` (``{"status", "detail"}``).
+    """
+    prompt = build_chat_prompt(payload.message, payload.context)
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/event-stream"
+    return StreamingResponse(
+        _relay_tokens(prompt, payload.json_mode, format),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+import asyncio
 import json
-import os
-from typing import Any, Dict, List, Optional
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from fastapi.responses import JSONResponse
 from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core.database import get_session
 from app.routers.summary import (
@@ -15,7 +18,17 @@ from app.routers.summary import (
     _target_kcal_for_day,
 )
 
-from ..config import LLAMA_CPP_MODEL_PATH, OLLAMA_HOST, OLLAMA_MODEL, OLLAMA_PORT, OLLAMA_TIMEOUT, SETTINGS
+from app.utils import llm as llm_utils
+from app.utils.llm_service import LLMDeadlineExceeded, Priority, get_llm_service
+
+from ..config import (
+    COMPOSE_BUDGET_MS,
+    COMPOSE_LLM_EXTRA_REQUESTS,
+    COMPOSE_LLM_PARALLEL,
+    OLLAMA_MODEL,
+    OLLAMA_TIMEOUT,
+    SETTINGS,
+)
 from ..fallbacks import _compose_fallback_ideas
 from ..helpers import (
     _infer_required_ingredients,
@@ -24,9 +37,8 @@ from ..helpers import (
     _tighten_with_foods_db,
 )
 from ..llm import (
-    LLAMA_CPP_AVAILABLE,
-    _ollama_alive,
-    _ollama_generate,
+    _aollama_alive,
+    _aollama_generate,
     _parse_llm_json,
 )
 from ..rag import (
@@ -83,96 +95,179 @@ def _fill_pref_tags(idea: RecipeIdea, prefs: Prefs) -> RecipeIdea:
     return idea
 
 
-@router.post("/compose", response_model=ComposeResponse)
-def compose(req: ComposeRequest, session: Session = Depends(get_session)):
-    constraints = _constraints_from_context(session, req)
-    prefs = _prefs_from_compose(req.preferences)
+ComposeResult = Union[ComposeResponse, JSONResponse]
+
+# Shares of the latency budget: the query embedding may use a quarter, the
+# local fallback keeps a tenth in reserve, the LLM gets the rest (if that is
+# at least _MIN_LLM_SECONDS).
+_RAG_SHARE = 0.25
+_FALLBACK_SHARE = 0.1
+_MIN_LLM_SECONDS = 1.0
+
+
+@dataclass
+class _LatencyBudget:
+    """Per-request latency budget in seconds (``total`` None = unlimited)."""
+
+    total: Optional[float] = None
+    started: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def from_ms(cls, budget_ms: Optional[int]) -> "_LatencyBudget":
+        return cls(budget_ms / 1000.0 if budget_ms else None)
+
+    def _left(self, total: float) -> float:
+        return max(0.0, total - (time.monotonic() - self.started))
+
+    def remaining(self) -> Optional[float]:
+        if self.total is None:
+            return None
+        return self._left(self.total)
+
+    def share(self, fraction: float) -> Optional[float]:
+        """``fraction`` of the total budget, capped at what is left."""
+        if self.total is None:
+            return None
+        return min(self.total * fraction, self._left(self.total))
+
+    def llm_timeout(self) -> float:
+        """Time the LLM stage may use, keeping the fallback reserve."""
+        if self.total is None:
+            return float(OLLAMA_TIMEOUT)
+        return max(0.0, min(float(OLLAMA_TIMEOUT), self._left(self.total) - self.total * _FALLBACK_SHARE))
 
-    notes: List[str] = []
-    ideas: List[RecipeIdea] = []
-    required_ingredients = _infer_required_ingredients(session, req.message)
-    if required_ingredients:
-        notes.append("Filter: Zutaten " + ", ".join(required_ingredients))
+    def exhausted(self) -> bool:
+        return self.total is not None and self._left(self.total) <= 0
 
-    def _no_ideas_response(error: str, detail: str, status_code: int = 503) -> JSONResponse:
+
+@dataclass
+class _ComposeState:
+    """Per-request compose state shared by the (threadpool) database phases."""
+
+    session: Session
+    req: ComposeRequest
+    prefs: Prefs
+    constraints: Dict[str, Any]
+    required_ingredients: List[str]
+    notes: List[str] = field(default_factory=list)
+    ideas: List[RecipeIdea] = field(default_factory=list)
+    required_slots: int = 0
+    llm_slots: int = 0
+    budget: _LatencyBudget = field(default_factory=_LatencyBudget)
+
+    def skip_stage(self, stage: str, reason: str) -> None:
+        self.notes.append(f"Zeitbudget: {stage} uebersprungen ({reason}).")
+
+    def fill_from_fallback(self, slots: int) -> None:
+        if self.required_ingredients or slots <= 0:
+            return
+        if self.budget.exhausted():
+            self.skip_stage("Fallback", "Budget aufgebraucht")
+            return
+        fallback = _compose_fallback_ideas(self.session, self.req, self.constraints, self.prefs)[:slots]
+        if fallback:
+            self.notes.append("Fallback-Vorschlaege aus lokalen Lebensmitteln.")
+            _persist_recipe_ideas(self.session, self.req, self.prefs, self.constraints, fallback, source="fallback")
+            for idea in fallback:
+                idea.source = "fallback"
+                _fill_pref_tags(idea, self.prefs)
+            self.ideas = _merge_ideas(self.ideas, fallback)
+            self.required_slots = max(0, 3 - len(self.ideas))
+
+    def no_ideas_response(self, error: str, detail: str, status_code: int = 503) -> JSONResponse:
         payload: Dict[str, Any] = {"error": error, "detail": detail}
-        if required_ingredients:
-            payload["required_ingredients"] = required_ingredients
-        code = 404 if required_ingredients else status_code
+        if self.required_ingredients:
+            payload["required_ingredients"] = self.required_ingredients
+        code = 404 if self.required_ingredients else status_code
         return JSONResponse(status_code=code, content=payload)
 
+    def response(self) -> ComposeResponse:
+        return ComposeResponse(constraints=self.constraints, ideas=self.ideas[:3], notes=self.notes)
+
+
+def _start_compose(session: Session, req: ComposeRequest, budget: Optional[_LatencyBudget] = None) -> _ComposeState:
+    """Derive constraints and preferences and fill ideas from the recipe library."""
+    state = _ComposeState(
+        session=session,
+        req=req,
+        prefs=_prefs_from_compose(req.preferences),
+        constraints=_constraints_from_context(session, req),
+        required_ingredients=_infer_required_ingredients(session, req.message),
+        budget=budget or _LatencyBudget(),
+    )
+    if state.required_ingredients:
+        state.notes.append("Filter: Zutaten " + ", ".join(state.required_ingredients))
+
     library_ideas, retrieval_meta = _recipes_matching_query(
         session,
         req,
-        prefs,
-        constraints,
+        state.prefs,
+        state.constraints,
         limit=3,
-        required_ingredients=required_ingredients,
+        required_ingredients=state.required_ingredients,
+        embed_timeout=state.budget.share(_RAG_SHARE),
     )
+    if retrieval_meta.get("dense_status") == "timeout" and state.budget.total is not None:
+        state.skip_stage("semantische Suche", "Embedding zu langsam, Keyword-Ranking")
     if library_ideas:
-        notes.append(
+        state.notes.append(
             f"RAG fand {len(library_ideas)} passende Rezepte "
             f"(Kandidaten: {retrieval_meta.get('candidates_filtered', 0)})."
         )
-        ideas = _merge_ideas(ideas, library_ideas)
+        state.ideas = _merge_ideas(state.ideas, library_ideas)
     else:
         reason = retrieval_meta.get("reason") or "keine Übereinstimmungen"
-        notes.append(f"RAG ohne Treffer: {reason}.")
+        state.notes.append(f"RAG ohne Treffer: {reason}.")
 
-    required_slots = max(0, 3 - len(ideas))
-    if required_slots > 0:
+    state.required_slots = max(0, 3 - len(state.ideas))
+    if state.required_slots > 0:
         reason = retrieval_meta.get("reason") or "zu wenige Treffer"
-        notes.append(f"{required_slots} weitere Idee(n) benötigt: {reason}.")
-    llm_slots = 0 if required_ingredients else min(required_slots, 2)
+        state.notes.append(f"{state.required_slots} weitere Idee(n) benötigt: {reason}.")
+    state.llm_slots = 0 if state.required_ingredients else min(state.required_slots, 2)
+    return state
 
-    def _fill_from_fallback(slots: int) -> None:
-        nonlocal ideas, required_slots
-        if required_ingredients or slots <= 0:
-            return
-        fallback = _compose_fallback_ideas(session, req, constraints, prefs)[:slots]
-        if fallback:
-            notes.append("Fallback-Vorschlaege aus lokalen Lebensmitteln.")
-            _persist_recipe_ideas(session, req, prefs, constraints, fallback, source="fallback")
-            for idea in fallback:
-                idea.source = "fallback"
-                _fill_pref_tags(idea, prefs)
-            ideas = _merge_ideas(ideas, fallback)
-            required_slots = max(0, 3 - len(ideas))
 
-    if not SETTINGS.advisor_llm_enabled or llm_slots == 0:
-        if required_slots > 0:
-            _fill_from_fallback(required_slots)
-        if not ideas:
-            return _no_ideas_response("no_ideas", "Keine passenden Rezepte gefunden.")
-        return ComposeResponse(constraints=constraints, ideas=ideas[:3], notes=notes)
+def _finish_without_llm(state: _ComposeState) -> ComposeResult:
+    if state.required_slots > 0:
+        state.fill_from_fallback(state.required_slots)
+    if not state.ideas:
+        return state.no_ideas_response("no_ideas", "Keine passenden Rezepte gefunden.")
+    return state.response()
 
-    has_local_llm = bool(
-        LLAMA_CPP_AVAILABLE and LLAMA_CPP_MODEL_PATH and os.path.exists(LLAMA_CPP_MODEL_PATH)
-    )
-    if not has_local_llm and not _ollama_alive(timeout=2):
-        notes.append("LLM nicht erreichbar - lokale Fallbacks aktiv.")
-        if required_slots > 0:
-            _fill_from_fallback(required_slots)
-        if not ideas:
-            payload: Dict[str, Any] = {
-                "error": "llm_unavailable",
-                "detail": "Kein lokales LLM erreichbar und keine lokalen Rezept-Heuristiken verfuegbar. Bitte Ollama starten oder Food-Datenbank befuellen.",
-            }
-            if required_ingredients:
-                payload["required_ingredients"] = required_ingredients
-            code = 404 if required_ingredients else 503
-            return JSONResponse(status_code=code, content=payload)
-        return ComposeResponse(constraints=constraints, ideas=ideas[:3], notes=notes)
 
+def _finish_llm_unreachable(state: _ComposeState) -> ComposeResult:
+    state.notes.append("LLM nicht erreichbar - lokale Fallbacks aktiv.")
+    if state.required_slots > 0:
+        state.fill_from_fallback(state.required_slots)
+    if not state.ideas:
+        payload: Dict[str, Any] = {
+            "error": "llm_unavailable",
+            "detail": "Kein lokales LLM erreichbar und keine lokalen Rezept-Heuristiken verfuegbar. Bitte Ollama starten oder Food-Datenbank befuellen.",
+        }
+        if state.required_ingredients:
+            payload["required_ingredients"] = state.required_ingredients
+        code = 404 if state.required_ingredients else 503
+        return JSONResponse(status_code=code, content=payload)
+    return state.response()
+
+
+def _finish_after_llm_error(state: _ComposeState, exc: Exception) -> ComposeResult:
+    state.notes.append(f"LLM-Fehler: {exc}")
+    if state.required_slots > 0:
+        state.fill_from_fallback(state.required_slots)
+    return state.response()
+
+
+def _compose_prompts(state: _ComposeState) -> Tuple[str, str]:
     system_prompt = (
         "Du bist ein praeziser deutschsprachiger Ernaehrungscoach. "
-        f"Liefere exakt {llm_slots} praktische Rezeptidee(n) mit Zutaten (in g), klaren Schritten und geschaetzten Makros pro Portion. "
+        f"Liefere exakt {state.llm_slots} praktische Rezeptidee(n) mit Zutaten (in g), klaren Schritten und geschaetzten Makros pro Portion. "
         "Beachte Praeferenzen (vegetarian/vegan/no_pork/lactose_free/budget/kitchen=italian,german,...). "
         "Antworte ausschliesslich als JSON in dem angegebenen Format."
     )
-    prefs_payload = prefs.model_dump(exclude_none=True)
+    prefs_payload = state.prefs.model_dump(exclude_none=True)
     preferences_str = json.dumps(prefs_payload, ensure_ascii=False) if prefs_payload else "keine"
-    constraints_str = json.dumps(constraints, ensure_ascii=False)
+    constraints_str = json.dumps(state.constraints, ensure_ascii=False)
     user_template = """
 Nutzeranfrage: {message}
 Servings: {servings}
@@ -196,36 +291,163 @@ JSON-Format:
 Regeln: metrisch, 50-400 g/Zutat, pro Portion <= max_kcal falls gesetzt. Keine Erklaertexte ausserhalb des JSON.
 """
     user_prompt = user_template.format(
-        message=req.message,
-        servings=req.servings,
+        message=state.req.message,
+        servings=state.req.servings,
         preferences=preferences_str,
         constraints=constraints_str,
     )
+    return system_prompt, user_prompt
+
+
+def _single_idea_prompts(state: _ComposeState, variant: int, variants: int) -> Tuple[str, str]:
+    """Prompts for one idea; the variant number keeps parallel answers (and cache keys) distinct."""
+    system_prompt = (
+        "Du bist ein praeziser deutschsprachiger Ernaehrungscoach. "
+        "Liefere genau eine praktische Rezeptidee mit Zutaten (in g), klaren Schritten und geschaetzten Makros pro Portion. "
+        "Beachte Praeferenzen (vegetarian/vegan/no_pork/lactose_free/budget/kitchen=italian,german,...). "
+        "Antworte ausschliesslich als JSON in dem angegebenen Format."
+    )
+    prefs_payload = state.prefs.model_dump(exclude_none=True)
+    user_template = """
+Nutzeranfrage: {message}
+Servings: {servings}
+Praeferenzen: {preferences}
+Constraints: {constraints}
+Variante {variant} von {variants}: waehle eine andere Hauptzutat bzw. Zubereitung als die uebrigen Varianten.
+JSON-Format:
+{{
+  "idea": {{
+    "title": "...",
+    "time_minutes": 20,
+    "difficulty": "easy",
+    "ingredients": [{{"name":"...", "grams":120}}, ...],
+    "instructions": ["Schritt 1 ...","Schritt 2 ..."],
+    "macros": {{"kcal": ..., "protein_g": ..., "carbs_g": ..., "fat_g": ...}},
+    "tags": ["proteinreich","unter_800_kcal"]
+  }}
+}}
+Regeln: metrisch, 50-400 g/Zutat, pro Portion <= max_kcal falls gesetzt. Keine Erklaertexte ausserhalb des JSON.
+"""
+    user_prompt = user_template.format(
+        message=state.req.message,
+        servings=state.req.servings,
+        preferences=json.dumps(prefs_payload, ensure_ascii=False) if prefs_payload else "keine",
+        constraints=json.dumps(state.constraints, ensure_ascii=False),
+        variant=variant,
+        variants=variants,
+    )
+    return system_prompt, user_prompt
+
+
+async def _generate_one_idea(state: _ComposeState, variant: int, variants: int, timeout: float) -> Dict[str, Any]:
+    """Generate and validate a single idea; raises if the answer is not a valid ``RecipeIdea``."""
+    system_prompt, user_prompt = _single_idea_prompts(state, variant, variants)
+    idea = await llm_utils.allm_generate_json(
+        system_prompt,
+        user_prompt,
+        model=OLLAMA_MODEL,
+        json_root="idea",
+        timeout=timeout,
+        priority=Priority.BATCH,
+        cache=True,
+    )
+    if isinstance(idea, list):
+        idea = idea[0] if idea else None
+    if not isinstance(idea, dict):
+        raise ValueError("LLM lieferte kein Ideen-Objekt.")
+    RecipeIdea(**idea)
+    return idea
+
 
+async def _generate_ideas_in_parallel(state: _ComposeState, timeout: float = OLLAMA_TIMEOUT) -> List[Dict[str, Any]]:
+    """Request each missing idea separately and return once ``llm_slots`` valid ideas arrived.
+
+    ``COMPOSE_LLM_EXTRA_REQUESTS`` spare requests absorb malformed answers; at
+    most as many requests as the backend runs concurrently are in flight.
+    Outstanding requests are cancelled (dropped from the LLM queue or aborted)
+    as soon as enough ideas are valid, or after ``timeout`` seconds with
+    whatever ideas are valid by then.
+    """
+    needed = state.llm_slots
+    variants = needed + max(0, COMPOSE_LLM_EXTRA_REQUESTS)
+    limit = asyncio.Semaphore(max(1, min(variants, get_llm_service().capacity())))
+    deadline = time.monotonic() + timeout
+
+    async def _bounded(variant: int) -> Dict[str, Any]:
+        async with limit:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LLMDeadlineExceeded("Zeitbudget vor dem Start aufgebraucht")
+            return await _generate_one_idea(state, variant, variants, remaining)
+
+    tasks = [asyncio.ensure_future(_bounded(variant)) for variant in range(1, variants + 1)]
+    ideas: List[Dict[str, Any]] = []
+    errors: List[Exception] = []
     try:
-        from app.utils.llm import llm_generate_json
+        for next_done in asyncio.as_completed(tasks, timeout=timeout):
+            try:
+                ideas.append(await next_done)
+            except LLMDeadlineExceeded as exc:
+                errors.append(exc)
+            except asyncio.TimeoutError:
+                raise  # as_completed: overall timeout reached
+            except Exception as exc:
+                errors.append(exc)
+            if len(ideas) >= needed:
+                break
+    except asyncio.TimeoutError:
+        if not ideas:
+            raise LLMDeadlineExceeded(f"keine Idee innerhalb von {timeout:.1f}s")
+        state.notes.append(f"Zeitbudget: LLM-Stufe nach {len(ideas)} von {needed} Idee(n) beendet.")
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
-        raw_ideas = llm_generate_json(
+    if not ideas and errors:
+        raise errors[-1]
+    state.notes.append(f"LLM parallel: {len(ideas)} gueltige Idee(n) aus {len(ideas) + len(errors)} Antwort(en).")
+    return ideas
+
+
+async def _generate_raw_ideas(system_prompt: str, user_prompt: str, timeout: float = OLLAMA_TIMEOUT) -> List[Dict[str, Any]]:
+    """Ask the LLM service (chat, then plain generate) for recipe ideas at batch priority.
+
+    Both attempts share one deadline ``timeout`` seconds from now.
+    """
+    deadline = time.monotonic() + timeout
+    try:
+        return await llm_utils.allm_generate_json(
             system_prompt,
             user_prompt,
             model=OLLAMA_MODEL,
-            endpoint=f"http://{OLLAMA_HOST}:{OLLAMA_PORT}",
             json_root="ideas",
+            timeout=timeout,
+            priority=Priority.BATCH,
+            cache=True,
         )
+    except LLMDeadlineExceeded:
+        raise
     except Exception:
-        raw = _ollama_generate(f"{system_prompt}\n\n{user_prompt}", as_json=True, timeout=OLLAMA_TIMEOUT)
-        data = _parse_llm_json(raw)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMDeadlineExceeded("Zeitbudget nach dem ersten Versuch aufgebraucht")
+        raw = await _aollama_generate(
+            f"{system_prompt}\n\n{user_prompt}",
+            as_json=True,
+            timeout=remaining,
+            priority=Priority.BATCH,
+            cache=True,
+        )
+        data = raw if isinstance(raw, dict) else _parse_llm_json(raw)
         raw_ideas = data.get("ideas", [])
         if not isinstance(raw_ideas, list):
             raise ValueError("LLM lieferte kein ideas-Array.")
-    except HTTPException:
-        raise
-    except Exception as exc:
-        notes.append(f"LLM-Fehler: {exc}")
-        if required_slots > 0:
-            _fill_from_fallback(required_slots)
-        return ComposeResponse(constraints=constraints, ideas=ideas[:3], notes=notes)
+        return raw_ideas
 
+
+def _finish_with_llm_ideas(state: _ComposeState, raw_ideas: List[Dict[str, Any]]) -> ComposeResult:
+    session, prefs, constraints = state.session, state.prefs, state.constraints
     llm_ideas: List[RecipeIdea] = []
     try:
         from app.utils.validators import clamp, safe_float
@@ -238,7 +460,7 @@ Regeln: metrisch, 50-400 g/Zutat, pro Portion <= max_kcal falls gesetzt. Keine E
             except Exception:
                 return 0.0
 
-    raw_ideas = list(raw_ideas or [])[:llm_slots]
+    raw_ideas = list(raw_ideas or [])[: state.llm_slots]
     for idea_dict in raw_ideas:
         try:
             idea = RecipeIdea(**idea_dict)
@@ -259,25 +481,71 @@ Regeln: metrisch, 50-400 g/Zutat, pro Portion <= max_kcal falls gesetzt. Keine E
         llm_ideas.append(idea)
 
     if llm_ideas:
-        notes.append("Ergaenzung durch lokales LLM.")
-        _persist_recipe_ideas(session, req, prefs, constraints, llm_ideas, source="llm")
-        ideas = _merge_ideas(ideas, llm_ideas)
-        required_slots = max(0, 3 - len(ideas))
+        state.notes.append("Ergaenzung durch lokales LLM.")
+        _persist_recipe_ideas(session, state.req, prefs, constraints, llm_ideas, source="llm")
+        state.ideas = _merge_ideas(state.ideas, llm_ideas)
+        state.required_slots = max(0, 3 - len(state.ideas))
 
-    if len(ideas) < 3:
-        _fill_from_fallback(required_slots)
+    if len(state.ideas) < 3:
+        state.fill_from_fallback(state.required_slots)
 
-    if not ideas:
-        return _no_ideas_response("no_ideas", "Keine verwertbaren Ideen generiert.", status_code=502)
+    if not state.ideas:
+        return state.no_ideas_response("no_ideas", "Keine verwertbaren Ideen generiert.", status_code=502)
 
     if constraints.get("max_kcal"):
         over_limit = [
-            idea.title for idea in ideas if idea.macros and idea.macros.kcal > constraints["max_kcal"]
+            idea.title for idea in state.ideas if idea.macros and idea.macros.kcal > constraints["max_kcal"]
         ]
         if over_limit:
-            notes.append(f"Ideen > max_kcal ({constraints['max_kcal']}): {', '.join(over_limit)}")
+            state.notes.append(f"Ideen > max_kcal ({constraints['max_kcal']}): {', '.join(over_limit)}")
+
+    state.ideas = [
+        _fill_pref_tags(_respect_max_kcal(session, idea, constraints.get("max_kcal")), prefs) for idea in state.ideas
+    ]
+    return state.response()
 
-    ideas = [_fill_pref_tags(_respect_max_kcal(session, idea, constraints.get("max_kcal")), prefs) for idea in ideas]
 
-    return ComposeResponse(constraints=constraints, ideas=ideas[:3], notes=notes)
+def _finish_after_llm_timeout(state: _ComposeState) -> ComposeResult:
+    state.skip_stage("LLM", "keine Antwort innerhalb des Budgets")
+    return _finish_without_llm(state)
+
+
+@router.post("/compose", response_model=ComposeResponse)
+async def compose(
+    req: ComposeRequest,
+    session: Session = Depends(get_session),
+    budget_ms: Optional[int] = Query(
+        None, ge=1, description="Latenzbudget in ms; Alternative: Header X-Latency-Budget-Ms"
+    ),
+    budget_header: Optional[int] = Header(None, alias="X-Latency-Budget-Ms", ge=1),
+):
+    # Database phases run in the threadpool; LLM calls are queued on the LLM
+    # service at batch priority and awaited, so they do not hold a worker thread.
+    # With a latency budget every stage gets a slice and skipped stages are
+    # reported in the notes, so the endpoint answers before a gateway timeout.
+    budget = _LatencyBudget.from_ms(budget_ms or budget_header or COMPOSE_BUDGET_MS)
+    state = await run_in_threadpool(_start_compose, session, req, budget)
+
+    if not SETTINGS.advisor_llm_enabled or state.llm_slots == 0:
+        return await run_in_threadpool(_finish_without_llm, state)
+
+    if budget.llm_timeout() < _MIN_LLM_SECONDS:
+        state.skip_stage("LLM", "Budget zu knapp")
+        return await run_in_threadpool(_finish_without_llm, state)
+
+    if not await _aollama_alive(timeout=min(2.0, budget.llm_timeout())):
+        return await run_in_threadpool(_finish_llm_unreachable, state)
+
+    try:
+        if COMPOSE_LLM_PARALLEL:
+            raw_ideas = await _generate_ideas_in_parallel(state, budget.llm_timeout())
+        else:
+            raw_ideas = await _generate_raw_ideas(*_compose_prompts(state), timeout=budget.llm_timeout())
+    except HTTPException:
+        raise
+    except LLMDeadlineExceeded:
+        return await run_in_threadpool(_finish_after_llm_timeout, state)
+    except Exception as exc:
+        return await run_in_threadpool(_finish_after_llm_error, state, exc)
 
+    return await run_in_threadpool(_finish_with_llm_ideas, state, raw_ideas)
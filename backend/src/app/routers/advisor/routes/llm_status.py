@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.utils.llm_service import get_llm_service
+
+router = APIRouter()
+
+
+@router.get("/llm/metrics")
+def llm_metrics() -> Dict[str, Any]:
+    """Scheduler metrics per LLM backend (queue depth by priority, workers, expired calls)."""
+    return get_llm_service().stats()
+
+
+@router.get("/llm/health")
+def llm_health():
+    """Cached backend health (liveness, installed models, probe and request latency).
+
+    Served from the background monitor's state without probing; answers 503
+    when every backend is known to be down.
+    """
+    service = get_llm_service()
+    service.start()
+    report = service.health_report()
+    return JSONResponse(report, status_code=503 if report["status"] == "down" else 200)
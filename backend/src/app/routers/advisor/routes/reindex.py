@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session
+
+from app.core.database import get_session
+
+from ..rag import RAG_MODULES_AVAILABLE, _recipe_indexer
+
+try:  # pragma: no cover - optional dependency
+    from app.rag.reindex import ReindexRunner
+
+    REINDEX_RUNNER = ReindexRunner()
+except Exception:  # pragma: no cover - optional dependency
+    REINDEX_RUNNER = None  # type: ignore
+
+router = APIRouter()
+
+
+def _runner() -> "ReindexRunner":
+    if not RAG_MODULES_AVAILABLE or REINDEX_RUNNER is None:
+        raise HTTPException(status_code=503, detail="RAG modules not available")
+    return REINDEX_RUNNER
+
+
+@router.post("/reindex", status_code=202)
+def start_reindex(
+    chunk_size: int = Query(128, ge=1, le=2048),
+    force: bool = Query(False, description="Re-embed recipes even if their content is unchanged"),
+    resume: bool = Query(True, description="Continue an interrupted job from its checkpoint"),
+    session: Session = Depends(get_session),
+) -> Dict[str, Any]:
+    runner = _runner()
+    started = runner.start(
+        session.get_bind(), _recipe_indexer, chunk_size=chunk_size, force=force, resume=resume
+    )
+    if not started:
+        raise HTTPException(status_code=409, detail="Reindex already running")
+    return runner.status()
+
+
+@router.get("/reindex")
+def reindex_status() -> Dict[str, Any]:
+    return _runner().status()
+
+
+@router.post("/reindex/cancel")
+def cancel_reindex() -> Dict[str, Any]:
+    runner = _runner()
+    if not runner.cancel():
+        raise HTTPException(status_code=409, detail="No reindex running")
+    return runner.status()
@@ -108,5 +108,5 @@ class ChatRequest(BaseModel):
 
 class ChatResponse(BaseModel):
     output: str
-    used_backend: Literal["llama_cpp", "ollama_http", "ollama_cli"] = "ollama_http"
+    used_backend: Literal["llama_cpp", "ollama_http"] = "ollama_http"
 
@@ -1,7 +1,8 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy import func
-from sqlmodel import Session, select, SQLModel
+from sqlmodel import Session, col, select, SQLModel
+from app.core.fts import search_food_ids
 from app.db import get_session
 from app.models.foods import Food
 
@@ -23,6 +24,11 @@ def search_foods(
 ):
     stmt = select(Food.name).order_by(Food.name.asc()).limit(limit).offset(offset)
     if q:
+        # FTS5 (trigram) index: substring + synonym matches, best match first.
+        ids = search_food_ids(session, q.strip(), limit=limit, offset=offset)
+        if ids is not None:
+            names = dict(session.exec(select(Food.id, Food.name).where(col(Food.id).in_(ids))).all())
+            return [names[food_id] for food_id in ids if food_id in names]
         like = f"%{q.strip()}%"
         stmt = (
             select(Food.name)
@@ -2,9 +2,11 @@ from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Depends
 from pydantic import BaseModel
 from sqlmodel import Session
 from datetime import date
-import tempfile, os, http.client, json
+import tempfile, os
 
 from app.db import get_session
+from app.utils.llm import extract_json
+from app.utils.llm_service import LLMDeadlineExceeded, LLMQueueFull, Priority, get_llm_service
 from app.models.foods import Food
 from app.models.meals import Meal, MealItem, MealType
 from faster_whisper import WhisperModel
@@ -14,14 +16,18 @@ router = APIRouter(prefix="/ingest", tags=["ingest"])
 # global whisper model (re-use aus vorher)
 whisper_model = WhisperModel("small", device="cpu", compute_type="int8")
 
-# ---- Helper: call Ollama ----
-def ollama_generate(prompt: str, model: str = "llama3.1") -> str:
-    conn = http.client.HTTPConnection("127.0.0.1", 11434, timeout=60)
-    body = json.dumps({"model": model, "prompt": prompt, "stream": False})
-    conn.request("POST", "/api/generate", body=body, headers={"Content-Type": "application/json"})
-    res = conn.getresponse()
-    data = json.loads(res.read())
-    return data.get("response", "")
+# ---- Helper: call LLM (scheduler, interaktive Prioritaet) ----
+async def ollama_generate(prompt: str, model: str | None = None) -> str:
+    try:
+        return await get_llm_service().agenerate(
+            prompt, model=model, priority=Priority.INTERACTIVE, timeout=60
+        )
+    except LLMQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"LLM ueberlastet: {e}")
+    except LLMDeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=f"LLM-Zeitlimit ueberschritten: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"LLM nicht erreichbar: {e}")
 
 # ---- Models ----
 class VoiceMealResponse(BaseModel):
@@ -63,15 +69,12 @@ async def voice_meal(
     Text: {text}
     """
 
-    raw = ollama_generate(prompt)
-    start, end = raw.find("{"), raw.rfind("}")
-    parsed_json = {}
-    if start >= 0 and end > start:
-        try:
-            parsed_json = json.loads(raw[start:end+1])
-        except Exception:
-            parsed_json = {}
-    items = parsed_json.get("items", [])
+    raw = await ollama_generate(prompt)
+    try:
+        parsed_json = extract_json(raw)
+    except ValueError:
+        parsed_json = {}
+    items = parsed_json.get("items", []) if isinstance(parsed_json, dict) else []
 
     if not items:
         raise HTTPException(status_code=400, detail=f"Keine Lebensmittel erkannt: {raw}")
@@ -8,6 +8,7 @@ from typing import Optional, List, Dict, Any
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import Session, select, func
 
+from app.core.fts import search_food_ids
 from app.db import get_session
 from app.utils.nutrition import macros_for_grams, round_macros
 from app.models.meals import Meal, MealItem, MealType
@@ -21,12 +22,15 @@ AUTOCREATE_FOOD = os.getenv("AUTOCREATE_FOOD", "0") in ("1", "true", "True")
 
 
 def _find_food(session: Session, food_name: str) -> Optional[Food]:
-    """Exakter Treffer, optional fuzzy (ILIKE %name%)."""
+    """Exakter Treffer, optional fuzzy (FTS5-Ranking bzw. ILIKE %name%)."""
     food = session.exec(select(Food).where(Food.name == food_name)).first()
     if food or not FUZZY_FOOD:
         return food
-    # Fuzzy-Fallback
+    # Fuzzy-Fallback: bester FTS-Treffer (inkl. Synonyme), sonst LIKE-Scan
     q = food_name.strip()
+    ids = search_food_ids(session, q, limit=1)
+    if ids is not None:
+        return session.get(Food, ids[0]) if ids else None
     return session.exec(select(Food).where(Food.name.ilike(f"%{q}%"))).first()
 
 
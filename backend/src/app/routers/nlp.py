@@ -1,9 +1,14 @@
 from __future__ import annotations
 from fastapi import APIRouter, UploadFile, File, HTTPException, Request
 from pydantic import BaseModel, Field
-import http.client, json, os, tempfile
+import json, os, tempfile
 from fastapi import Request
 
+import httpx
+
+from app.utils.llm import extract_json
+from app.utils.llm_service import LLMDeadlineExceeded, LLMQueueFull, Priority, get_llm_service
+
 
 router = APIRouter(prefix="/nlp", tags=["nlp"])
 
@@ -37,71 +42,43 @@ class ParseFromAudioResp(BaseModel):
 # Ollama helpers
 # =========================
 
-OLLAMA_HOST = os.getenv("OLLAMA_HOST", "127.0.0.1")
-OLLAMA_PORT = int(os.getenv("OLLAMA_PORT", "11434"))
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.1")
 
-def _http_post_json(host: str, port: int, path: str, payload: dict, timeout: int = 60) -> dict:
-    conn = http.client.HTTPConnection(host, port, timeout=timeout)
-    conn.request("POST", path, body=json.dumps(payload), headers={"Content-Type": "application/json"})
-    res = conn.getresponse()
-    data = res.read()
-    if res.status != 200:
-        raise HTTPException(status_code=503, detail=f"Ollama error {res.status}: {data.decode('utf-8','ignore')}")
+async def _generate(prompt: str, model: str, timeout: int = 60, **kwargs) -> str:
+    """Generierung ueber den LLM-Service (interaktive Prioritaet, Deadline = timeout).
+
+    Der Parser-Prompt ist deterministisch, daher werden Antworten im
+    Completion-Cache gehalten (gleiche Mahlzeit-Phrase -> sofortige Antwort).
+    """
     try:
-        return json.loads(data)
-    except Exception as e:
+        return await get_llm_service().agenerate(
+            prompt, model=model, priority=Priority.INTERACTIVE, timeout=timeout, cache=True, **kwargs
+        )
+    except LLMQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"LLM ueberlastet: {e}")
+    except LLMDeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=f"LLM-Zeitlimit ueberschritten: {e}")
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(status_code=503, detail=f"Ollama error {e.response.status_code}: {e.response.text}")
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=503, detail=f"Ollama nicht erreichbar: {e}")
+    except ValueError as e:
         raise HTTPException(status_code=500, detail=f"Ollama bad JSON: {e}")
 
-def _strip_fences(s: str) -> str:
-    """
-    Entfernt typische Code-Fences (``` / ```json), Leading/Trailing Backticks/Spaces.
-    """
-    t = s.strip()
-    if t.startswith("```"):
-        t = t.strip("` \n\r")
-        if t.lower().startswith("json"):
-            t = t[4:].lstrip()
-    # Heuristik: auf ersten '{' und letzten '}' beschneiden
-    l = t.find("{")
-    r = t.rfind("}")
-    if l >= 0 and r > l:
-        t = t[l:r+1]
-    return t
-
-def ollama_generate_raw(prompt: str, model: str = OLLAMA_MODEL) -> str:
-    """Klassischer /api/generate Call (kein JSON erzwungen)."""
-    data = _http_post_json(OLLAMA_HOST, OLLAMA_PORT, "/api/generate", {
-        "model": model,
-        "prompt": prompt,
-        "stream": False
-    })
-    return data.get("response", "") or ""
-
-def ollama_generate_json(prompt: str, model: str = OLLAMA_MODEL) -> dict:
+async def ollama_generate_raw(prompt: str, model: str = OLLAMA_MODEL) -> str:
+    """Klassischer Generate-Call (kein JSON erzwungen)."""
+    return await _generate(prompt, model)
+
+async def ollama_generate_json(prompt: str, model: str = OLLAMA_MODEL) -> dict:
     """
-    Erzwungene JSON-Antwort: /api/generate mit format='json'.
+    Erzwungene JSON-Antwort (format='json').
     Falls das Modell trotzdem Fences liefert, werden diese entfernt.
     """
-    data = _http_post_json(OLLAMA_HOST, OLLAMA_PORT, "/api/generate", {
-        "model": model,
-        "prompt": prompt,
-        "stream": False,
-        "format": "json",
-        "options": {"temperature": 0.1}
-    })
-    raw = data.get("response", "") or ""
-    raw = _strip_fences(raw)
+    raw = await _generate(prompt, model, as_json=True, temperature=0.1)
     try:
-        return json.loads(raw)
-    except Exception:
-        # letzter Versuch: harte Klammer-Suche
-        try:
-            l = raw.find("{"); r = raw.rfind("}")
-            if l >= 0 and r > l:
-                return json.loads(raw[l:r+1])
-        except Exception:
-            pass
+        return extract_json(raw)
+    except ValueError:
+        pass
     raise HTTPException(status_code=500, detail="KI-Ausgabe nicht als JSON parsebar.")
 
 
@@ -110,7 +87,7 @@ def ollama_generate_json(prompt: str, model: str = OLLAMA_MODEL) -> dict:
 # =========================
 
 @router.post("/parse_meal", response_model=ParseResp)
-def parse_meal(req: ParseReq):
+async def parse_meal(req: ParseReq):
     """
     Extrahiert aus deutschem Freitext (z.B. '80 g Hafer + 250 g Quark') strukturierte Items.
     Antwort wird strikt als JSON erzwungen; robust gegen Fences.
@@ -130,14 +107,13 @@ Text:
 {req.text}
 """
     try:
-        data = ollama_generate_json(prompt)
+        data = await ollama_generate_json(prompt)
     except HTTPException:
         # Fallback: non-JSON Modus + eigenständiges Parsen
-        raw = ollama_generate_raw(prompt)
-        raw = _strip_fences(raw)
+        raw = await ollama_generate_raw(prompt)
         try:
-            data = json.loads(raw)
-        except Exception:
+            data = extract_json(raw)
+        except ValueError:
             data = {"items": [], "confidence": None}
 
     items = []
@@ -168,7 +144,7 @@ async def parse_meal_audio(file: UploadFile = File(...)):
     tr = await transcribe(file)
 
     # 2) Parse
-    parsed = parse_meal(ParseReq(text=tr.text))
+    parsed = await parse_meal(ParseReq(text=tr.text))
 
     return ParseFromAudioResp(text=tr.text, parsed=parsed)
 
@@ -1,5 +1,5 @@
 # backend/app/utils/llm.py
-import json, requests
+import json
 
 def _strip_fences(s: str) -> str:
     s = s.strip()
@@ -9,25 +9,45 @@ def _strip_fences(s: str) -> str:
             s = s[4:].lstrip()
     return s
 
-def llm_generate_json(system_prompt: str, user_prompt: str, model: str, endpoint: str, json_root: str):
+def extract_json(s: str):
     """
-    Ruft Ollama /api/chat auf und erwartet reines JSON.
-    Entfernt Code-Fences, prüft Struktur und gibt data[json_root] zurück.
+    Parst LLM-Ausgabe als JSON: entfernt Code-Fences und schneidet notfalls
+    auf das erste '{' bis letzte '}' zu. Wirft ValueError, wenn nichts parsebar ist.
     """
-    url = endpoint.rstrip("/") + "/api/chat"
-    payload = {
-        "model": model,
-        "messages": [
+    t = _strip_fences(s or "")
+    try:
+        return json.loads(t)
+    except ValueError:
+        pass
+    l, r = t.find("{"), t.rfind("}")
+    if l >= 0 and r > l:
+        return json.loads(t[l:r+1])
+    raise ValueError("LLM-Ausgabe enthaelt kein JSON")
+
+async def allm_generate_json(system_prompt: str, user_prompt: str, model: str, json_root: str, timeout: float = 120, priority=None, cache: bool = False):
+    """
+    Chat-Anfrage ueber den LLM-Service (Scheduler mit Prioritaeten und
+    Deadline, Backend llama.cpp oder Ollama), erwartet reines JSON und gibt
+    data[json_root] zurueck. Mit cache=True werden gleiche Anfragen aus dem
+    Completion-Cache beantwortet.
+    """
+    from app.utils.llm_service import Priority, get_llm_service
+
+    content = await get_llm_service().achat(
+        [
             {"role":"system","content": system_prompt},
             {"role":"user","content": user_prompt}
         ],
-        "stream": False
-    }
-    r = requests.post(url, json=payload, timeout=120)
-    r.raise_for_status()
-    content = r.json().get("message", {}).get("content", "")
-    content = _strip_fences(content)
-    data = json.loads(content)
+        model=model,
+        as_json=True,
+        priority=Priority.NORMAL if priority is None else priority,
+        timeout=timeout,
+        cache=cache,
+    )
+    return _json_root(content, json_root)
+
+def _json_root(content: str, json_root: str):
+    data = extract_json(content)
     if isinstance(data, dict) and json_root in data:
         return data[json_root]
     if isinstance(data, list):
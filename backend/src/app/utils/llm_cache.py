@@ -0,0 +1,182 @@
+"""Persistent cache of LLM completions (SQLite).
+
+Compose and meal parsing send deterministic prompts - the same message,
+servings, preferences and constraints, or the same meal phrase wrapped in a
+fixed template - and each miss costs tens of seconds of generation. Completions
+are stored in a small SQLite file keyed by a hash of everything that shapes the
+output: backend, model, prompt (or chat messages), output format and sampling
+options.
+
+Entries expire after ``ttl_seconds`` and the least recently used entries are
+evicted beyond ``max_entries``. The database file is only created on the first
+``put``, so read-only use never leaves files behind.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_completion (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_llm_completion_used_at ON llm_completion (used_at);
+"""
+
+
+def completion_key(**parts: Any) -> str:
+    """Stable hash of the request fields that determine a completion."""
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class LLMCompletionCache:
+    """SQLite-backed LRU cache of completion texts with a time-to-live."""
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_entries: int = 5000,
+        ttl_seconds: float = 0,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            path: SQLite file (None keeps the cache in memory for this process)
+            max_entries: Maximum number of cached completions (0 disables the cache)
+            ttl_seconds: Entry lifetime in seconds (0 = never expire)
+            clock: Time source, wall clock so persisted timestamps stay valid
+        """
+        self.path = Path(path) if path else None
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _connect(self, create: bool) -> Optional[sqlite3.Connection]:
+        if self._conn is None:
+            if self.path is not None and not create and not self.path.exists():
+                return None
+            target = ":memory:"
+            if self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                target = str(self.path)
+            conn = sqlite3.connect(target, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached completion for ``key`` or None (counted as a miss)."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            try:
+                conn = self._connect(create=False)
+                row = None
+                if conn is not None:
+                    row = conn.execute(
+                        "SELECT text, created_at FROM llm_completion WHERE key = ?", (key,)
+                    ).fetchone()
+                    now = self._clock()
+                    if row is not None and self._expired(row[1], now):
+                        conn.execute("DELETE FROM llm_completion WHERE key = ?", (key,))
+                        row = None
+                    elif row is not None:
+                        conn.execute("UPDATE llm_completion SET used_at = ? WHERE key = ?", (now, key))
+                if row is None:
+                    self.misses += 1
+                    return None
+            except sqlite3.Error as exc:  # pragma: no cover - defensive
+                print("[WARN] LLM cache lookup failed:", exc)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, text: str) -> None:
+        """Store ``text`` under ``key``, dropping expired and least recently used entries."""
+        if not self.enabled or not text:
+            return
+        with self._lock:
+            try:
+                conn = self._connect(create=True)
+                assert conn is not None  # create=True always connects
+                now = self._clock()
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_completion (key, text, created_at, used_at) VALUES (?, ?, ?, ?)",
+                    (key, text, now, now),
+                )
+                if self.ttl_seconds > 0:
+                    cursor = conn.execute(
+                        "DELETE FROM llm_completion WHERE created_at < ?", (now - self.ttl_seconds,)
+                    )
+                    self.evictions += max(0, cursor.rowcount)
+                cursor = conn.execute(
+                    "DELETE FROM llm_completion WHERE key IN ("
+                    "SELECT key FROM llm_completion ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                self.evictions += max(0, cursor.rowcount)
+            except sqlite3.Error as exc:  # pragma: no cover - defensive
+                print("[WARN] LLM cache write failed:", exc)
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            conn = self._connect(create=False)
+            if conn is not None:
+                conn.execute("DELETE FROM llm_completion")
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            conn = self._connect(create=False)
+            if conn is None:
+                return 0
+            return conn.execute("SELECT COUNT(*) FROM llm_completion").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size, hit/miss/eviction counters and the hit rate."""
+        size = len(self)
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "path": str(self.path) if self.path else None,
+            "size": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
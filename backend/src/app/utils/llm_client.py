@@ -0,0 +1,270 @@
+"""Pooled, concurrency-limited async client for the Ollama HTTP API.
+
+Blocking ``http.client``/``requests`` calls inside sync handlers pin one
+threadpool worker per in-flight generation for up to ``OLLAMA_TIMEOUT``
+seconds. ``AsyncLLMClient`` instead awaits the model on the event loop:
+
+- one ``httpx.AsyncClient`` per process keeps connections to Ollama alive;
+- at most ``max_concurrency`` generations run at once (Ollama serializes them
+  anyway); further callers wait in a queue of at most ``max_queue`` entries
+  and are rejected with ``LLMQueueFull`` beyond that, so overload fails fast
+  instead of piling up;
+- ``stats()`` reports in-flight calls, queue depth, queue wait and latency.
+
+The underlying ``httpx.AsyncClient`` and semaphore belong to one event loop;
+they are recreated transparently when the client is used from another loop
+(e.g. per-test loops).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, AsyncIterator, Deque, Dict, List, Optional
+
+import httpx
+
+
+class LLMQueueFull(RuntimeError):
+    """Raised when more callers wait for a generation slot than ``max_queue``."""
+
+
+def _percentile(values: Deque[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class AsyncLLMClient:
+    """Keep-alive, concurrency-limited async client for Ollama."""
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 100.0,
+        connect_timeout: float = 2.0,
+        max_concurrency: int = 4,
+        max_queue: int = 64,
+        latency_window: int = 256,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        Args:
+            base_url: Ollama base URL, e.g. ``http://127.0.0.1:11434``
+            timeout: Default read timeout per call in seconds
+            connect_timeout: TCP connect timeout in seconds
+            max_concurrency: Maximum number of in-flight generations
+            max_queue: Maximum number of callers waiting for a slot (0 = unbounded)
+            latency_window: Number of recent calls kept for percentiles
+            transport: Optional httpx transport (tests)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self._transport = transport
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+        self._waits: Deque[float] = deque(maxlen=latency_window)
+        self.in_flight = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def _bind(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._loop is not loop:
+            self._loop = loop
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency + 2,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+                transport=self._transport,
+            )
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._http
+
+    @asynccontextmanager
+    async def _slot(self) -> AsyncIterator[None]:
+        self._bind()
+        slots = self._slots
+        assert slots is not None  # created by _bind
+        if self.max_queue > 0 and slots.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise LLMQueueFull(f"LLM queue full ({self.waiting} waiting)")
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        queued_at = time.perf_counter()
+        try:
+            await slots.acquire()
+        finally:
+            self.waiting -= 1
+        self._waits.append(time.perf_counter() - queued_at)
+        self.in_flight += 1
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.in_flight -= 1
+            slots.release()
+            self.calls += 1
+            if not ok:
+                self.failures += 1
+            self._latencies.append(time.perf_counter() - started)
+
+    async def post_json(self, path: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """POST ``payload`` and return the decoded JSON reply.
+
+        Raises:
+            LLMQueueFull: Too many callers are already waiting
+            httpx.HTTPError: Connection problems, timeouts and non-2xx replies
+        """
+        async with self._slot():
+            response = await self._bind().post(
+                path,
+                json=payload,
+                timeout=httpx.USE_CLIENT_DEFAULT if timeout is None else timeout,
+            )
+            response.raise_for_status()
+            return response.json()
+
+    async def generate(
+        self,
+        prompt: str,
+        model: str,
+        as_json: bool = False,
+        temperature: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """Non-streaming ``/api/generate``; returns the response text."""
+        body: Dict[str, Any] = {"model": model, "prompt": prompt, "stream": False}
+        if as_json:
+            body["format"] = "json"
+        if temperature is not None:
+            body["options"] = {"temperature": temperature}
+        data = await self.post_json("/api/generate", body, timeout=timeout)
+        return data.get("response", "") or ""
+
+    async def stream_generate(
+        self,
+        prompt: str,
+        model: str,
+        as_json: bool = False,
+        temperature: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncGenerator[str, None]:
+        """Streaming ``/api/generate``; yields response fragments.
+
+        Closing the generator closes the connection, which makes Ollama stop
+        generating.
+        """
+        body: Dict[str, Any] = {"model": model, "prompt": prompt, "stream": True}
+        if as_json:
+            body["format"] = "json"
+        if temperature is not None:
+            body["options"] = {"temperature": temperature}
+        async with self._slot():
+            async with self._bind().stream(
+                "POST",
+                "/api/generate",
+                json=body,
+                timeout=httpx.USE_CLIENT_DEFAULT if timeout is None else timeout,
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    data = json.loads(line)
+                    if data.get("error"):
+                        raise RuntimeError(f"Ollama error: {data['error']}")
+                    if data.get("response"):
+                        yield data["response"]
+                    if data.get("done"):
+                        break
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        as_json: bool = False,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """Non-streaming ``/api/chat``; returns the assistant message content."""
+        body: Dict[str, Any] = {"model": model, "messages": messages, "stream": False}
+        if as_json:
+            body["format"] = "json"
+        data = await self.post_json("/api/chat", body, timeout=timeout)
+        return (data.get("message") or {}).get("content", "") or ""
+
+    async def models(self, timeout: float = 2.0) -> List[str]:
+        """Names of the installed models from ``/api/tags`` (does not take a generation slot).
+
+        Raises:
+            httpx.HTTPError: Ollama is unreachable or answered with an error
+        """
+        response = await self._bind().get("/api/tags", timeout=timeout)
+        response.raise_for_status()
+        return [model.get("name", "") for model in response.json().get("models", [])]
+
+    async def alive(self, timeout: float = 2.0) -> bool:
+        """Whether Ollama answers ``/api/tags``."""
+        try:
+            await self.models(timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+        self._http = None
+        self._loop = None
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "max_queue_depth": self.max_waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "calls": self.calls,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "queue_wait_p50_ms": 1000.0 * _percentile(self._waits, 0.5),
+            "queue_wait_p95_ms": 1000.0 * _percentile(self._waits, 0.95),
+            "latency_p50_ms": 1000.0 * _percentile(self._latencies, 0.5),
+            "latency_p95_ms": 1000.0 * _percentile(self._latencies, 0.95),
+        }
+
+
+_CLIENT: Optional[AsyncLLMClient] = None
+
+
+def get_llm_client() -> AsyncLLMClient:
+    """Return the process-wide Ollama client (configured from the environment)."""
+    global _CLIENT
+    if _CLIENT is None:
+        host = os.getenv("OLLAMA_HOST", "127.0.0.1")
+        port = int(os.getenv("OLLAMA_PORT", "11434"))
+        _CLIENT = AsyncLLMClient(
+            f"http://{host}:{port}",
+            timeout=float(os.getenv("OLLAMA_TIMEOUT", "100")),
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+            max_queue=int(os.getenv("LLM_MAX_QUEUE", "64")),
+        )
+    return _CLIENT
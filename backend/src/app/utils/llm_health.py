@@ -0,0 +1,142 @@
+"""Background health monitoring for the LLM backends.
+
+Probing Ollama's ``/api/tags`` before every compose request costs a fresh
+connection and up to two seconds when the server is down. ``LLMHealthMonitor``
+instead probes each backend on an interval (more often while it is down) and
+keeps the result - liveness, installed models, probe latency, last error -
+so requests read the cached state.
+
+Outcomes of real calls feed the same state: a connection failure marks the
+backend down immediately, without waiting for the next probe, and a
+successful call marks it up again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+
+@dataclass
+class BackendHealth:
+    """Last known state of one backend."""
+
+    name: str
+    alive: Optional[bool] = None
+    models: List[str] = field(default_factory=list)
+    checked_at: Optional[float] = None
+    probe_latency_ms: Optional[float] = None
+    last_error: Optional[str] = None
+    consecutive_failures: int = 0
+    source: Optional[str] = None  # probe | request
+
+
+def indicates_outage(exc: BaseException) -> bool:
+    """Whether a failed call means the backend itself is unreachable.
+
+    Timeouts and error replies only concern the single request; refused or
+    dropped connections, a missing model file and a model that cannot be
+    loaded (or exceeds its memory limit) concern the backend.
+    """
+    # TimeoutError is an OSError; it also covers LLMDeadlineExceeded.
+    if isinstance(exc, (httpx.TimeoutException, TimeoutError)):
+        return False
+    return isinstance(exc, (httpx.TransportError, OSError, MemoryError))
+
+
+class LLMHealthMonitor:
+    """Probe backends periodically and cache their health."""
+
+    def __init__(
+        self,
+        backends: Dict[str, Any],
+        interval: float = 15.0,
+        down_interval: float = 3.0,
+        probe_timeout: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            backends: Backends by name; each provides ``async probe(timeout) -> models``
+            interval: Seconds between probes while all backends are up (0 = probe on demand only)
+            down_interval: Seconds between probes while a backend is down
+            probe_timeout: Timeout of a single probe in seconds
+            clock: Monotonic time source
+        """
+        self.backends = backends
+        self.interval = interval
+        self.down_interval = down_interval
+        self.probe_timeout = probe_timeout
+        self._clock = clock
+        self._state: Dict[str, BackendHealth] = {name: BackendHealth(name=name) for name in backends}
+        self.probes = 0
+
+    def state(self, name: str) -> BackendHealth:
+        return self._state[name]
+
+    def is_fresh(self, name: str) -> bool:
+        """Whether the cached state is recent enough to answer without probing."""
+        health = self._state[name]
+        if health.alive is None or health.checked_at is None or self.interval <= 0:
+            return False
+        max_age = self.interval if health.alive else self.down_interval
+        return self._clock() - health.checked_at <= 2 * max_age
+
+    def _mark(self, name: str, alive: bool, source: str, error: Optional[str] = None) -> BackendHealth:
+        health = self._state[name]
+        health.alive = alive
+        health.checked_at = self._clock()
+        health.source = source
+        if alive:
+            health.consecutive_failures = 0
+        else:
+            health.consecutive_failures += 1
+            health.last_error = error
+        return health
+
+    async def probe(self, name: str, timeout: Optional[float] = None) -> BackendHealth:
+        """Probe one backend now and update its cached state."""
+        timeout = self.probe_timeout if timeout is None else timeout
+        started = self._clock()
+        self.probes += 1
+        try:
+            models = await asyncio.wait_for(self.backends[name].probe(timeout), timeout=timeout + 0.5)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            return self._mark(name, False, "probe", f"{type(exc).__name__}: {exc}")
+        health = self._mark(name, True, "probe")
+        health.models = list(models or [])
+        health.probe_latency_ms = 1000.0 * (self._clock() - started)
+        return health
+
+    async def run(self) -> None:
+        """Probe all backends forever (runs as a task on the scheduler loop)."""
+        while True:
+            await asyncio.gather(*(self.probe(name) for name in self.backends))
+            all_up = all(health.alive for health in self._state.values())
+            await asyncio.sleep(self.interval if all_up else min(self.interval, self.down_interval))
+
+    def observe(self, name: str, exc: Optional[BaseException]) -> None:
+        """Record the outcome of a real call (scheduler loop only)."""
+        if name not in self._state:
+            return
+        if exc is None:
+            if self._state[name].alive is not True:
+                self._mark(name, True, "request")
+        elif indicates_outage(exc):
+            self._mark(name, False, "request", f"{type(exc).__name__}: {exc}")
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        now = self._clock()
+        result: Dict[str, Dict[str, Any]] = {}
+        for name, health in self._state.items():
+            entry = asdict(health)
+            entry["age_s"] = None if health.checked_at is None else round(now - health.checked_at, 3)
+            del entry["checked_at"]
+            result[name] = entry
+        return result
@@ -0,0 +1,910 @@
+"""Single entry point for local LLM calls (llama.cpp or Ollama).
+
+Every generation in the app - advisor chat (plain and streaming), compose,
+recommendations, meal parsing and voice ingest - goes through
+``get_llm_service()``. The service schedules calls instead of letting each
+caller hit the model directly:
+
+- one ``LLMScheduler`` per backend with a bounded worker pool: llama.cpp gets
+  exactly one worker, backed by a single-thread executor, because the
+  ``Llama`` handle is not thread-safe; Ollama gets ``LLM_MAX_CONCURRENCY``
+  workers sharing the pooled ``AsyncLLMClient``;
+- a priority queue per backend: ``Priority.INTERACTIVE`` (chat, meal parsing)
+  is served before ``Priority.BATCH`` (compose, recommendations); within a
+  priority, earlier deadlines go first;
+- per-request deadlines: a call still queued when its deadline passes fails
+  with ``LLMDeadlineExceeded`` without touching the model, and a running call
+  is cut off at the deadline;
+- at most ``LLM_MAX_QUEUE`` queued calls per backend; beyond that ``submit``
+  raises ``LLMQueueFull`` so overload fails fast;
+- calls made with ``cache=True`` (compose, meal parsing) are answered from the
+  persistent ``LLMCompletionCache`` when the same request was seen before;
+- backend liveness comes from the ``LLMHealthMonitor``, which probes on an
+  interval and is updated by the outcome of every call, so requests never
+  probe themselves;
+- calls go to the first backend in ``LLM_BACKENDS`` order that is not known to
+  be down, and a call that fails because its backend is unreachable is retried
+  on the next one within the same deadline. With a llama.cpp model configured
+  as fallback this replaces spawning ``ollama run`` per request: the model is
+  preloaded once at startup and stays warm in-process.
+
+The schedulers run on one background event loop thread. Sync callers block
+on a ``concurrent.futures.Future``; async callers await it via
+``asyncio.wrap_future``, so neither ties up the request threadpool while a
+call waits in the queue.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from enum import IntEnum
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Set
+
+import httpx
+
+from app.core.config import get_settings
+from app.utils.llm import extract_json
+from app.utils.llm_cache import LLMCompletionCache, completion_key
+from app.utils.llm_health import LLMHealthMonitor, indicates_outage
+from app.utils.llm_client import AsyncLLMClient, LLMQueueFull, _percentile, get_llm_client
+
+LLAMA_CPP_AVAILABLE = False
+try:  # pragma: no cover - optional dependency
+    from llama_cpp import Llama  # type: ignore
+
+    LLAMA_CPP_AVAILABLE = True
+except Exception:  # pragma: no cover - optional dependency
+    Llama = None  # type: ignore
+
+__all__ = [
+    "LLMCall",
+    "LLMDeadlineExceeded",
+    "LLMQueueFull",
+    "LLMService",
+    "LLMScheduler",
+    "LlamaCppBackend",
+    "OllamaBackend",
+    "Priority",
+    "get_llm_service",
+    "shutdown_llm_service",
+]
+
+
+class Priority(IntEnum):
+    """Scheduling class of a call; lower values are served first."""
+
+    INTERACTIVE = 0
+    NORMAL = 1
+    BATCH = 2
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """Raised when a call does not finish (or start) before its deadline."""
+
+
+@dataclass
+class LLMCall:
+    """One generation request as seen by a backend."""
+
+    prompt: str = ""
+    messages: Optional[List[Dict[str, str]]] = None
+    model: Optional[str] = None
+    as_json: bool = False
+    temperature: Optional[float] = None
+    max_tokens: int = 512
+    on_token: Optional[Callable[[str], None]] = None
+    cancel: Optional[threading.Event] = None
+    cache: bool = False
+
+    def cancelled(self) -> bool:
+        return self.cancel is not None and self.cancel.is_set()
+
+    def completion_prompt(self) -> str:
+        """The prompt for completion-style backends (chat messages flattened)."""
+        if not self.messages:
+            return self.prompt
+        parts = [f"[{message.get('role', 'user')}]\n{message.get('content', '')}" for message in self.messages]
+        return "\n\n".join(parts) + "\n\n[assistant]\n"
+
+
+class OllamaBackend:
+    """Ollama HTTP API via the pooled ``AsyncLLMClient``."""
+
+    name = "ollama_http"
+
+    def __init__(self, client: AsyncLLMClient, model: str, workers: int = 4):
+        self.client = client
+        self.model = model
+        self.workers = max(1, workers)
+
+    async def run(self, call: LLMCall, deadline: float) -> str:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMDeadlineExceeded("LLM deadline exceeded before the call started")
+        try:
+            return await asyncio.wait_for(self._run(call, remaining), timeout=remaining)
+        except (asyncio.TimeoutError, httpx.TimeoutException) as exc:
+            raise LLMDeadlineExceeded(f"LLM call exceeded its deadline ({remaining:.1f}s)") from exc
+
+    async def _run(self, call: LLMCall, timeout: float) -> str:
+        model = call.model or self.model
+        if call.on_token is not None:
+            pieces: List[str] = []
+            stream = self.client.stream_generate(
+                call.completion_prompt(),
+                model=model,
+                as_json=call.as_json,
+                temperature=call.temperature,
+                timeout=timeout,
+            )
+            async with aclosing(stream):
+                async for token in stream:
+                    if call.cancelled():
+                        break
+                    pieces.append(token)
+                    call.on_token(token)
+            return "".join(pieces)
+        if call.messages:
+            return await self.client.chat(call.messages, model=model, as_json=call.as_json, timeout=timeout)
+        return await self.client.generate(
+            call.prompt, model=model, as_json=call.as_json, temperature=call.temperature, timeout=timeout
+        )
+
+    def model_for(self, call: LLMCall) -> str:
+        return call.model or self.model
+
+    async def probe(self, timeout: float = 2.0) -> List[str]:
+        return await self.client.models(timeout=timeout)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"client": self.client.stats()}
+
+
+class LlamaCppBackend:
+    """In-process llama.cpp; every call runs on one dedicated thread.
+
+    The ``Llama`` handle keeps mutable decoding state, so concurrent calls
+    would corrupt each other. All loading and generation happens inside a
+    single-thread executor, which serializes them.
+    """
+
+    name = "llama_cpp"
+    workers = 1
+
+    def __init__(
+        self,
+        model_path: str,
+        n_ctx: int = 8192,
+        n_threads: Optional[int] = None,
+        loader: Optional[Callable[..., Any]] = None,
+        preload: bool = False,
+        max_memory_mb: int = 0,
+    ):
+        """
+        Args:
+            model_path: Path to the GGUF model file
+            n_ctx: Context window passed to ``Llama``
+            n_threads: CPU threads for llama.cpp (default: all cores)
+            loader: Factory returning the model handle (default ``llama_cpp.Llama``)
+            preload: Load the model when the service starts instead of on the first call
+            max_memory_mb: Refuse to load a model file larger than this (0 = no
+                limit). Only the GGUF file size is checked; the KV cache for
+                ``n_ctx`` tokens comes on top of it, so leave headroom.
+        """
+        self.model_path = model_path
+        self.n_ctx = n_ctx
+        self.n_threads = n_threads or os.cpu_count() or 4
+        self.preload = preload
+        self.max_memory_mb = max_memory_mb
+        self._loader: Optional[Callable[..., Any]] = loader or Llama
+        self._handle: Any = None
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="llama-cpp")
+
+    def _model(self) -> Any:
+        """Load the model once (executor thread only).
+
+        Raises:
+            MemoryError: The model file exceeds ``max_memory_mb``
+            OSError: llama.cpp could not load the model
+        """
+        if self._handle is None:
+            if self.max_memory_mb > 0:
+                size_mb = os.path.getsize(self.model_path) / 2**20
+                if size_mb > self.max_memory_mb:
+                    raise MemoryError(
+                        f"llama.cpp model file is ~{size_mb:.0f} MB (excluding KV cache), "
+                        f"limit is {self.max_memory_mb} MB"
+                    )
+            if self._loader is None:
+                raise OSError("llama-cpp-python is not installed")
+            try:
+                self._handle = self._loader(model_path=self.model_path, n_ctx=self.n_ctx, n_threads=self.n_threads)
+            except Exception as exc:
+                raise OSError(f"llama.cpp could not load {self.model_path}: {exc}") from exc
+        return self._handle
+
+    async def warm(self) -> None:
+        """Load the model ahead of the first call if ``preload`` is set."""
+        if not self.preload:
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._model)
+        except Exception as exc:
+            print("[WARN] llama.cpp preload failed:", exc)
+
+    def _complete(self, call: LLMCall, deadline: float) -> str:
+        temperature = 0.3 if call.temperature is None else call.temperature
+        chunks = self._model()(
+            prompt=call.completion_prompt(), max_tokens=call.max_tokens, temperature=temperature, stream=True
+        )
+        pieces: List[str] = []
+        try:
+            for chunk in chunks:
+                if call.cancelled():
+                    break
+                if time.monotonic() > deadline:
+                    raise LLMDeadlineExceeded("llama.cpp generation exceeded its deadline")
+                text = chunk.get("choices", [{}])[0].get("text", "")
+                if text:
+                    pieces.append(text)
+                    if call.on_token is not None:
+                        call.on_token(text)
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+        text = "".join(pieces)
+        return text if call.on_token is not None else text.strip()
+
+    async def run(self, call: LLMCall, deadline: float) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._complete, call, deadline)
+
+    def model_for(self, call: LLMCall) -> str:
+        return self.model_path
+
+    async def probe(self, timeout: float = 2.0) -> List[str]:
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(self.model_path)
+        return [os.path.basename(self.model_path)]
+
+    async def aclose(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"model_path": self.model_path, "loaded": self._handle is not None}
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    deadline: float
+    seq: int
+    call: LLMCall = field(compare=False)
+    future: concurrent.futures.Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    on_success: Optional[Callable[[str], None]] = field(default=None, compare=False)
+
+
+class LLMScheduler:
+    """Priority queue plus a fixed pool of worker tasks in front of one backend."""
+
+    def __init__(self, backend: Any, max_queue: int = 64, latency_window: int = 256):
+        """
+        Args:
+            backend: ``OllamaBackend``/``LlamaCppBackend`` (anything with
+                ``name``, ``workers`` and ``async run(call, deadline)``)
+            max_queue: Maximum number of queued calls (0 = unbounded)
+            latency_window: Number of recent calls kept for percentiles
+        """
+        self.backend = backend
+        self.max_queue = max_queue
+        self.observe: Optional[Callable[[str, Optional[BaseException]], None]] = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[int, asyncio.Task] = {}
+        self._closing = False
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._waits: Deque[float] = deque(maxlen=latency_window)
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+        self.queued: Dict[str, int] = {priority.name.lower(): 0 for priority in Priority}
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.expired = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    @property
+    def queue(self) -> asyncio.PriorityQueue:
+        """The job queue (created by ``start``)."""
+        assert self._queue is not None, "scheduler not started"
+        return self._queue
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Create the queue and worker tasks on the scheduler loop."""
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [
+            loop.create_task(self._worker(), name=f"llm-{self.backend.name}-{index}")
+            for index in range(self.backend.workers)
+        ]
+
+    def stop(self) -> None:
+        """Cancel the worker tasks (scheduler loop only); running calls fail as shut down."""
+        self._closing = True
+        for task in self._workers:
+            task.cancel()
+
+    def enqueue(self, job: _Job) -> None:
+        """Reserve a queue slot (thread-safe); the caller then hands ``job`` to the loop.
+
+        Raises:
+            LLMQueueFull: ``max_queue`` calls are already waiting
+        """
+        with self._lock:
+            depth = sum(self.queued.values())
+            if self.max_queue > 0 and depth >= self.max_queue:
+                self.rejected += 1
+                raise LLMQueueFull(f"LLM queue full ({depth} waiting for {self.backend.name})")
+            self.queued[Priority(job.priority).name.lower()] += 1
+
+    async def _worker(self) -> None:
+        queue = self.queue
+        while True:
+            job: _Job = await queue.get()
+            with self._lock:
+                self.queued[Priority(job.priority).name.lower()] -= 1
+            if job.call.cancelled():
+                job.future.cancel()  # aborted while it was queued
+            if not job.future.set_running_or_notify_cancel():
+                self.cancelled += 1
+                continue
+            self._waits.append(time.monotonic() - job.enqueued_at)
+            if time.monotonic() >= job.deadline:
+                self.expired += 1
+                job.future.set_exception(LLMDeadlineExceeded("LLM deadline exceeded while queued"))
+                continue
+            self.running += 1
+            started = time.monotonic()
+            task = asyncio.ensure_future(self.backend.run(job.call, job.deadline))
+            self._running[id(job.call)] = task
+            try:
+                result = await task
+            except asyncio.CancelledError:
+                # Distinguish shutdown (the worker itself is cancelled) from an
+                # aborted call; Task.cancelling() would need Python 3.11.
+                if self._closing:
+                    task.cancel()
+                    job.future.set_exception(RuntimeError("LLM service shut down"))
+                    raise
+                self.cancelled += 1
+                job.future.set_exception(RuntimeError("LLM call aborted"))
+            except BaseException as exc:
+                if isinstance(exc, LLMDeadlineExceeded):
+                    self.expired += 1
+                else:
+                    self.failed += 1
+                    self._observe(exc)
+                job.future.set_exception(exc)
+            else:
+                self.completed += 1
+                self._observe(None)
+                if job.on_success is not None:
+                    try:
+                        job.on_success(result)
+                    except Exception as exc:  # pragma: no cover - defensive
+                        print("[WARN] LLM result hook failed:", exc)
+                job.future.set_result(result)
+            finally:
+                self._running.pop(id(job.call), None)
+                self.running -= 1
+                self._latencies.append(time.monotonic() - started)
+
+    def _observe(self, exc: Optional[BaseException]) -> None:
+        if self.observe is not None:
+            self.observe(self.backend.name, exc)
+
+    def abort(self, call: LLMCall) -> None:
+        """Cancel ``call`` if it is running (scheduler loop only)."""
+        task = self._running.get(id(call))
+        if task is not None:
+            task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend.name,
+            "workers": self.backend.workers,
+            "queue_depth": sum(self.queued.values()),
+            "queued": dict(self.queued),
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "expired": self.expired,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+            "queue_wait_p50_ms": 1000.0 * _percentile(self._waits, 0.5),
+            "queue_wait_p95_ms": 1000.0 * _percentile(self._waits, 0.95),
+            "latency_p50_ms": 1000.0 * _percentile(self._latencies, 0.5),
+            "latency_p95_ms": 1000.0 * _percentile(self._latencies, 0.95),
+        }
+
+
+_END = object()
+
+
+class LLMService:
+    """Route calls to the preferred backend's scheduler."""
+
+    def __init__(
+        self,
+        backends: List[Any],
+        max_queue: int = 64,
+        default_timeout: float = 100.0,
+        cache: Optional[LLMCompletionCache] = None,
+        health_interval: float = 0,
+    ):
+        """
+        Args:
+            backends: Available backends, preferred first
+            max_queue: Queue bound per backend (0 = unbounded)
+            default_timeout: Deadline in seconds for calls that do not pass one
+            cache: Completion cache for calls made with ``cache=True`` (None disables)
+            health_interval: Seconds between background health probes
+                (0 = probe on demand, i.e. on every liveness check)
+        """
+        if not backends:
+            raise ValueError("LLMService needs at least one backend")
+        self.schedulers: Dict[str, LLMScheduler] = {
+            backend.name: LLMScheduler(backend, max_queue=max_queue) for backend in backends
+        }
+        self.preferred = backends[0].name
+        self.default_timeout = default_timeout
+        self.cache = cache
+        self.health = LLMHealthMonitor({backend.name: backend for backend in backends}, interval=health_interval)
+        for scheduler in self.schedulers.values():
+            scheduler.observe = self.health.observe
+        self._health_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def backend_name(self) -> str:
+        return self.route()
+
+    def route(self) -> str:
+        """First backend in preference order not known to be down (the preferred one if all are)."""
+        for name in self.schedulers:
+            if self.health.state(name).alive is not False:
+                return name
+        return self.preferred
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is not None:
+                return self._loop
+            loop = asyncio.new_event_loop()
+            for scheduler in self.schedulers.values():
+                scheduler.start(loop)
+            if self.health.interval > 0:
+                self._health_task = loop.create_task(self.health.run(), name="llm-health")
+            for scheduler in self.schedulers.values():
+                warm = getattr(scheduler.backend, "warm", None)
+                if warm is not None:
+                    loop.create_task(warm(), name=f"llm-{scheduler.backend.name}-warm")
+
+            def _run() -> None:
+                asyncio.set_event_loop(loop)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=_run, name="llm-scheduler", daemon=True)
+            self._thread.start()
+            self._loop = loop
+            return loop
+
+    def start(self) -> None:
+        """Start the scheduler loop (and background health probes) without waiting for a call."""
+        self._ensure_loop()
+
+    def submit(
+        self,
+        call: LLMCall,
+        priority: Priority = Priority.NORMAL,
+        timeout: Optional[float] = None,
+        backend: Optional[str] = None,
+    ) -> concurrent.futures.Future:
+        """Queue ``call`` and return a future for the generated text.
+
+        Args:
+            call: What to generate
+            priority: Scheduling class
+            timeout: Seconds until the deadline (default ``default_timeout``)
+            backend: Backend name (default: ``route()``; non-streaming calls then
+                fail over to the next backend if this one turns out to be down)
+
+        Calls made with ``cache=True`` are answered from the completion cache
+        when possible (without taking a queue slot); successful results are
+        stored, JSON calls only if the text parses.
+
+        Raises:
+            LLMQueueFull: The backend's queue is full
+        """
+        name = backend or self.route()
+        scheduler = self.schedulers[name]
+        cache_key = self._cache_key(call, scheduler.backend)
+        if cache_key is not None and self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                future: concurrent.futures.Future = concurrent.futures.Future()
+                future.set_result(cached)
+                return future
+        loop = self._ensure_loop()
+        now = time.monotonic()
+        job = _Job(
+            priority=int(priority),
+            deadline=now + (self.default_timeout if timeout is None else timeout),
+            seq=next(scheduler._seq),
+            call=call,
+            future=concurrent.futures.Future(),
+            enqueued_at=now,
+            on_success=None if cache_key is None else lambda text: self._store(cache_key, call, text),
+        )
+        scheduler.enqueue(job)
+        loop.call_soon_threadsafe(scheduler.queue.put_nowait, job)
+        if backend is None and call.on_token is None and len(self.schedulers) > 1:
+            return self._with_failover(job.future, call, priority, job.deadline, {name})
+        return job.future
+
+    def _with_failover(
+        self,
+        attempt: concurrent.futures.Future,
+        call: LLMCall,
+        priority: Priority,
+        deadline: float,
+        tried: Set[str],
+    ) -> concurrent.futures.Future:
+        """Resolve to ``attempt``, or to a retry on the next backend if its backend was unreachable.
+
+        Cancelling the returned future cancels the current attempt, so a call
+        that is still queued is skipped by its worker.
+        """
+        result: concurrent.futures.Future = concurrent.futures.Future()
+        current = [attempt]
+
+        def _cancel(outer: concurrent.futures.Future) -> None:
+            if outer.cancelled():
+                current[0].cancel()
+
+        def _settle(done: concurrent.futures.Future) -> None:
+            if result.cancelled():
+                return
+            if done.cancelled():
+                result.cancel()
+                return
+            exc = done.exception()
+            fallback = None
+            if exc is not None and indicates_outage(exc) and not call.cancelled():
+                fallback = next(
+                    (n for n in self.schedulers if n not in tried and self.health.state(n).alive is not False), None
+                )
+            if fallback is None:
+                if exc is None:
+                    result.set_result(done.result())
+                else:
+                    result.set_exception(exc)
+                return
+            tried.add(fallback)
+            try:
+                retry = self.submit(call, priority, max(0.0, deadline - time.monotonic()), backend=fallback)
+            except LLMQueueFull as full:
+                result.set_exception(full)
+                return
+            current[0] = retry
+            retry.add_done_callback(_settle)
+            if result.cancelled():
+                retry.cancel()
+
+        attempt.add_done_callback(_settle)
+        result.add_done_callback(_cancel)
+        return result
+
+    async def _await(self, call: LLMCall, priority: Priority, timeout: Optional[float]) -> str:
+        """Await ``call``; if the awaiting task is cancelled the call is dropped or aborted."""
+        if call.cancel is None:
+            call.cancel = threading.Event()
+        future = self.submit(call, priority, timeout)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            self.abort(call)
+            raise
+
+    def abort(self, call: LLMCall) -> None:
+        """Stop ``call``: a queued call is skipped, a running one is cancelled.
+
+        Ollama requests are closed; llama.cpp stops at the next token.
+        """
+        if call.cancel is not None:
+            call.cancel.set()
+        if self._loop is not None:
+            for scheduler in self.schedulers.values():
+                self._loop.call_soon_threadsafe(scheduler.abort, call)
+
+    def capacity(self, backend: Optional[str] = None) -> int:
+        """Number of calls the (routed) backend runs at the same time."""
+        return self.schedulers[backend or self.route()].backend.workers
+
+    def _cache_key(self, call: LLMCall, backend: Any) -> Optional[str]:
+        if not call.cache or call.on_token is not None or self.cache is None or not self.cache.enabled:
+            return None
+        return completion_key(
+            backend=backend.name,
+            model=backend.model_for(call),
+            prompt=call.prompt,
+            messages=call.messages,
+            as_json=call.as_json,
+            temperature=call.temperature,
+            max_tokens=call.max_tokens,
+        )
+
+    def _store(self, key: str, call: LLMCall, text: str) -> None:
+        if call.as_json:
+            try:
+                extract_json(text)
+            except ValueError:
+                return
+        if self.cache is not None:
+            self.cache.put(key, text)
+
+    def generate(
+        self,
+        prompt: str,
+        *,
+        as_json: bool = False,
+        temperature: Optional[float] = None,
+        max_tokens: int = 512,
+        model: Optional[str] = None,
+        priority: Priority = Priority.NORMAL,
+        timeout: Optional[float] = None,
+        cache: bool = False,
+    ) -> str:
+        """Blocking completion; returns the generated text."""
+        call = LLMCall(
+            prompt=prompt, model=model, as_json=as_json, temperature=temperature, max_tokens=max_tokens, cache=cache
+        )
+        return self.submit(call, priority, timeout).result()
+
+    async def agenerate(
+        self,
+        prompt: str,
+        *,
+        as_json: bool = False,
+        temperature: Optional[float] = None,
+        max_tokens: int = 512,
+        model: Optional[str] = None,
+        priority: Priority = Priority.NORMAL,
+        timeout: Optional[float] = None,
+        cache: bool = False,
+    ) -> str:
+        """Async completion; cancelling the awaiting task drops a still-queued call."""
+        call = LLMCall(
+            prompt=prompt, model=model, as_json=as_json, temperature=temperature, max_tokens=max_tokens, cache=cache
+        )
+        return await self._await(call, priority, timeout)
+
+    async def achat(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        as_json: bool = False,
+        max_tokens: int = 1024,
+        model: Optional[str] = None,
+        priority: Priority = Priority.NORMAL,
+        timeout: Optional[float] = None,
+        cache: bool = False,
+    ) -> str:
+        """Async chat completion (flattened into one prompt on llama.cpp)."""
+        call = LLMCall(messages=messages, model=model, as_json=as_json, max_tokens=max_tokens, cache=cache)
+        return await self._await(call, priority, timeout)
+
+    def stream(
+        self,
+        prompt: str,
+        *,
+        as_json: bool = False,
+        temperature: Optional[float] = None,
+        max_tokens: int = 512,
+        model: Optional[str] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Iterator[str]:
+        """Yield fragments as the backend produces them (blocking iterator).
+
+        Setting ``cancel`` or closing the iterator stops the generation.
+        """
+        tokens: "queue.Queue[Any]" = queue.Queue()
+        cancel = cancel or threading.Event()
+        call = LLMCall(
+            prompt=prompt,
+            model=model,
+            as_json=as_json,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            on_token=tokens.put,
+            cancel=cancel,
+        )
+        future = self.submit(call, priority, timeout)
+        future.add_done_callback(lambda _: tokens.put(_END))
+        try:
+            while True:
+                item = tokens.get()
+                if item is _END:
+                    break
+                yield item
+            error = None if future.cancelled() else future.exception()
+            if error is not None:
+                raise error
+        finally:
+            cancel.set()
+            future.cancel()
+
+    async def aalive(self, timeout: float = 2.0) -> bool:
+        """Whether the routed backend can serve calls.
+
+        Answers from the cached health state; probes (at most ``timeout``
+        seconds) only when that state is unknown or stale.
+        """
+        name = self.route()
+        if self.health.is_fresh(name):
+            return bool(self.health.state(name).alive)
+        loop = self._ensure_loop()
+        probe = asyncio.run_coroutine_threadsafe(self.health.probe(name, timeout), loop)
+        return bool((await asyncio.wrap_future(probe)).alive)
+
+    def alive(self, timeout: float = 2.0) -> bool:
+        name = self.route()
+        if self.health.is_fresh(name):
+            return bool(self.health.state(name).alive)
+        loop = self._ensure_loop()
+        return bool(asyncio.run_coroutine_threadsafe(self.health.probe(name, timeout), loop).result())
+
+    def health_report(self) -> Dict[str, Any]:
+        """Cached health of every backend plus its recent request latency."""
+        backends = self.health.snapshot()
+        for name, entry in backends.items():
+            stats = self.schedulers[name].stats()
+            entry["latency_p50_ms"] = stats["latency_p50_ms"]
+            entry["latency_p95_ms"] = stats["latency_p95_ms"]
+        preferred = backends[self.preferred]["alive"]
+        if preferred:
+            status = "ok"
+        elif any(entry["alive"] for entry in backends.values()):
+            status = "degraded"
+        elif preferred is None:
+            status = "unknown"
+        else:
+            status = "down"
+        return {
+            "status": status,
+            "preferred_backend": self.preferred,
+            "routed_backend": self.route(),
+            "probe_interval_s": self.health.interval,
+            "backends": backends,
+        }
+
+    def shutdown(self) -> None:
+        """Stop workers, close backends, the completion cache and the scheduler loop."""
+        if self.cache is not None:
+            self.cache.close()
+        if self._loop is None:
+            return
+        loop, self._loop = self._loop, None
+
+        async def _close() -> None:
+            if self._health_task is not None:
+                self._health_task.cancel()
+            for scheduler in self.schedulers.values():
+                scheduler.stop()
+                await scheduler.backend.aclose()
+
+        try:
+            asyncio.run_coroutine_threadsafe(_close(), loop).result(timeout=5)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "preferred_backend": self.preferred,
+            "backends": {
+                name: {**scheduler.stats(), **scheduler.backend.stats()}
+                for name, scheduler in self.schedulers.items()
+            },
+            "cache": self.cache.stats() if self.cache is not None else {"enabled": False},
+        }
+
+
+_SERVICE: Optional[LLMService] = None
+_SERVICE_LOCK = threading.Lock()
+
+
+def llama_cpp_model_path() -> Optional[str]:
+    """Configured llama.cpp model path if llama.cpp is installed and the file exists."""
+    path = os.getenv("LLAMA_CPP_MODEL_PATH")
+    if LLAMA_CPP_AVAILABLE and path and os.path.exists(path):
+        return path
+    return None
+
+
+def llm_cache_path() -> Optional[Path]:
+    """``LLM_CACHE_PATH`` or ``<db>.llm_cache.sqlite3`` next to a file-backed SQLite database."""
+    configured = os.getenv("LLM_CACHE_PATH")
+    if configured:
+        return Path(configured)
+    url = get_settings().database_url
+    if not url.startswith("sqlite:///") or url.endswith(":memory:"):
+        return None
+    db_path = Path(url[len("sqlite:///"):])
+    return db_path.with_name(f"{db_path.stem}.llm_cache.sqlite3")
+
+
+def get_llm_service() -> LLMService:
+    """Return the process-wide LLM service (configured from the environment)."""
+    global _SERVICE
+    with _SERVICE_LOCK:
+        if _SERVICE is None:
+            client = get_llm_client()
+            available: Dict[str, Any] = {}
+            model_path = llama_cpp_model_path()
+            if model_path:
+                available[LlamaCppBackend.name] = LlamaCppBackend(
+                    model_path,
+                    n_ctx=int(os.getenv("LLAMA_CPP_N_CTX", "8192")),
+                    preload=os.getenv("LLAMA_CPP_PRELOAD", "1").strip().lower() not in ("0", "false", "no", "off"),
+                    max_memory_mb=int(os.getenv("LLAMA_CPP_MAX_MEMORY_MB", "0")),
+                )
+            available[OllamaBackend.name] = OllamaBackend(
+                client, model=os.getenv("OLLAMA_MODEL", "llama3.1"), workers=client.max_concurrency
+            )
+            order = [name.strip() for name in os.getenv("LLM_BACKENDS", "llama_cpp,ollama_http").split(",")]
+            backends = [available.pop(name) for name in order if name in available]
+            backends.extend(available.values())
+            cache = None
+            if os.getenv("LLM_CACHE_ENABLED", "1").strip().lower() not in ("0", "false", "no", "off"):
+                cache = LLMCompletionCache(
+                    llm_cache_path(),
+                    max_entries=int(os.getenv("LLM_CACHE_SIZE", "5000")),
+                    ttl_seconds=float(os.getenv("LLM_CACHE_TTL", "604800")),
+                )
+            _SERVICE = LLMService(
+                backends,
+                max_queue=int(os.getenv("LLM_MAX_QUEUE", "64")),
+                default_timeout=float(os.getenv("OLLAMA_TIMEOUT", "100")),
+                cache=cache,
+                health_interval=float(os.getenv("LLM_HEALTH_INTERVAL", "15")),
+            )
+        return _SERVICE
+
+
+def shutdown_llm_service() -> None:
+    """Stop the scheduler loop (application shutdown)."""
+    global _SERVICE
+    with _SERVICE_LOCK:
+        if _SERVICE is not None:
+            _SERVICE.shutdown()
+            _SERVICE = None
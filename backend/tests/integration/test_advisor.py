@@ -7,7 +7,8 @@ from sqlmodel import select
 from app.models.foods import Food
 from app.models.meals import Meal, MealItem
 from app.models.recipes import Recipe, RecipeItem
-from app.routers import advisor
+from app.routers.advisor.routes import compose as compose_route
+from app.routers.advisor.routes import recommendations as recommendations_route
 from app.utils import llm as llm_utils
 
 
@@ -24,6 +25,13 @@ def _seed_foods(session):
     return foods
 
 
+def _fake_alive(alive: bool):
+    async def _alive(timeout=2):
+        return alive
+
+    return _alive
+
+
 def _add_meal(session, meal_day: date, food: Food, grams: float = 200.0) -> Meal:
     meal = Meal(day=meal_day)
     session.add(meal)
@@ -53,11 +61,9 @@ async def test_advisor_gaps_calculates_remaining(client, db_session):
 
 @pytest.mark.asyncio
 async def test_advisor_compose_fallback_without_llm(client, db_session, monkeypatch):
-    monkeypatch.setattr(advisor.SETTINGS, "advisor_llm_enabled", False)
+    monkeypatch.setattr(compose_route.SETTINGS, "advisor_llm_enabled", False)
     _seed_foods(db_session)
-    monkeypatch.setattr(advisor, "_ollama_alive", lambda timeout=2: False)
-    monkeypatch.setattr(advisor, "LLAMA_CPP_AVAILABLE", False)
-    monkeypatch.setattr(advisor, "LLAMA_CPP_MODEL_PATH", None)
+    monkeypatch.setattr(compose_route, "_aollama_alive", _fake_alive(False))
 
     response = await client.post(
         "/advisor/compose",
@@ -78,13 +84,11 @@ async def test_advisor_compose_fallback_without_llm(client, db_session, monkeypa
 
 @pytest.mark.asyncio
 async def test_advisor_compose_persists_llm_recipes(client, db_session, monkeypatch):
-    monkeypatch.setattr(advisor.SETTINGS, "advisor_llm_enabled", True)
+    monkeypatch.setattr(compose_route.SETTINGS, "advisor_llm_enabled", True)
     _seed_foods(db_session)
-    monkeypatch.setattr(advisor, "_ollama_alive", lambda timeout=2: True)
-    monkeypatch.setattr(advisor, "LLAMA_CPP_AVAILABLE", False)
-    monkeypatch.setattr(advisor, "LLAMA_CPP_MODEL_PATH", None)
+    monkeypatch.setattr(compose_route, "_aollama_alive", _fake_alive(True))
 
-    def fake_llm_generate_json(*_args, **_kwargs):
+    async def fake_allm_generate_json(*_args, **_kwargs):
         return [
             {
                 "title": "Protein Bowl",
@@ -100,7 +104,7 @@ async def test_advisor_compose_persists_llm_recipes(client, db_session, monkeypa
             }
         ]
 
-    monkeypatch.setattr(llm_utils, "llm_generate_json", fake_llm_generate_json)
+    monkeypatch.setattr(llm_utils, "allm_generate_json", fake_allm_generate_json)
 
     response = await client.post(
         "/advisor/compose",
@@ -118,15 +122,13 @@ async def test_advisor_compose_persists_llm_recipes(client, db_session, monkeypa
 
 @pytest.mark.asyncio
 async def test_advisor_compose_prompt_allows_meal_logging(client, db_session, monkeypatch):
-    monkeypatch.setattr(advisor.SETTINGS, "advisor_llm_enabled", True)
-    monkeypatch.setattr(advisor, "_ollama_alive", lambda timeout=2: True)
-    monkeypatch.setattr(advisor, "LLAMA_CPP_AVAILABLE", False)
-    monkeypatch.setattr(advisor, "LLAMA_CPP_MODEL_PATH", None)
+    monkeypatch.setattr(compose_route.SETTINGS, "advisor_llm_enabled", True)
+    monkeypatch.setattr(compose_route, "_aollama_alive", _fake_alive(True))
     foods = _seed_foods(db_session)
 
     target_day = date.today() - timedelta(days=365)
 
-    def fake_llm_generate_json(*_args, **_kwargs):
+    async def fake_allm_generate_json(*_args, **_kwargs):
         return [
             {
                 "title": "Macro Balancing Dinner",
@@ -146,7 +148,7 @@ async def test_advisor_compose_prompt_allows_meal_logging(client, db_session, mo
             }
         ]
 
-    monkeypatch.setattr(llm_utils, "llm_generate_json", fake_llm_generate_json)
+    monkeypatch.setattr(llm_utils, "allm_generate_json", fake_allm_generate_json)
 
     compose_response = await client.post(
         "/advisor/compose",
@@ -189,7 +191,7 @@ async def test_advisor_compose_prompt_allows_meal_logging(client, db_session, mo
 
 @pytest.mark.asyncio
 async def test_advisor_recommendations_fallback_without_llm(client, db_session, monkeypatch):
-    monkeypatch.setattr(advisor.SETTINGS, "advisor_llm_enabled", False)
+    monkeypatch.setattr(recommendations_route.SETTINGS, "advisor_llm_enabled", False)
     foods = _seed_foods(db_session)
     target_day = date(2025, 1, 2)
     _add_meal(db_session, target_day, foods[1], grams=90)
@@ -197,7 +199,7 @@ async def test_advisor_recommendations_fallback_without_llm(client, db_session,
     def _raise_http_exc(*_args, **_kwargs):
         raise HTTPException(status_code=503, detail="offline")
 
-    monkeypatch.setattr(advisor, "_ollama_generate", _raise_http_exc)
+    monkeypatch.setattr(recommendations_route, "_ollama_generate", _raise_http_exc)
 
     response = await client.get(
         "/advisor/recommendations",
@@ -212,3 +214,135 @@ async def test_advisor_recommendations_fallback_without_llm(client, db_session,
     payload = response.json()
     assert payload["suggestions"], payload
     assert all(s["source"] == "db" for s in payload["suggestions"])
+
+
+@pytest.mark.asyncio
+async def test_advisor_chat_stream_relays_tokens(client, monkeypatch):
+    from app.routers.advisor.routes import chat as chat_route
+
+    def _fake_stream(prompt, as_json=False, cancel=None, **kwargs):
+        yield "Hallo"
+        yield " Welt"
+
+    monkeypatch.setattr(chat_route, "_llm_stream", _fake_stream)
+
+    response = await client.post("/advisor/chat/stream", json={"message": "Hi"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block for block in response.text.split("\n\n") if block]
+    assert events[0] == 'event: token\ndata: {"text": "Hallo"}'
+    assert events[-1].startswith("event: done")
+
+    response = await client.post("/advisor/chat/stream", params={"format": "ndjson"}, json={"message": "Hi"})
+    lines = [line for line in response.text.splitlines() if line]
+    assert lines[:2] == ['{"type": "token", "text": "Hallo"}', '{"type": "token", "text": " Welt"}']
+
+
+@pytest.mark.asyncio
+async def test_advisor_chat_stream_cancels_generation_on_disconnect(monkeypatch):
+    import threading
+
+    from app.routers.advisor.routes import chat as chat_route
+
+    seen_cancel = []
+    finished = threading.Event()
+
+    def _endless_stream(prompt, as_json=False, cancel=None, **kwargs):
+        seen_cancel.append(cancel)
+        try:
+            while not cancel.wait(0.01):
+                yield "x"
+        finally:
+            finished.set()
+
+    monkeypatch.setattr(chat_route, "_llm_stream", _endless_stream)
+
+    frames = chat_route._relay_tokens("prompt", False, "ndjson")
+    assert await frames.__anext__() == '{"type": "token", "text": "x"}\n'
+    await frames.aclose()  # what Starlette does when the client goes away
+    assert seen_cancel[0].is_set()
+    assert finished.wait(1.0)
+
+
+@pytest.mark.asyncio
+async def test_compose_parallel_ideas_return_early_and_cancel_the_rest(monkeypatch):
+    import asyncio
+    from types import SimpleNamespace
+
+    from app.routers.advisor.routes import compose as compose_route
+
+    cancelled = []
+
+    async def _fake_one_idea(state, variant, variants, timeout):
+        if variant == 1:
+            raise ValueError("kaputtes JSON")
+        if variant == 4:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(variant)
+                raise
+        await asyncio.sleep(0.01 * variant)
+        return {"title": f"Idee {variant}", "instructions": ["kochen"]}
+
+    monkeypatch.setattr(compose_route, "_generate_one_idea", _fake_one_idea)
+    monkeypatch.setattr(compose_route, "COMPOSE_LLM_EXTRA_REQUESTS", 2)
+    monkeypatch.setattr(compose_route, "get_llm_service", lambda: SimpleNamespace(capacity=lambda: 4))
+
+    state = SimpleNamespace(llm_slots=2, notes=[])
+    ideas = await asyncio.wait_for(compose_route._generate_ideas_in_parallel(state), timeout=2)
+    assert [idea["title"] for idea in ideas] == ["Idee 2", "Idee 3"]
+    assert cancelled == [4]
+    assert "2 gueltige Idee(n)" in state.notes[-1]
+
+
+@pytest.mark.asyncio
+async def test_compose_latency_budget_skips_llm_stage(client, db_session, monkeypatch):
+    from app.routers.advisor.routes import compose as compose_route
+
+    monkeypatch.setattr(compose_route.SETTINGS, "advisor_llm_enabled", True)
+    _seed_foods(db_session)
+
+    async def _unexpected_llm_call(*_args, **_kwargs):
+        raise AssertionError("LLM must not be called without budget")
+
+    monkeypatch.setattr(compose_route, "_aollama_alive", _unexpected_llm_call)
+
+    response = await client.post(
+        "/advisor/compose",
+        headers={"X-Latency-Budget-Ms": "500"},
+        json={"message": "proteinreiches Abendessen", "servings": 1},
+    )
+    assert response.status_code == 200, response.text
+    payload = response.json()
+    assert payload["ideas"]
+    assert "Zeitbudget: LLM uebersprungen (Budget zu knapp)." in payload["notes"]
+
+
+@pytest.mark.asyncio
+async def test_compose_parallel_ideas_return_partial_results_at_the_deadline(monkeypatch):
+    import asyncio
+    from types import SimpleNamespace
+
+    from app.routers.advisor.routes import compose as compose_route
+
+    async def _fake_one_idea(state, variant, variants, timeout):
+        await asyncio.sleep(0.01 if variant == 1 else 5)
+        return {"title": f"Idee {variant}", "instructions": ["kochen"]}
+
+    monkeypatch.setattr(compose_route, "_generate_one_idea", _fake_one_idea)
+    monkeypatch.setattr(compose_route, "get_llm_service", lambda: SimpleNamespace(capacity=lambda: 4))
+
+    state = SimpleNamespace(llm_slots=2, notes=[])
+    ideas = await compose_route._generate_ideas_in_parallel(state, timeout=0.2)
+    assert [idea["title"] for idea in ideas] == ["Idee 1"]
+    assert "nach 1 von 2 Idee(n) beendet" in " ".join(state.notes)
+
+
+@pytest.mark.asyncio
+async def test_advisor_cache_stats_include_embedding_metrics(client):
+    response = await client.get("/advisor/cache")
+    assert response.status_code == 200, response.text
+    embeddings = response.json()["embeddings"]
+    assert set(embeddings) == {"client", "query_cache"}
+    assert "hits" in embeddings["query_cache"] or embeddings["query_cache"] == {"enabled": False}
@@ -77,3 +77,30 @@ async def test_meals_day_totals(client, test_app):
         "carbs_g": exp_carbs,
         "fat_g": exp_fat,
     }
+
+
+@pytest.mark.asyncio
+async def test_food_search_uses_fts_index(client, test_app, db_session):
+    from app.core import database as core_database
+    from app.core.fts import ensure_fts
+    from app.models.foods_extra import FoodSynonym
+
+    assert ensure_fts(core_database.engine)
+    quark = Food(name="Magerquark", kcal=67, protein_g=12, carbs_g=4, fat_g=0.2)
+    db_session.add_all([quark, Food(name="Quark 40%", kcal=140, protein_g=11, carbs_g=3, fat_g=10)])
+    db_session.commit()
+    db_session.add(FoodSynonym(food_id=quark.id, synonym="low fat curd"))
+    db_session.commit()
+
+    # Substring match inside a compound word, ranked alongside the word match.
+    r = await client.get("/foods/search", params={"q": "quark"})
+    assert r.status_code == 200
+    assert sorted(r.json()) == ["Magerquark", "Quark 40%"]
+
+    # Synonyms are searchable too.
+    r = await client.get("/foods/search", params={"q": "curd"})
+    assert r.json() == ["Magerquark"]
+
+    # Too short for the trigram index: falls back to LIKE.
+    r = await client.get("/foods/search", params={"q": "qu"})
+    assert sorted(r.json()) == ["Magerquark", "Quark 40%"]
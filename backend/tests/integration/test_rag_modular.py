@@ -7,6 +7,7 @@ Tests cover:
 - End-to-end RAG pipeline
 """
 
+import numpy as np
 import pytest
 from datetime import date
 from typing import List
@@ -14,9 +15,12 @@ from sqlmodel import Session, select
 
 from app.models.recipes import Recipe, RecipeItem
 from app.models.foods import Food
+from app.rag.ann import IVFFlatIndex
 from app.rag.indexer import RecipeIndexer, RecipeEmbedding
+from app.rag.vector_store import RecipeVectorStore
 from app.rag.preprocess import QueryPreprocessor
 from app.rag.postprocess import PostProcessor
+from app.rag.reindex import RecipeReindexState, ReindexJob, ReindexRunner
 from app.routers.advisor.helpers import _infer_required_ingredients
 
 
@@ -162,9 +166,401 @@ def test_indexer_clear_index(db_session: Session, sample_recipes: List[Recipe]):
     assert indexer.get_cached_count() == 0
 
 
+def test_indexer_search_uses_vector_store(db_session: Session, sample_recipes: List[Recipe]):
+    """Test that search ranks indexed recipes by cosine similarity."""
+
+    def _axis_client(texts: List[str]) -> List[List[float]]:
+        # One-hot vectors keyed by title so each recipe points in its own direction.
+        vectors = []
+        for text in texts:
+            vec = [0.0] * 4
+            if "Oatmeal" in text:
+                vec[0] = 1.0
+            elif "Chicken" in text:
+                vec[1] = 1.0
+            else:
+                vec[2] = 1.0
+            vectors.append(vec)
+        return vectors
+
+    indexer = RecipeIndexer(db_session, embedding_client=_axis_client)
+    indexed = indexer.ensure_indexed(sample_recipes)
+    assert indexed == {r.id for r in sample_recipes}
+
+    hits = indexer.search([0.2, 1.0, 0.0, 0.0], top_k=2)
+    assert [recipe_id for recipe_id, _ in hits] == [sample_recipes[1].id, sample_recipes[0].id]
+    assert hits[0][1] > hits[1][1]
+
+    restricted = indexer.search([0.2, 1.0, 0.0, 0.0], top_k=5, recipe_ids=[sample_recipes[2].id])
+    assert [recipe_id for recipe_id, _ in restricted] == [sample_recipes[2].id]
+
+    indexer.clear_index()
+    assert indexer.search([0.2, 1.0, 0.0, 0.0], top_k=2) == []
+
+
+def test_indexer_stores_binary_vectors(db_session: Session, sample_recipes: List[Recipe]):
+    """Test that vectors are persisted as BLOBs and legacy JSON rows stay readable."""
+    indexer = RecipeIndexer(db_session, embedding_client=_mock_embedding_client, storage_dtype="float16")
+    recipe, legacy = sample_recipes[0], sample_recipes[1]
+    indexer.index_recipe(recipe, QueryPreprocessor.build_document(recipe))
+
+    record = db_session.get(RecipeEmbedding, recipe.id)
+    assert record.embedding is None
+    assert record.dim == 384 and record.dtype == "float16"
+    assert len(record.vector) == 384 * 2
+
+    db_session.add(RecipeEmbedding(recipe_id=legacy.id, embedding=[0.5] * 384, document_text="legacy"))
+    db_session.commit()
+
+    batch = indexer.get_embeddings_batch([recipe.id, legacy.id])
+    assert batch[recipe.id].dtype == np.float32
+    assert batch[recipe.id][0] == pytest.approx(0.1, rel=1e-3)
+    assert batch[legacy.id].tolist() == [0.5] * 384
+
+
+def test_ensure_embedding_schema_upgrades_legacy_table(tmp_path):
+    """A pre-BLOB table (JSON NOT NULL, no vector columns) is rebuilt and stays readable."""
+    from sqlalchemy import inspect, text
+    from sqlmodel import SQLModel, create_engine
+
+    from app.rag.indexer import ensure_embedding_schema
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE recipe_embeddings (recipe_id INTEGER NOT NULL PRIMARY KEY REFERENCES recipe(id), "
+                "embedding JSON NOT NULL, document_text TEXT NOT NULL, model_name VARCHAR NOT NULL, "
+                "updated_at DATETIME NOT NULL)"
+            )
+        )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Recipe(id=1, title="Legacy Bowl"))
+        session.commit()
+    with engine.begin() as connection:
+        connection.execute(
+            text("INSERT INTO recipe_embeddings VALUES (1, '[0.5, 0.25]', 'legacy', 'all-MiniLM-L6-v2', '2024-01-01')")
+        )
+
+    assert ensure_embedding_schema(engine)
+    assert not ensure_embedding_schema(engine)
+    columns = {column["name"]: column for column in inspect(engine).get_columns("recipe_embeddings")}
+    assert {"vector", "dim", "dtype", "content_hash"} <= set(columns)
+    assert columns["embedding"]["nullable"]
+
+    with Session(engine) as session:
+        indexer = RecipeIndexer(session, embedding_client=_mock_embedding_client)
+        assert indexer.get_embedding(1) == [0.5, 0.25]
+        recipe = session.get(Recipe, 1)
+        indexer.index_recipe(recipe, QueryPreprocessor.build_document(recipe))
+        assert session.get(RecipeEmbedding, 1).embedding is None
+
+
+def test_indexer_reembeds_only_changed_recipes(db_session: Session, sample_recipes: List[Recipe]):
+    """Test that content hashes limit re-embedding to edited recipes and model changes."""
+    calls: List[List[str]] = []
+
+    def client(texts: List[str]) -> List[List[float]]:
+        calls.append(texts)
+        return _mock_embedding_client(texts)
+
+    indexer = RecipeIndexer(db_session, embedding_client=client)
+    docs = lambda: [QueryPreprocessor.build_document(r) for r in sample_recipes]  # noqa: E731
+    indexer.batch_index(sample_recipes, docs())
+    assert db_session.get(RecipeEmbedding, sample_recipes[0].id).content_hash == indexer.content_hash(docs()[0])
+
+    sample_recipes[1].title = "Chicken Quinoa Bowl"
+    db_session.add(sample_recipes[1])
+    db_session.commit()
+    indexer.batch_index(sample_recipes, docs())
+    assert len(calls) == 2 and calls[1] == [docs()[1]]
+
+    indexer = RecipeIndexer(db_session, embedding_client=client, model_version="2")
+    indexer.batch_index(sample_recipes, docs())
+    assert len(calls[2]) == 3
+
+
+def test_ensure_indexed_refreshes_edited_recipes(db_session: Session, sample_recipes: List[Recipe]):
+    """Request-path indexing re-embeds recipes whose content hash changed, and only those."""
+    calls: List[List[str]] = []
+
+    def client(texts: List[str]) -> List[List[float]]:
+        calls.append(texts)
+        return _mock_embedding_client(texts)
+
+    indexer = RecipeIndexer(db_session, embedding_client=client)
+    assert indexer.ensure_indexed(sample_recipes) == {r.id for r in sample_recipes}
+    indexer.ensure_indexed(sample_recipes)
+    assert len(calls) == 1
+
+    sample_recipes[2].title = "Vegetarian Lasagne"
+    db_session.add(sample_recipes[2])
+    db_session.commit()
+    indexer.ensure_indexed(sample_recipes)
+    assert calls[1] == [QueryPreprocessor.build_document(sample_recipes[2])]
+    stored = db_session.get(RecipeEmbedding, sample_recipes[2].id)
+    assert stored.content_hash == indexer.content_hash(calls[1][0])
+
+
+def test_vector_store_ivf_matches_exact_search(tmp_path):
+    """Test that the IVF candidate search agrees with the full scan and survives a reload."""
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(400, 32)).astype(np.float32)
+    query = vectors[123] + 0.01
+
+    exact = RecipeVectorStore()
+    exact.load(enumerate(vectors))
+
+    store = RecipeVectorStore()
+    store.load(enumerate(vectors))
+    path = tmp_path / "recipes.recipe_ann.npz"
+    store.configure_ann(IVFFlatIndex(nprobe=4), path, min_size=100)
+    assert store.ann_active()
+    assert store.top_k(query, 1) == exact.top_k(query, 1)
+    assert store.top_k(query, 1)[0][0] == 123
+
+    assert store.save_ann(force=True)
+    reloaded = RecipeVectorStore()
+    reloaded.load(enumerate(vectors[:-1]))
+    reloaded.configure_ann(IVFFlatIndex(nprobe=4), path, min_size=100)
+    assert reloaded.ann.ids() == set(range(399))
+    reloaded.upsert(1000, vectors[123] * 2)
+    assert 1000 in reloaded.ann.ids()
+    assert {rid for rid, _ in reloaded.top_k(query, 2)} == {123, 1000}
+
+
+def test_reindex_job_resumes_after_failure(db_session: Session, sample_recipes: List[Recipe]):
+    """Test that a failed chunk keeps the checkpoint and a rerun finishes the library."""
+    calls: List[int] = []
+
+    def flaky_client(texts: List[str]):
+        calls.append(len(texts))
+        return None if len(calls) == 2 else _mock_embedding_client(texts)
+
+    job = ReindexJob(db_session, RecipeIndexer(db_session, embedding_client=flaky_client), chunk_size=2)
+    progress = job.run()
+    assert progress.status == "failed"
+    assert progress.processed == 2
+    assert db_session.get(RecipeReindexState, "recipes").last_recipe_id == sample_recipes[1].id
+
+    job = ReindexJob(db_session, RecipeIndexer(db_session, embedding_client=flaky_client), chunk_size=2)
+    progress = job.run()
+    assert progress.status == "completed"
+    assert progress.resumed_from == 2 and progress.processed == progress.total == 3
+    assert calls == [2, 1, 1]
+
+
+def test_reindex_runner_runs_in_background(db_session: Session, sample_recipes: List[Recipe]):
+    """Test that the runner reindexes with --force semantics in a worker thread."""
+    runner = ReindexRunner()
+    factory = lambda session: RecipeIndexer(session, embedding_client=_mock_embedding_client)  # noqa: E731
+    assert runner.start(db_session.get_bind(), factory, chunk_size=2, force=True)
+    runner.wait(timeout=10)
+
+    status = runner.status()
+    assert status["status"] == "completed"
+    assert status["processed"] == 3 and status["eta_s"] == 0
+    assert RecipeIndexer(db_session).get_cached_count() == 3
+
+
 # ==================== Preprocessor Tests ====================
 
 
+def test_fts_prefilter_returns_only_matching_recipes(db_session: Session, sample_recipes: List[Recipe]):
+    """The FTS5 recipe index is backfilled, kept in sync by triggers and ranks matches."""
+    from app.core.fts import ensure_fts, search_recipe_ids
+    from app.routers.advisor.rag import _fts_prefiltered_recipes
+    from app.routers.advisor.schemas import Prefs
+
+    assert ensure_fts(db_session.get_bind())
+    hits = search_recipe_ids(db_session, "chick", limit=10)
+    assert [recipe_id for recipe_id, _ in hits] == [sample_recipes[1].id]
+
+    recipe = Recipe(title="Lentil Curry", tags="dinner")
+    db_session.add(recipe)
+    db_session.flush()
+    db_session.add(RecipeItem(recipe_id=recipe.id, name="Red lentils", grams=80.0))
+    db_session.commit()
+    assert [recipe_id for recipe_id, _ in search_recipe_ids(db_session, "lentils", limit=10)] == [recipe.id]
+
+    result = _fts_prefiltered_recipes(db_session, "protein dinner", Prefs(), {}, [], limit=2)
+    assert result is not None
+    recipes, scores = result
+    assert {r.id for r in recipes} <= set(scores)
+    assert max(scores.values()) == 1.0
+    # Too few matches for the requested limit: caller falls back to a full scan.
+    assert _fts_prefiltered_recipes(db_session, "lentils", Prefs(), {}, [], limit=2) is None
+
+
+def test_keyword_index_follows_recipe_commits(db_session: Session, sample_recipes: List[Recipe]):
+    """The BM25 index is loaded once and then updated by commits, not by reads."""
+    from app.rag.keyword_index import load_keyword_index
+
+    index = load_keyword_index(db_session)
+    assert len(index) == 3
+    assert [recipe_id for recipe_id, _ in index.search(["pasta"])] == [sample_recipes[2].id]
+
+    sample_recipes[2].title = "Mushroom Risotto"
+    sample_recipes[2].instructions_json = ["Stir the rice"]
+    db_session.add(sample_recipes[2])
+    lentils = Recipe(title="Lentil Curry", tags="dinner")
+    db_session.add(lentils)
+    db_session.flush()
+    db_session.add(RecipeItem(recipe_id=lentils.id, name="Red lentils", grams=80.0))
+    db_session.delete(sample_recipes[0])
+    db_session.commit()
+
+    assert index.search(["pasta"]) == []
+    assert [recipe_id for recipe_id, _ in index.search(["risotto"])] == [sample_recipes[2].id]
+    assert [recipe_id for recipe_id, _ in index.search(["lentils"])] == [lentils.id]
+    assert index.search(["oatmeal"]) == []
+    assert len(index) == 3
+
+
+def test_hybrid_prefilter_fuses_dense_and_keyword_rankings(
+    db_session: Session, sample_recipes: List[Recipe], monkeypatch
+):
+    """Hybrid retrieval ranks recipes found by both retrievers first."""
+    from app.routers.advisor import rag as advisor_rag
+    from app.routers.advisor.schemas import Prefs
+
+    def _pasta_client(texts: List[str]) -> List[List[float]]:
+        return [[1.0, 0.0] if "Pasta" in text else [0.0, 1.0] for text in texts]
+
+    indexer = RecipeIndexer(db_session, embedding_client=_pasta_client)
+    indexer.ensure_indexed(sample_recipes)
+    # The query embeds like "Pasta"; keywords point at the chicken bowl.
+    monkeypatch.setattr(advisor_rag, "_embed_queries", lambda texts: [[1.0, 0.0] for _ in texts])
+
+    result, filtered = advisor_rag._hybrid_prefiltered_recipes(
+        db_session, indexer, "vegetarian pasta chicken", Prefs(), {}, [], limit=2
+    )
+    assert result.dense_status == "ok"
+    assert filtered is not None
+    top_two = {recipe.title for recipe in filtered[:2]}
+    assert top_two == {"Vegetarian Pasta", "Chicken Rice Bowl"}
+    assert filtered[0].title == "Vegetarian Pasta"  # first in both rankings
+
+
+def test_sql_filters_match_python_predicate(db_session: Session, sample_recipes: List[Recipe]):
+    """Preference, kcal and ingredient filters run in SQL with the same results."""
+    from app.core.recipe_tags import ensure_recipe_tags
+    from app.models.recipes import RecipeTag
+    from app.routers.advisor.rag import _load_filtered_recipes, _recipe_passes_filters
+    from app.routers.advisor.schemas import Prefs
+
+    pork = Recipe(title="Schweinebraten", tags="Schwein, German", macros_kcal=900.0)
+    untagged = Recipe(title="Plain Rice")
+    db_session.add(pork)
+    db_session.add(untagged)
+    db_session.flush()
+    db_session.add(RecipeItem(recipe_id=pork.id, name=" Äpfel ", grams=80.0))
+    db_session.commit()
+    tags = db_session.exec(select(RecipeTag.tag).where(RecipeTag.recipe_id == pork.id)).all()
+    assert sorted(tags) == ["german", "schwein"]
+
+    sample_recipes[0].tags = "breakfast,vegan"
+    db_session.add(sample_recipes[0])
+    db_session.commit()
+    assert ensure_recipe_tags(db_session.get_bind()) == 0
+
+    cases = [
+        (Prefs(vegan=True), {}, []),
+        (Prefs(veggie=True), {}, []),
+        (Prefs(no_pork=True), {}, []),
+        (Prefs(cuisine_bias=["German"]), {}, []),
+        (Prefs(), {"max_kcal": 560}, []),
+        (Prefs(), {}, ["ingredient 1"]),
+        (Prefs(), {}, ["äpfel"]),
+        (Prefs(no_pork=True), {"max_kcal": 500}, ["ingredient 2"]),
+    ]
+    everything = db_session.exec(select(Recipe)).all()
+    for prefs, constraints, required in cases:
+        expected = {r.id for r in everything if _recipe_passes_filters(r, prefs, constraints, required)}
+        loaded = _load_filtered_recipes(db_session, prefs, constraints, required)
+        assert {r.id for r in loaded} == expected, (prefs, constraints, required)
+
+
+def test_recipes_matching_query_caches_until_library_changes(
+    db_session: Session, sample_recipes: List[Recipe], monkeypatch
+):
+    """Identical requests are served from the result cache until recipes change."""
+    from app.routers.advisor import rag as advisor_rag
+    from app.routers.advisor.schemas import ComposeRequest, Prefs
+
+    calls = []
+    original = advisor_rag._rank_library_recipes
+
+    def _counting(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(advisor_rag, "_rank_library_recipes", _counting)
+    monkeypatch.setattr(advisor_rag, "_embed_texts", _mock_embedding_client)
+    monkeypatch.setattr(advisor_rag, "_embed_queries", _mock_embedding_client)
+    req = ComposeRequest(message="protein  dinner", servings=1)
+
+    first, meta = advisor_rag._recipes_matching_query(db_session, req, Prefs(), {"max_kcal": 700}, limit=2)
+    assert meta["used_embeddings"] is True
+    first[0].tags.append("mutated")
+    second, cached_meta = advisor_rag._recipes_matching_query(
+        db_session, ComposeRequest(message="protein dinner", servings=1), Prefs(), {"max_kcal": 700}, limit=2
+    )
+    assert len(calls) == 1
+    assert cached_meta.get("cached") is True
+    assert [idea.title for idea in second] == [idea.title for idea in first]
+    assert "mutated" not in second[0].tags
+
+    db_session.add(Recipe(title="Protein Dinner Plate", tags="dinner,protein", macros_kcal=500.0))
+    db_session.commit()
+    advisor_rag._recipes_matching_query(db_session, req, Prefs(), {"max_kcal": 700}, limit=2)
+    assert len(calls) == 2
+
+
+def test_recipes_matching_query_skips_cache_without_query_vector(
+    db_session: Session, sample_recipes: List[Recipe], monkeypatch
+):
+    """Keyword-only rankings (embedding service down) are never cached."""
+    from app.routers.advisor import rag as advisor_rag
+    from app.routers.advisor.schemas import ComposeRequest, Prefs
+
+    calls = []
+    original = advisor_rag._rank_library_recipes
+
+    def _counting(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(advisor_rag, "_rank_library_recipes", _counting)
+    monkeypatch.setattr(advisor_rag, "_embed_queries", lambda texts: None)
+    req = ComposeRequest(message="protein dinner", servings=1)
+
+    _, meta = advisor_rag._recipes_matching_query(db_session, req, Prefs(), {"max_kcal": 700}, limit=2)
+    assert meta["used_embeddings"] is False
+    _, meta = advisor_rag._recipes_matching_query(db_session, req, Prefs(), {"max_kcal": 700}, limit=2)
+    assert len(calls) == 2
+    assert "cached" not in meta
+
+
+def test_reembedding_recipes_bumps_library_version(db_session: Session, sample_recipes: List[Recipe]):
+    """Embedding writes invalidate cached rankings like recipe edits do."""
+    from app.rag.result_cache import RetrievalResultCache, library_version
+
+    cache = RetrievalResultCache()
+    indexer = RecipeIndexer(db_session, embedding_client=_mock_embedding_client)
+    indexer.ensure_indexed(sample_recipes)
+    cache.put("query", ["cached"], library_version())
+
+    recipe = sample_recipes[0]
+    indexer.batch_index([recipe], [QueryPreprocessor.build_document(recipe)], force_refresh=True)
+    assert cache.get("query") is None
+
+    cache.put("query", ["cached"], library_version())
+    indexer.clear_index()
+    assert cache.get("query") is None
+
+
 def test_preprocessor_normalize_text():
     """Test text normalization."""
     # Test whitespace normalization
@@ -346,6 +742,54 @@ def test_postprocessor_score_batch(sample_recipes: List[Recipe]):
     assert scores == sorted(scores, reverse=True)
 
 
+def test_postprocessor_score_batch_matches_score_recipe():
+    """Vectorized batch scoring reproduces per-recipe scores and tie order exactly."""
+    rng = np.random.default_rng(7)
+    names = ["chicken", "rice", "oats", "banana", "tofu", "spinach", "peanut butter", "yogurt"]
+    recipes = []
+    for recipe_id in range(1, 61):
+        picked = rng.choice(len(names), size=int(rng.integers(0, 4)), replace=False)
+        kcal = None if recipe_id % 9 == 0 else float(rng.integers(150, 1100))
+        recipes.append(
+            Recipe(
+                id=recipe_id,
+                title=f"{names[recipe_id % len(names)]} bowl {recipe_id % 5}",
+                macros_kcal=kcal,
+                ingredients=[RecipeItem(name=names[i], grams=100.0) for i in picked],
+            )
+        )
+    query_vec = [0.1] * 8
+    recipe_vectors = {r.id: rng.random(8).tolist() for r in recipes if r.id % 3}
+    # Repeated values produce ties whose order must be preserved.
+    semantic_scores = {r.id: float(r.id % 4) / 4 for r in recipes if r.id % 5}
+
+    processor = PostProcessor()
+    for fallback in (False, True):
+        kwargs = dict(
+            query_vector=query_vec,
+            query_text="chicken rice bowl",
+            constraints={"max_kcal": 700, "remaining_kcal": 600},
+            use_keyword_fallback=fallback,
+            negative_ingredients=["tofu"],
+        )
+        expected = []
+        for recipe in recipes:
+            score = processor.score_recipe(
+                recipe=recipe,
+                recipe_vector=recipe_vectors.get(recipe.id),
+                semantic_score=semantic_scores.get(recipe.id),
+                **kwargs,
+            )
+            if score is not None:
+                expected.append((score, recipe))
+        expected.sort(key=lambda x: x[0], reverse=True)
+
+        scored = processor.score_batch(
+            recipes=recipes, recipe_vectors=recipe_vectors, semantic_scores=semantic_scores, **kwargs
+        )
+        assert [(s, r.id) for s, r in scored] == [(s, r.id) for s, r in expected]
+
+
 def test_postprocessor_filter_by_constraints(sample_recipes: List[Recipe]):
     """Test filtering recipes by constraints."""
     processor = PostProcessor()
@@ -0,0 +1,54 @@
+from app.rag.embedding_cache import EmbeddingCache
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_cache_hits_after_first_compute():
+    calls = []
+
+    def compute(texts):
+        calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    cache = EmbeddingCache(max_entries=8)
+    assert cache.get_or_compute("m", ["high  protein", "snack"], compute) == [[13.0], [5.0]]
+    # Whitespace differences map to the same key; only the new text is embedded.
+    assert cache.get_or_compute("m", ["high protein", "bowl"], compute) == [[13.0], [4.0]]
+    assert calls == [["high  protein", "snack"], ["bowl"]]
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 3
+
+
+def test_cache_is_keyed_by_model_and_evicts_lru():
+    cache = EmbeddingCache(max_entries=2)
+    cache.put("a", "x", [1.0])
+    cache.put("b", "x", [2.0])
+    assert cache.get("a", "x") == [1.0]
+    cache.put("a", "y", [3.0])  # evicts ("b", "x"), the least recently used
+    assert cache.get("b", "x") is None
+    assert cache.get("a", "x") == [1.0]
+
+
+def test_cache_ttl_and_failed_compute():
+    clock = FakeClock()
+    cache = EmbeddingCache(max_entries=4, ttl_seconds=60, clock=clock)
+    cache.put("m", "q", [1.0])
+    clock.now += 61
+    assert cache.get("m", "q") is None
+    assert cache.get_or_compute("m", ["q"], lambda texts: None) is None
+
+
+def test_cache_persists_to_disk(tmp_path):
+    path = tmp_path / "embed_cache.json"
+    cache = EmbeddingCache(max_entries=4, path=path, save_every=1)
+    cache.put("m", "q", [0.5, 0.25])
+    assert path.exists()
+
+    restored = EmbeddingCache(max_entries=4, path=path)
+    assert restored.get("m", "q") == [0.5, 0.25]
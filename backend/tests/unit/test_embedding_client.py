@@ -0,0 +1,89 @@
+import numpy as np
+
+from app.rag.embedding_client import EMBEDDING_MEDIA_TYPE, EmbeddingClient, pack_vectors, unpack_vectors
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code: int = 200, headers=None):
+        self._payload = payload
+        self.status_code = status_code
+        self.headers = headers or {"Content-Type": "application/json"}
+        self.content = payload if isinstance(payload, bytes) else b""
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError("HTTP error")
+
+    def json(self):
+        return self._payload
+
+
+def test_embedding_client_returns_vectors_and_records_latency(monkeypatch):
+    client = EmbeddingClient("http://embed.test/embed")
+    sent = []
+
+    def fake_post(url, json, timeout):
+        sent.append(json)
+        assert client.stats()["in_flight"] == 1
+        return FakeResponse({"vectors": [[0.1, 0.2] for _ in json["texts"]]})
+
+    monkeypatch.setattr(client._session, "post", fake_post)
+
+    vectors = client(["a", "b"])
+    assert vectors.dtype == np.float32
+    assert vectors.tolist() == np.float32([[0.1, 0.2], [0.1, 0.2]]).tolist()
+    assert sent == [{"texts": ["a", "b"]}]
+    stats = client.stats()
+    assert stats["calls"] == 1 and stats["failures"] == 0
+    assert stats["in_flight"] == 0
+    assert stats["circuit"] == "closed"
+    assert "p95" in stats["latency_ms"]
+
+
+def test_embedding_client_circuit_breaker_fails_fast(monkeypatch, capsys):
+    client = EmbeddingClient("http://embed.test/embed", failure_threshold=2, reset_timeout=60)
+    calls = []
+
+    def failing_post(url, json, timeout):
+        calls.append(json)
+        return FakeResponse({}, status_code=503)
+
+    monkeypatch.setattr(client._session, "post", failing_post)
+
+    assert client.embed(["a"]) is None
+    assert client.embed(["a"]) is None
+    # Circuit is open: no further HTTP calls are made.
+    assert client.embed(["a"]) is None
+    assert len(calls) == 2
+    assert client.stats()["rejected"] == 1
+    assert client.breaker.state == "open"
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 3 and all(line.startswith("[WARN] Embedding") for line in lines)
+
+
+def test_embedding_client_half_open_probe_closes_circuit(monkeypatch):
+    client = EmbeddingClient("http://embed.test/embed", failure_threshold=1, reset_timeout=0)
+    responses = [FakeResponse({}, status_code=500), FakeResponse({"vectors": [[1.0]]})]
+    monkeypatch.setattr(client._session, "post", lambda url, json, timeout: responses.pop(0))
+
+    assert client.embed(["a"]) is None
+    assert client.embed(["a"]).tolist() == [[1.0]]
+    assert client.breaker.state == "closed"
+
+
+def test_embedding_client_decodes_binary_payload(monkeypatch):
+    client = EmbeddingClient("http://embed.test/embed", wire_format="float16")
+    assert client._session.headers["Accept"].startswith(f"{EMBEDDING_MEDIA_TYPE}; dtype=float16")
+    matrix = np.array([[0.5, -1.0, 2.0], [0.25, 0.0, 1.5]], dtype=np.float32)
+    payload = pack_vectors(matrix, "float16")
+    assert len(payload) == 16 + matrix.size * 2
+
+    monkeypatch.setattr(
+        client._session,
+        "post",
+        lambda url, json, timeout: FakeResponse(payload, headers={"Content-Type": f"{EMBEDDING_MEDIA_TYPE}; dtype=float16"}),
+    )
+    vectors = client.embed(["a", "b"])
+    assert vectors.dtype == np.float32
+    assert np.array_equal(vectors, matrix)
+    assert np.array_equal(unpack_vectors(pack_vectors(matrix)), matrix)
@@ -0,0 +1,47 @@
+import threading
+
+from app.rag.hybrid import HybridRetriever, reciprocal_rank_fusion
+
+
+def test_rrf_rewards_agreement_between_rankings():
+    dense = [(1, 0.9), (2, 0.8), (3, 0.7)]
+    sparse = [(3, 12.0), (4, 9.0), (1, 1.0)]
+    fused = reciprocal_rank_fusion([dense, sparse], k=60)
+    assert [item_id for item_id, _ in fused][:2] == [1, 3]
+    assert {item_id for item_id, _ in fused} == {1, 2, 3, 4}
+    assert fused[0][1] == 1 / 61 + 1 / 63
+
+
+def test_hybrid_retriever_fuses_dense_and_sparse():
+    retriever = HybridRetriever(
+        embed_query=lambda text: [1.0, 0.0],
+        dense_search=lambda vector, k: [(1, 0.9), (2, 0.5)],
+        sparse_search=lambda text, k: [(2, 3.0), (3, 1.0)],
+    )
+    result = retriever.retrieve("oats")
+    assert result.dense_status == "ok"
+    assert result.query_vector == [1.0, 0.0]
+    assert result.fused[0][0] == 2
+    assert max(result.relevance().values()) == 1.0
+
+
+def test_hybrid_retriever_degrades_to_sparse_when_embedding_is_slow():
+    release = threading.Event()
+
+    def slow_embed(text):
+        release.wait(5)
+        return [1.0]
+
+    retriever = HybridRetriever(
+        embed_query=slow_embed,
+        dense_search=lambda vector, k: [(9, 1.0)],
+        sparse_search=lambda text, k: [(3, 2.0), (4, 1.0)],
+        dense_timeout=0.05,
+    )
+    try:
+        result = retriever.retrieve("oats")
+    finally:
+        release.set()
+    assert result.dense_status == "timeout"
+    assert result.query_vector is None
+    assert [item_id for item_id, _ in result.fused] == [3, 4]
@@ -0,0 +1,46 @@
+from collections import Counter
+
+from app.models.recipes import Recipe, RecipeItem
+from app.rag.features import RecipeFeatureStore
+from app.rag.keyword_index import BM25Index
+
+
+def _add(index: BM25Index, recipe_id: int, text: str) -> None:
+    index.add(recipe_id, Counter(text.split()))
+
+
+def test_bm25_prefers_rare_terms_and_only_touches_matches():
+    index = BM25Index()
+    _add(index, 1, "oats banana kcal")
+    _add(index, 2, "lentils curry kcal")
+    _add(index, 3, "rice kcal")
+
+    hits = index.search(["lentils", "kcal"])
+    assert [recipe_id for recipe_id, _ in hits][0] == 2
+    assert len(hits) == 3  # "kcal" is in every document, but scores low
+    assert index.search(["tofu"]) == []
+    assert [recipe_id for recipe_id, _ in index.search(["kcal"], candidate_ids={1, 3}, top_k=1)] in ([1], [3])
+
+
+def test_bm25_replace_and_remove():
+    index = BM25Index()
+    _add(index, 1, "oats banana")
+    _add(index, 1, "lentils curry")
+    assert index.search(["oats"]) == []
+    assert [recipe_id for recipe_id, _ in index.search(["curry"])] == [1]
+
+    index.remove([1])
+    assert len(index) == 0
+    assert index.search(["curry"]) == []
+
+
+def test_bm25_sync_reindexes_changed_recipes():
+    store = RecipeFeatureStore()
+    recipe = Recipe(id=7, title="Oat Bowl", ingredients=[RecipeItem(name="Oats", grams=50.0)])
+    index = BM25Index()
+    assert index.sync([(recipe.id, store.get(recipe))]) == 1
+    assert index.sync([(recipe.id, store.get(recipe))]) == 0
+
+    recipe.title = "Lentil Bowl"
+    assert index.sync([(recipe.id, store.get(recipe))]) == 1
+    assert [recipe_id for recipe_id, _ in index.search(["lentil"])] == [7]
@@ -0,0 +1,32 @@
+from app.utils.llm_cache import LLMCompletionCache, completion_key
+
+
+def test_completion_cache_persists_and_evicts(tmp_path):
+    now = [1000.0]
+    path = tmp_path / "llm_cache.sqlite3"
+    cache = LLMCompletionCache(path, max_entries=2, ttl_seconds=60, clock=lambda: now[0])
+    assert cache.get("a") is None
+    assert not path.exists()
+
+    cache.put("a", '{"items": []}')
+    now[0] += 1
+    cache.put("b", "B")
+    now[0] += 1
+    assert cache.get("a") == '{"items": []}'  # refreshes "a"
+    now[0] += 1
+    cache.put("c", "C")  # evicts least recently used "b"
+    assert cache.get("b") is None
+    cache.close()
+
+    reopened = LLMCompletionCache(path, max_entries=2, ttl_seconds=60, clock=lambda: now[0])
+    assert reopened.get("a") == '{"items": []}'
+    now[0] += 120
+    assert reopened.get("c") is None  # expired
+    assert reopened.stats()["hits"] == 1
+
+
+def test_completion_key_depends_on_sampling_options():
+    base = dict(backend="ollama_http", model="llama3.1", prompt="80 g Hafer", as_json=True, temperature=0.1)
+    assert completion_key(**base) == completion_key(**dict(base))
+    assert completion_key(**base) != completion_key(**{**base, "temperature": 0.7})
+    assert completion_key(**base) != completion_key(**{**base, "model": "mistral"})
@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.utils.llm_client import AsyncLLMClient, LLMQueueFull
+
+
+def _ollama_transport(release: asyncio.Event, seen: list) -> httpx.MockTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": []})
+        body = json.loads(request.content)
+        seen.append(body)
+        await release.wait()
+        if request.url.path == "/api/chat":
+            return httpx.Response(200, json={"message": {"content": '{"ideas": []}'}})
+        return httpx.Response(200, json={"response": "ok " + body["prompt"]})
+
+    return httpx.MockTransport(handler)
+
+
+async def test_client_limits_concurrency_and_reports_queue_depth():
+    release = asyncio.Event()
+    seen: list = []
+    client = AsyncLLMClient(
+        "http://ollama", max_concurrency=1, max_queue=1, transport=_ollama_transport(release, seen)
+    )
+
+    first = asyncio.create_task(client.generate("a", model="m"))
+    second = asyncio.create_task(client.generate("b", model="m", as_json=True, temperature=0.1))
+    await asyncio.sleep(0.01)
+    stats = client.stats()
+    assert stats["in_flight"] == 1
+    assert stats["queue_depth"] == 1
+
+    with pytest.raises(LLMQueueFull):
+        await client.generate("c", model="m")
+    assert client.stats()["rejected"] == 1
+
+    release.set()
+    assert await first == "ok a"
+    assert await second == "ok b"
+    assert seen[1]["format"] == "json" and seen[1]["options"] == {"temperature": 0.1}
+    stats = client.stats()
+    assert (stats["in_flight"], stats["queue_depth"], stats["calls"]) == (0, 0, 2)
+    assert await client.alive()
+    await client.aclose()
+
+
+async def test_client_chat_returns_message_content():
+    release = asyncio.Event()
+    release.set()
+    client = AsyncLLMClient("http://ollama", transport=_ollama_transport(release, []))
+    content = await client.chat([{"role": "user", "content": "hi"}], model="m")
+    assert content == '{"ideas": []}'
+    await client.aclose()
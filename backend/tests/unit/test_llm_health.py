@@ -0,0 +1,98 @@
+import httpx
+
+from app.utils.llm_health import LLMHealthMonitor, indicates_outage
+from app.utils.llm_service import LLMCall, LLMDeadlineExceeded, LLMService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class ProbedBackend:
+    name = "fake"
+    workers = 1
+
+    def __init__(self):
+        self.up = True
+        self.probes = 0
+
+    async def probe(self, timeout=2.0):
+        self.probes += 1
+        if not self.up:
+            raise httpx.ConnectError("connection refused")
+        return ["llama3.1:latest"]
+
+    async def run(self, call, deadline):
+        if not self.up:
+            raise httpx.ConnectError("connection refused")
+        return "ok"
+
+    async def aclose(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+async def test_probe_caches_liveness_models_until_stale():
+    backend = ProbedBackend()
+    clock = FakeClock()
+    monitor = LLMHealthMonitor({"fake": backend}, interval=15, down_interval=3, clock=clock)
+    assert not monitor.is_fresh("fake")
+
+    health = await monitor.probe("fake")
+    assert health.alive is True
+    assert health.models == ["llama3.1:latest"]
+    assert monitor.is_fresh("fake")
+    clock.now += 31
+    assert not monitor.is_fresh("fake")
+
+    backend.up = False
+    health = await monitor.probe("fake")
+    assert health.alive is False
+    assert health.consecutive_failures == 1
+    assert "ConnectError" in health.last_error
+    clock.now += 7
+    assert not monitor.is_fresh("fake")  # down state goes stale faster
+
+
+def test_request_outcomes_flip_state_but_timeouts_do_not():
+    monitor = LLMHealthMonitor({"fake": ProbedBackend()})
+    monitor.observe("fake", None)
+    assert monitor.state("fake").alive is True
+    monitor.observe("fake", httpx.ReadTimeout("slow"))
+    assert monitor.state("fake").alive is True
+    monitor.observe("fake", httpx.ConnectError("refused"))
+    assert monitor.state("fake").alive is False
+    assert monitor.state("fake").source == "request"
+
+
+def test_missed_deadlines_are_not_outages():
+    assert not indicates_outage(LLMDeadlineExceeded("LLM deadline exceeded"))
+    assert not indicates_outage(TimeoutError("slow"))
+    assert indicates_outage(ConnectionRefusedError("refused"))
+
+
+def test_service_answers_liveness_from_cache_and_failed_calls():
+    backend = ProbedBackend()
+    service = LLMService([backend], health_interval=60)
+    try:
+        assert service.alive() is True
+        probes = backend.probes
+        assert service.alive() is True
+        assert backend.probes == probes
+
+        backend.up = False
+        future = service.submit(LLMCall(prompt="hi"))
+        assert isinstance(future.exception(2), httpx.ConnectError)
+        assert service.alive() is False
+        assert backend.probes == probes
+        report = service.health_report()
+        assert report["status"] == "down"
+        assert report["backends"]["fake"]["models"] == ["llama3.1:latest"]
+    finally:
+        service.shutdown()
@@ -0,0 +1,238 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from app.utils.llm_cache import LLMCompletionCache
+from app.utils.llm_service import (
+    LLMCall,
+    LLMDeadlineExceeded,
+    LLMQueueFull,
+    LLMService,
+    LlamaCppBackend,
+    Priority,
+)
+
+
+class GatedBackend:
+    """One worker; the first call blocks until ``release`` is set."""
+
+    name = "fake"
+    workers = 1
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.order = []
+
+    async def run(self, call, deadline):
+        if not self.order:
+            self.started.set()
+            await asyncio.get_running_loop().run_in_executor(None, self.release.wait, 5)
+        self.order.append(call.prompt)
+        return call.prompt.upper()
+
+    async def alive(self, timeout=2.0):
+        return True
+
+    async def aclose(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+def test_interactive_calls_jump_ahead_of_batch_work():
+    backend = GatedBackend()
+    service = LLMService([backend], max_queue=8)
+    try:
+        first = service.submit(LLMCall(prompt="warmup"), Priority.BATCH)
+        assert backend.started.wait(2)
+        batch = service.submit(LLMCall(prompt="compose"), Priority.BATCH)
+        chat = service.submit(LLMCall(prompt="chat"), Priority.INTERACTIVE)
+        time.sleep(0.05)
+        assert service.stats()["backends"]["fake"]["queued"] == {"interactive": 1, "normal": 0, "batch": 1}
+        backend.release.set()
+        assert [f.result(2) for f in (first, batch, chat)] == ["WARMUP", "COMPOSE", "CHAT"]
+        assert backend.order == ["warmup", "chat", "compose"]
+    finally:
+        backend.release.set()
+        service.shutdown()
+
+
+def test_queued_call_expires_at_its_deadline_and_queue_is_bounded():
+    backend = GatedBackend()
+    service = LLMService([backend], max_queue=1)
+    try:
+        service.submit(LLMCall(prompt="busy"))
+        assert backend.started.wait(2)
+        late = service.submit(LLMCall(prompt="late"), timeout=0.01)
+        with pytest.raises(LLMQueueFull):
+            service.submit(LLMCall(prompt="overflow"))
+        time.sleep(0.05)
+        backend.release.set()
+        with pytest.raises(LLMDeadlineExceeded):
+            late.result(2)
+        stats = service.stats()["backends"]["fake"]
+        assert stats["expired"] == 1
+        assert stats["rejected"] == 1
+        assert "late" not in backend.order
+    finally:
+        backend.release.set()
+        service.shutdown()
+
+
+def test_llama_cpp_backend_serializes_calls():
+    active = []
+    overlaps = []
+
+    class FakeLlama:
+        def __call__(self, prompt, max_tokens, temperature, stream):
+            active.append(prompt)
+            if len(active) > 1:
+                overlaps.append(prompt)
+            time.sleep(0.02)
+            active.remove(prompt)
+            return iter([{"choices": [{"text": prompt}]}])
+
+    backend = LlamaCppBackend("model.gguf", loader=lambda **_: FakeLlama())
+    service = LLMService([backend])
+    try:
+        futures = [service.submit(LLMCall(prompt=f"p{i}")) for i in range(4)]
+        assert sorted(f.result(2) for f in futures) == ["p0", "p1", "p2", "p3"]
+        assert overlaps == []
+        tokens = list(service.stream("streamed"))
+        assert tokens == ["streamed"]
+    finally:
+        service.shutdown()
+
+
+def test_cached_calls_skip_the_backend(tmp_path):
+    calls = []
+
+    class EchoBackend(GatedBackend):
+        def model_for(self, call):
+            return "m"
+
+        async def run(self, call, deadline):
+            calls.append(call.prompt)
+            return "not json" if call.prompt == "bad" else '{"items": [{"name": "Hafer", "grams": 80}]}'
+
+    service = LLMService([EchoBackend()], cache=LLMCompletionCache(tmp_path / "c.sqlite3"))
+    try:
+        first = service.submit(LLMCall(prompt="80 g Hafer", as_json=True, cache=True)).result(2)
+        again = service.submit(LLMCall(prompt="80 g Hafer", as_json=True, cache=True)).result(2)
+        assert first == again
+        service.submit(LLMCall(prompt="80 g Hafer", as_json=True)).result(2)  # opt-out
+        service.submit(LLMCall(prompt="bad", as_json=True, cache=True)).result(2)
+        service.submit(LLMCall(prompt="bad", as_json=True, cache=True)).result(2)
+        assert calls == ["80 g Hafer", "80 g Hafer", "bad", "bad"]
+        assert service.stats()["cache"]["size"] == 1
+    finally:
+        service.shutdown()
+
+
+async def test_cancelling_the_caller_aborts_the_running_call():
+    aborted = threading.Event()
+
+    class SlowBackend(GatedBackend):
+        async def run(self, call, deadline):
+            if call.prompt != "slow":
+                return call.prompt.upper()
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                aborted.set()
+                raise
+            return "late"
+
+    service = LLMService([SlowBackend()])
+    try:
+        pending = asyncio.ensure_future(service.agenerate("slow"))
+        await asyncio.sleep(0.05)
+        pending.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await pending
+        assert await asyncio.get_running_loop().run_in_executor(None, aborted.wait, 2)
+        await asyncio.sleep(0.05)
+        assert service.stats()["backends"]["fake"]["cancelled"] == 1
+        # The single worker survives the abort and keeps serving.
+        assert await service.agenerate("next") == "NEXT"
+    finally:
+        service.shutdown()
+
+
+def test_cancelled_calls_are_skipped_with_several_backends():
+    class SpareBackend(GatedBackend):
+        name = "spare"
+
+    backend = GatedBackend()
+    service = LLMService([backend, SpareBackend()])
+    try:
+        busy = service.submit(LLMCall(prompt="busy"))
+        assert backend.started.wait(2)
+        dropped = service.submit(LLMCall(prompt="dropped"))
+        aborted = LLMCall(prompt="aborted", cancel=threading.Event())
+        service.submit(aborted)
+        assert dropped.cancel()
+        service.abort(aborted)
+        backend.release.set()
+        assert busy.result(2) == "BUSY"
+        assert service.generate("after", timeout=2) == "AFTER"
+        assert backend.order == ["busy", "after"]
+        assert service.stats()["backends"]["fake"]["cancelled"] == 2
+    finally:
+        backend.release.set()
+        service.shutdown()
+
+
+def test_unreachable_backend_fails_over_to_the_next_one():
+    class DownBackend(GatedBackend):
+        name = "ollama_http"
+        calls = 0
+
+        async def run(self, call, deadline):
+            DownBackend.calls += 1
+            raise httpx.ConnectError("connection refused")
+
+    class WarmBackend(GatedBackend):
+        name = "llama_cpp"
+
+        async def run(self, call, deadline):
+            return "warm:" + call.prompt
+
+    service = LLMService([DownBackend(), WarmBackend()])
+    try:
+        assert service.generate("hi", timeout=2) == "warm:hi"
+        assert service.route() == "llama_cpp"
+        assert service.generate("again", timeout=2) == "warm:again"
+        assert DownBackend.calls == 1
+    finally:
+        service.shutdown()
+
+
+def test_llama_cpp_backend_preloads_within_its_memory_limit(tmp_path):
+    model = tmp_path / "model.gguf"
+    model.write_bytes(b"\0" * 2048)
+    loads = []
+
+    def loader(**kwargs):
+        loads.append(kwargs["model_path"])
+        return object()
+
+    service = LLMService([LlamaCppBackend(str(model), loader=loader, preload=True, max_memory_mb=1)])
+    try:
+        service.start()
+        deadline = time.monotonic() + 2
+        while not loads and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert loads == [str(model)]
+    finally:
+        service.shutdown()
+
+    too_big = LlamaCppBackend(str(model), loader=loader, max_memory_mb=1)
+    model.write_bytes(b"\0" * (2 * 2**20))
+    with pytest.raises(MemoryError):
+        too_big._model()
@@ -1,19 +1,16 @@
 import pytest
 
-from app.utils.llm import _strip_fences, llm_generate_json
+from app.utils.llm import _json_root, _strip_fences, allm_generate_json
 
 
-class FakeResponse:
-    def __init__(self, content: str, status_code: int = 200):
+class FakeService:
+    def __init__(self, content: str):
         self._content = content
-        self.status_code = status_code
+        self.calls = []
 
-    def raise_for_status(self):
-        if self.status_code >= 400:
-            raise RuntimeError("HTTP error")
-
-    def json(self):
-        return {"message": {"content": self._content}}
+    async def achat(self, messages, **kwargs):
+        self.calls.append((messages, kwargs))
+        return self._content
 
 
 def test_strip_fences_handles_json_block():
@@ -26,35 +23,21 @@ def test_strip_fences_returns_plain_text():
     assert _strip_fences(plain) == plain
 
 
-def test_llm_generate_json_extracts_root_key(monkeypatch):
-    payload = '{"ideas": [{"title": "A"}]}'
-
-    def fake_post(url, json, timeout):
-        assert url.endswith("/api/chat")
-        return FakeResponse(payload)
-
-    monkeypatch.setattr("app.utils.llm.requests.post", fake_post)
-    ideas = llm_generate_json("sys", "user", "model", "http://localhost:11434", "ideas")
-    assert ideas == [{"title": "A"}]
-
-
-def test_llm_generate_json_accepts_list_payload(monkeypatch):
-    payload = '[{"title": "A"}]'
-
-    def fake_post(url, json, timeout):
-        return FakeResponse(payload)
+async def test_allm_generate_json_extracts_root_key(monkeypatch):
+    service = FakeService('```json\n{"ideas": [{"title": "A"}]}\n```')
+    monkeypatch.setattr("app.utils.llm_service.get_llm_service", lambda: service)
 
-    monkeypatch.setattr("app.utils.llm.requests.post", fake_post)
-    ideas = llm_generate_json("sys", "user", "model", "http://localhost:11434", "ideas")
+    ideas = await allm_generate_json("sys", "user", "model", "ideas", timeout=5)
     assert ideas == [{"title": "A"}]
+    messages, kwargs = service.calls[0]
+    assert [message["role"] for message in messages] == ["system", "user"]
+    assert kwargs["as_json"] is True and kwargs["timeout"] == 5
 
 
-def test_llm_generate_json_raises_for_unexpected_shape(monkeypatch):
-    payload = '{"unexpected": true}'
+def test_json_root_accepts_list_payload():
+    assert _json_root('[{"title": "A"}]', "ideas") == [{"title": "A"}]
 
-    def fake_post(url, json, timeout):
-        return FakeResponse(payload)
 
-    monkeypatch.setattr("app.utils.llm.requests.post", fake_post)
+def test_json_root_raises_for_unexpected_shape():
     with pytest.raises(ValueError):
-        llm_generate_json("sys", "user", "model", "http://localhost:11434", "ideas")
+        _json_root('{"unexpected": true}', "ideas")
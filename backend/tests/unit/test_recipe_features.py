@@ -0,0 +1,45 @@
+from app.models.recipes import Recipe, RecipeItem
+from app.rag.features import RecipeFeatureStore
+from app.rag.preprocess import QueryPreprocessor
+
+
+def _recipe() -> Recipe:
+    return Recipe(
+        id=1,
+        title="Peanut Oat Bowl",
+        tags="Vegan, breakfast",
+        macros_kcal=420.0,
+        ingredients=[RecipeItem(name="Oats", grams=60.0), RecipeItem(name="Peanut Butter", grams=20.0)],
+    )
+
+
+def test_features_match_preprocessor():
+    recipe = _recipe()
+    features = RecipeFeatureStore().get(recipe)
+    assert features.document == QueryPreprocessor.build_document(recipe)
+    assert features.doc_tokens == set(QueryPreprocessor.tokenize(features.document))
+    assert features.ingredient_tokens == {"oats", "peanut", "butter"}
+    assert features.ingredient_names == ("oats", "peanut butter")
+    assert features.tags == ("vegan", "breakfast")
+    assert features.macros[0] == 420.0
+
+
+def test_store_reuses_features_until_recipe_changes():
+    store = RecipeFeatureStore()
+    recipe = _recipe()
+    first = store.get(recipe)
+    assert store.get(recipe) is first
+    assert store.stats()["hits"] == 1
+
+    recipe.ingredients.append(RecipeItem(name="Banana", grams=100.0))
+    changed = store.get(recipe)
+    assert changed is not first
+    assert "banana" in changed.ingredient_tokens
+
+
+def test_store_is_bounded_and_skips_unsaved_recipes():
+    store = RecipeFeatureStore(max_entries=1)
+    store.warm([_recipe(), Recipe(id=2, title="Tofu Scramble")])
+    assert len(store) == 1
+    store.get(Recipe(title="Draft"))
+    assert len(store) == 1
@@ -0,0 +1,35 @@
+from app.rag.result_cache import (
+    RetrievalResultCache,
+    bump_library_version,
+    library_version,
+    make_cache_key,
+)
+
+
+def test_result_cache_is_invalidated_by_library_version():
+    cache = RetrievalResultCache(max_entries=2)
+    version = library_version()
+    cache.put("a", 1, version)
+    assert cache.get("a", version) == 1
+
+    bump_library_version()
+    assert cache.get("a") is None
+    assert cache.stats()["stale"] == 1
+    assert len(cache) == 0
+
+
+def test_result_cache_evicts_lru_and_expires():
+    now = [0.0]
+    cache = RetrievalResultCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    cache.put("a", 1, 1)
+    cache.put("b", 2, 1)
+    assert cache.get("a", 1) == 1
+    cache.put("c", 3, 1)
+    assert cache.get("b", 1) is None  # least recently used
+    now[0] = 11.0
+    assert cache.get("a", 1) is None
+
+
+def test_cache_key_ignores_dict_order():
+    assert make_cache_key({"a": 1, "b": 2}, [1]) == make_cache_key({"b": 2, "a": 1}, [1])
+    assert make_cache_key({"a": 1}) != make_cache_key({"a": 2})